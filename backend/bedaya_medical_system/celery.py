@@ -0,0 +1,14 @@
+"""
+Celery application for background work (see common.tasks).
+
+Start a worker with: celery -A bedaya_medical_system worker
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bedaya_medical_system.settings')
+
+app = Celery('bedaya_medical_system')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
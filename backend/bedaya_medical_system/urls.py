@@ -23,6 +23,7 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/auth/", include("accounts.urls")),
     path("api/patients/", include("patients.urls")),
+    path("api/sync/", include("sync.urls")),
     path("api/", include("others.urls")),
 ]
 
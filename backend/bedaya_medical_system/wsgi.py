@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bedaya_medical_system.settings")
 
 application = get_wsgi_application()
+
+# Build the vocabulary caches and autocomplete indexes before the first request
+from others.cache import warm_vocabularies  # noqa: E402
+
+warm_vocabularies()
@@ -0,0 +1,107 @@
+"""
+Chunked bulk delete shared by the BulkDeleteMixin viewsets.
+"""
+import logging
+import uuid
+from collections import Counter
+from contextlib import ExitStack, nullcontext
+from datetime import timedelta
+
+from django.db import router, transaction
+from django.utils import timezone
+
+from .models import BulkDeleteTask
+
+# Primary keys per DELETE ... IN (...) statement, well below SQLite's variable limit
+BULK_DELETE_CHUNK_SIZE = 500
+
+# Seconds the progress of a background deletion stays readable after its last update
+BULK_DELETE_STATUS_TIMEOUT = 60 * 60
+
+# Context manager factories entered with the database alias around the
+# deletion of every chunk, inside its transaction; apps that react to
+# deletes register theirs, e.g. sync batches its tombstones
+chunk_contexts = []
+
+logger = logging.getLogger(__name__)
+
+
+def bulk_delete(model, ids, chunk_size=BULK_DELETE_CHUNK_SIZE, progress=None, atomic=True):
+    """
+    Delete the ``model`` rows with the given primary keys, ``chunk_size`` at a
+    time, and return the number of deleted rows per model label, cascades and
+    ManyToMany through tables included.
+
+    Each chunk goes through Django's delete collector, which only loads the
+    rows that have delete signal receivers or cascades of their own; every
+    other relation is removed with a raw DELETE ... WHERE <fk> IN (...). With
+    ``atomic`` the whole deletion is one transaction, otherwise each chunk is
+    committed on its own. ``progress(done, total)`` is called after each chunk.
+    Each chunk also runs inside the ``chunk_contexts``.
+    """
+    ids = list(dict.fromkeys(ids))
+    using = router.db_for_write(model)
+    counts = Counter()
+
+    with transaction.atomic(using=using) if atomic else nullcontext():
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            with transaction.atomic(using=using), ExitStack() as stack:
+                for context in chunk_contexts:
+                    stack.enter_context(context(using))
+                _, deleted = model._base_manager.using(using).filter(pk__in=chunk).delete()
+            counts.update(deleted)
+            if progress:
+                progress(start + len(chunk), len(ids))
+
+    return {label: count for label, count in counts.items() if count}
+
+
+def start_bulk_delete(model, ids, chunk_size=BULK_DELETE_CHUNK_SIZE):
+    """
+    Queue bulk_delete() as a Celery task, committing chunk by chunk, and
+    return the task ID to poll with get_bulk_delete_status(). Progress is kept
+    in a BulkDeleteTask row, which the web and Celery workers all see.
+    """
+    from .tasks import bulk_delete_task
+
+    ids = list(dict.fromkeys(ids))
+    BulkDeleteTask.objects.filter(
+        updated_at__lt=timezone.now() - timedelta(seconds=BULK_DELETE_STATUS_TIMEOUT),
+    ).delete()
+    task = BulkDeleteTask.objects.create(id=uuid.uuid4().hex, model=model._meta.label, total=len(ids))
+    bulk_delete_task.delay(task.id, model._meta.label, [str(pk) for pk in ids], chunk_size)
+    return task.id
+
+
+def get_bulk_delete_status(task_id):
+    """Progress of a background deletion, or None for an unknown or expired task"""
+    task = BulkDeleteTask.objects.filter(
+        id=task_id, updated_at__gte=timezone.now() - timedelta(seconds=BULK_DELETE_STATUS_TIMEOUT),
+    ).first()
+    if task is None:
+        return None
+    status = {'status': task.status, 'done': task.done, 'total': task.total}
+    if task.status == 'finished':
+        status['counts'] = task.counts
+    elif task.status == 'failed':
+        status['error'] = task.error
+    return status
+
+
+def _set_bulk_delete_status(task_id, **fields):
+    BulkDeleteTask.objects.filter(id=task_id).update(updated_at=timezone.now(), **fields)
+
+
+def run_bulk_delete(task_id, model, ids, chunk_size=BULK_DELETE_CHUNK_SIZE):
+    """Run a queued deletion, recording its progress in its BulkDeleteTask"""
+    def progress(done, total):
+        _set_bulk_delete_status(task_id, status='running', done=done)
+
+    try:
+        counts = bulk_delete(model, ids, chunk_size, progress=progress, atomic=False)
+    except Exception as exc:
+        logger.exception('Background bulk delete %s failed', task_id)
+        _set_bulk_delete_status(task_id, status='failed', error=str(exc))
+    else:
+        _set_bulk_delete_status(task_id, status='finished', done=len(ids), counts=counts)
@@ -0,0 +1,191 @@
+"""
+Content-Encoding negotiation and compression of response bodies.
+
+gzip is always available; brotli and zstd need the optional brotli and
+zstandard packages. They are tried in the order of the
+``COMPRESSION_ENCODINGS`` setting (br, zstd, gzip by default): brotli makes
+repetitive JSON such as adult lists the smallest, zstd is the fastest. Every
+coding also has a streaming compressor that flushes after each chunk, so a
+client can decode a StreamingHttpResponse as it arrives.
+"""
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+# Quality 5 keeps brotli about as fast as gzip level 6 on dynamic responses
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 6
+
+DEFAULT_ENCODINGS = ('br', 'zstd', 'gzip')
+
+# Media types worth compressing; anything else (Parquet, images) is left alone
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/x-ndjson', 'application/javascript',
+                      'application/xml')
+COMPRESSIBLE_SUFFIXES = ('+json', '+xml')
+
+
+class _GzipStream:
+    def __init__(self):
+        # wbits 31: a gzip header, with mtime 0 like compress_string()
+        self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self):
+        self.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+def _brotli(content):
+    return brotli.compress(content, quality=BROTLI_QUALITY)
+
+
+def _zstd(content):
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(content)
+
+
+# content coding: (compress function, stream compressor class)
+ENCODINGS = {
+    'br': (_brotli, _BrotliStream),
+    'zstd': (_zstd, _ZstdStream),
+    'gzip': (compress_string, _GzipStream),
+}
+
+
+def _installed(coding):
+    return {'br': brotli, 'zstd': zstandard}.get(coding, zlib) is not None
+
+
+def available_encodings(order=None):
+    """{content coding: compress function} of the installed codings, most preferred first"""
+    if order is None:
+        order = getattr(settings, 'COMPRESSION_ENCODINGS', DEFAULT_ENCODINGS)
+    return {coding: ENCODINGS[coding][0] for coding in order if coding in ENCODINGS and _installed(coding)}
+
+
+def parse_accept_encoding(header):
+    """{content coding: q value} of an Accept-Encoding header"""
+    accepted = {}
+    for part in header.split(','):
+        coding, *params = [item.strip() for item in part.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.lower()] = quality
+    return accepted
+
+
+def choose_encoding(header, encodings=None):
+    """
+    The content coding to use for an Accept-Encoding header, or None for
+    identity: the client's highest q value wins, ties go to the order of
+    ``encodings`` (available_encodings() by default)
+    """
+    encodings = available_encodings() if encodings is None else encodings
+    accepted = parse_accept_encoding(header or '')
+    best, best_quality = None, 0.0
+    for coding in encodings:
+        quality = accepted.get(coding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def is_compressible(content_type):
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_TYPES) or media_type.endswith(COMPRESSIBLE_SUFFIXES)
+
+
+def compress(encoding, content):
+    return ENCODINGS[encoding][0](content)
+
+
+def compress_stream(encoding, chunks):
+    """Compressed ``chunks``, flushed after each one"""
+    compressor = ENCODINGS[encoding][1]()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(encoding, chunks):
+    """compress_stream() for an async iterator"""
+    compressor = ENCODINGS[encoding][1]()
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def weaken_etag(response):
+    # Like GZipMiddleware: the bytes differ from the identity representation
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+
+
+def compress_response_content(request, response, content, min_size):
+    """
+    ``content`` compressed for ``request`` when it is at least ``min_size``
+    bytes, with Content-Encoding and Vary set on ``response``; otherwise
+    ``content`` as it is
+    """
+    if not min_size or len(content) < min_size or response.has_header('Content-Encoding'):
+        return content
+
+    patch_vary_headers(response, ['Accept-Encoding'])
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if encoding is None:
+        return content
+
+    compressed = compress(encoding, content)
+    if len(compressed) >= len(content):
+        return content
+    response['Content-Encoding'] = encoding
+    weaken_etag(response)
+    return compressed
@@ -0,0 +1,234 @@
+"""
+Compiled read path for list endpoints.
+
+ModelSerializer spends most of a large list in per-row, per-field work:
+building instances, get_attribute() and to_representation() for every
+field. compile_read_plan() turns a serializer's bound fields into a plan once
+per request: the columns to read with values(), a converter per column
+mirroring the field's to_representation(), and the ManyToMany fields, which
+are read with one query per relation on the through table. Rows come out as
+dicts equal to what the serializer returns.
+
+dumps() encodes them with orjson when it is installed, falling back to
+DRF's JSONRenderer for anything orjson would print differently, so the
+bytes match the regular path exactly. FastJSONRenderer renders a response
+with it.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+
+class FloatOutOfRange(ValueError):
+    """A float stdlib json prints in exponent form, unlike orjson"""
+
+
+def _float(value):
+    # json writes 1e-05 and 1e+16 where orjson writes 0.00001 and 1e16
+    if value and not 1e-4 <= abs(value) < 1e16:
+        raise FloatOutOfRange(value)
+    return value
+
+
+def _datetime_converter(field):
+    """DateTimeField.to_representation for ISO 8601 output"""
+    timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+    def convert(value):
+        if isinstance(value, str):
+            return value
+        if timezone is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone)
+        else:
+            value = field.enforce_timezone(value)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+    return convert
+
+
+def _identity(value):
+    return value
+
+
+# Converters by exact field class; subclasses may override to_representation
+CONVERTERS = {
+    serializers.CharField: lambda field: _identity,
+    serializers.IntegerField: lambda field: _identity,
+    serializers.FloatField: lambda field: _float,
+    serializers.UUIDField: lambda field: str if field.uuid_format == 'hex_verbose' else None,
+    serializers.ChoiceField: lambda field: (
+        _identity if all(str(key) == key for key in field.choice_strings_to_values.values()) else None
+    ),
+    serializers.DateTimeField: lambda field: (
+        _datetime_converter(field) if getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601 else None
+    ),
+}
+
+
+def _converter(field):
+    """Function equal to field.to_representation for values() output, or None if unsupported"""
+    factory = CONVERTERS.get(type(field))
+    return factory(field) if factory else None
+
+
+class ReadPlan:
+    """Column and relation layout of one serializer, see compile_read_plan()"""
+
+    def __init__(self, model, entries, relations):
+        self.model = model
+        # (output key, values() column, converter) in output order; the
+        # column is None for the ManyToMany fields in ``relations``
+        self.entries = entries
+        # {output key: (ManyToManyField, expanded)}
+        self.relations = relations
+
+    @property
+    def columns(self):
+        return [column for _, column, _ in self.entries if column is not None]
+
+    def values(self, queryset, extra_columns=()):
+        """``queryset`` as values() dicts with the plan's columns, plus the pk"""
+        columns = dict.fromkeys(['pk', *self.columns, *extra_columns])
+        return queryset.select_related(None).prefetch_related(None).values(*columns)
+
+    def related(self, field, expanded, pks, using):
+        """{pk: [output value, ...]} for one ManyToMany field, in related primary key order"""
+        through = field.remote_field.through
+        source = through._meta.get_field(field.m2m_field_name()).attname
+        target = through._meta.get_field(field.m2m_reverse_field_name())
+        columns = [source, target.attname]
+        if expanded:
+            columns.append(f'{target.name}__name')
+        rows = (
+            through._base_manager.using(using)
+            .filter(**{f'{source}__in': pks})
+            .order_by(source, target.attname)
+            .values_list(*columns)
+        )
+        related = {}
+        if expanded:
+            for pk, target_pk, name in rows:
+                related.setdefault(pk, []).append({'value': str(target_pk), 'label': name})
+        else:
+            for pk, target_pk in rows:
+                related.setdefault(pk, []).append(str(target_pk))
+        return related
+
+    def serialize(self, rows, using):
+        """Serializer output for values() rows, as a list of dicts"""
+        pks = [row['pk'] for row in rows]
+        related = {
+            key: self.related(field, expanded, pks, using) if pks else {}
+            for key, (field, expanded) in self.relations.items()
+        }
+        entries = self.entries
+
+        data = []
+        for row in rows:
+            item = {}
+            for key, column, convert in entries:
+                if column is None:
+                    item[key] = related[key].get(row['pk'], [])
+                else:
+                    value = row[column]
+                    item[key] = None if value is None else convert(value)
+            data.append(item)
+        return data
+
+
+def compile_read_plan(serializer):
+    """
+    ReadPlan for a DynamicFieldsMixin ModelSerializer (its ``fields`` and
+    ``expand`` included), or None when a field cannot be read from values():
+    method fields, nested serializers, custom to_representation() and
+    field types without a converter.
+    """
+    from .mixins import DynamicFieldsMixin
+
+    serializer_class = type(serializer)
+    if not isinstance(serializer, DynamicFieldsMixin):
+        return None
+    # Only DynamicFieldsMixin may customise the representation
+    for cls in serializer_class.__mro__:
+        if cls in (DynamicFieldsMixin, serializers.ModelSerializer):
+            break
+        if 'to_representation' in vars(cls):
+            return None
+
+    model = serializer.Meta.model
+    opts = model._meta
+    entries, relations = [], {}
+    for key, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*' or len(field.source_attrs) != 1:
+            return None
+        try:
+            model_field = opts.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+
+        if type(field) is serializers.ManyRelatedField:
+            child = field.child_relation
+            if not model_field.many_to_many or type(child) is not serializers.PrimaryKeyRelatedField:
+                return None
+            if child.pk_field is not None:
+                return None
+            entries.append((key, None, None))
+            relations[key] = (model_field, key in serializer.expand)
+            continue
+
+        if not model_field.concrete or model_field.is_relation:
+            return None
+        convert = _converter(field)
+        if convert is None:
+            return None
+        entries.append((key, model_field.name, convert))
+    return ReadPlan(model, entries, relations)
+
+
+def orjson_available():
+    return orjson is not None
+
+
+# orjson's own datetime, dataclass and str/int subclass output differs from
+# DRF's encoder; passing them through makes orjson raise TypeError instead
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS
+    if orjson is not None else 0
+)
+
+
+def dumps(data):
+    """
+    ``data`` as the bytes JSONRenderer would produce with the default
+    settings, using orjson when it can print them identically. Floats are
+    the caller's to check, see FloatOutOfRange.
+    """
+    if orjson is not None:
+        try:
+            content = orjson.dumps(data, option=ORJSON_OPTIONS)
+        except (TypeError, orjson.JSONEncodeError):
+            pass
+        else:
+            # JSONRenderer escapes these two to keep the output valid JavaScript
+            return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return JSONRenderer().render(data)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with dumps() when the output is compact"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
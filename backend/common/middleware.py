@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .compression import (
+    acompress_stream, available_encodings, choose_encoding, compress, compress_stream, is_compressible, weaken_etag,
+)
+from .response_cache import response_cache
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress responses with the best coding the client accepts among
+    brotli, zstd and gzip (see common.compression). Bodies under
+    ``COMPRESSION_MIN_SIZE`` bytes, media types that don't compress (Parquet
+    exports) and responses already encoded are left alone. Streaming
+    responses are compressed chunk by chunk, whatever their size.
+
+    Responses marked with a ``compression_cache_key`` (the cached vocabulary
+    actions, see ResponseCacheMixin) have their compressed bytes kept in the
+    response cache, so repeated requests skip the compression as well.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not is_compressible(response.get('Content-Type')):
+            return response
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return response
+        min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        if not response.streaming and len(response.content) < min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), available_encodings())
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(encoding, response.streaming_content)
+            else:
+                response.streaming_content = compress_stream(encoding, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            cache_key = getattr(response, 'compression_cache_key', None)
+            compressed = response_cache.get(cache_key, variant=encoding) if cache_key else None
+            if compressed is None:
+                compressed = compress(encoding, response.content)
+                if len(compressed) >= len(response.content):
+                    return response
+                if cache_key:
+                    response_cache.set(cache_key, compressed, variant=encoding)
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        weaken_etag(response)
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,403 @@
+import hashlib
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .bulk_delete import bulk_delete, get_bulk_delete_status, start_bulk_delete
+from .fast import FastJSONRenderer, FloatOutOfRange, compile_read_plan
+from .queries import ordered_prefetches
+from .renderers import ORJSONRenderer
+from .response_cache import response_cache
+from .versions import get_table_tokens
+
+
+class BulkDeleteMixin:
+    """
+    Chunked bulk delete for a ModelViewSet. The viewset's bulk_delete action
+    calls perform_bulk_delete() with the body key holding the IDs; passing
+    "async": true in the body runs the deletion in the background and returns
+    a task ID to poll with the bulk_delete_status action.
+    """
+
+    def perform_bulk_delete(self, request, ids_key, message):
+        ids = request.data.get(ids_key, [])
+        if not isinstance(ids, list):
+            return Response({'error': f'{ids_key} must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        model = self.get_queryset().model
+        pk_field = model._meta.pk
+        try:
+            ids = [pk_field.to_python(pk) for pk in ids]
+        except DjangoValidationError:
+            return Response({'error': f'{ids_key} contains an invalid id'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if request.data.get('async'):
+            task_id = start_bulk_delete(model, ids)
+            return Response({'task_id': task_id, **get_bulk_delete_status(task_id)}, status=status.HTTP_202_ACCEPTED)
+        
+        counts = bulk_delete(model, ids)
+        return Response({
+            'message': message,
+            'deleted': sum(counts.values()),
+            'counts': counts,
+        })
+
+    @action(detail=False, methods=['get'])
+    def bulk_delete_status(self, request):
+        """
+        Progress of a background bulk delete
+        Usage: /api/<resource>/bulk_delete_status/?task_id=<task id>
+        """
+        task_id = request.query_params.get('task_id', '')
+        task = get_bulk_delete_status(task_id) if task_id else None
+        
+        if task is None:
+            return Response({'error': 'Unknown task_id'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({'task_id': task_id, **task})
+
+
+class EarlyResponse(Exception):
+    """Raised from initial() to answer a request without running the action"""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for the GET actions named in
+    ``conditional_actions``. The validators are computed before the action
+    runs, so a matching If-None-Match gets a 304 without loading or
+    serializing anything. If-Modified-Since alone never does: Last-Modified
+    has one second resolution and would hide a second write within the same
+    second.
+
+    The ETag covers the request path and query string, the negotiated media
+    type, the table tokens of the ``etag_models`` vocabularies (see
+    common.versions; without a shared cache they include the tables' row
+    counts and latest updates) and, for detail actions, the object's
+    ``updated_field``, which also gives Last-Modified. Responses of those
+    actions get the Cache-Control directives of ``cache_control``, or of
+    ``action_cache_control[action]`` when set.
+    """
+    conditional_actions = ('retrieve',)
+    etag_models = ()
+    updated_field = None
+    cache_control = {'private': True, 'no_cache': True}
+    action_cache_control = {}
+
+    def get_validators(self, request):
+        """(etag, last modified timestamp) for the current request, or None to skip"""
+        parts = [request.get_full_path(), request.accepted_media_type]
+        parts.extend(get_table_tokens(self.etag_models))
+
+        last_modified = None
+        if self.detail and self.updated_field:
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            try:
+                updated = (
+                    self.get_queryset().prefetch_related(None).filter(**lookup)
+                    .values_list(self.updated_field, flat=True).first()
+                )
+            except (DjangoValidationError, TypeError, ValueError):
+                return None
+            if updated is None:
+                return None
+            parts.append(updated.isoformat())
+            last_modified = int(updated.timestamp())
+
+        etag = quote_etag(hashlib.md5('|'.join(parts).encode()).hexdigest())
+        return etag, last_modified
+
+    def is_conditional(self, request):
+        return request.method in ('GET', 'HEAD') and self.action in self.conditional_actions
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = self.get_validators(request) if self.is_conditional(request) else None
+        if self.validators is not None:
+            response = get_conditional_response(request, etag=self.validators[0])
+            if response is not None:
+                raise EarlyResponse(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, EarlyResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, 'validators', None)
+        if validators is not None and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response.headers['ETag'] = etag
+            if last_modified is not None:
+                response.headers['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, **self.action_cache_control.get(self.action, self.cache_control))
+            patch_vary_headers(response, ['Accept'])
+        return response
+
+
+class ResponseCacheMixin(ConditionalGetMixin):
+    """
+    Serves the collection actions in ``cached_actions`` from the response
+    cache (common.response_cache), keyed by their ETag, so a hit skips the
+    queries and serialization; the compression middleware caches their
+    compressed bodies too. Override should_cache_response() to narrow it
+    down further.
+    """
+    cached_actions = ()
+
+    def should_cache_response(self, request):
+        return True
+
+    def initial(self, request, *args, **kwargs):
+        self.cache_etag = self.compressed_cache_etag = None
+        super().initial(request, *args, **kwargs)
+        if (
+            self.validators is not None and not self.detail
+            and self.action in self.cached_actions and self.should_cache_response(request)
+        ):
+            etag = self.validators[0]
+            self.compressed_cache_etag = etag
+            data = response_cache.get(etag)
+            if data is not None:
+                raise EarlyResponse(Response(data))
+            self.cache_etag = etag
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(self, 'cache_etag', None) and isinstance(response, Response) and response.status_code == 200:
+            response_cache.set(self.cache_etag, response.data)
+        etag = getattr(self, 'compressed_cache_etag', None)
+        if etag and response.status_code == 200:
+            # The compression middleware caches the compressed body under it
+            response.compression_cache_key = etag
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def view_columns(view, model):
+    """
+    Concrete fields of ``model`` a list needs beyond the serializer's: the
+    view's ordering fields and ``updated_field`` for the keyset cursors and
+    ETags, and ``id``, the cursor's tie-breaker
+    """
+    opts = model._meta
+    ordering_fields = getattr(view, 'ordering_fields', None)
+    if not isinstance(ordering_fields, (list, tuple)):
+        ordering_fields = []
+    columns = []
+    for name in ['id', *ordering_fields, getattr(view, 'updated_field', None)]:
+        try:
+            if name and opts.get_field(name).concrete and name not in columns:
+                columns.append(name)
+        except FieldDoesNotExist:
+            pass
+    return columns
+
+
+def parse_field_list(value):
+    """Names of a comma-separated query parameter, or None when it is absent"""
+    if value is None:
+        return None
+    return [name for name in (part.strip() for part in value.split(',')) if name]
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin for sparse fieldsets. The ``fields`` argument limits the
+    output to the named fields; ``expand`` names ManyToMany fields rendered
+    as {value, label} objects instead of primary keys, as the fields in
+    ``expanded_fields`` always are. SparseFieldsMixin passes both from the
+    query string.
+    """
+    expanded_fields = ()
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.expand = {*self.expanded_fields, *(expand or ())}
+        if fields is not None:
+            keep = {*fields, *(expand or ())}
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+    def expandable_fields(self):
+        model = self.Meta.model
+        return [
+            name for name, field in self.fields.items()
+            if field.source in {f.name for f in model._meta.many_to_many}
+        ]
+
+    def get_queryset_fields(self):
+        """
+        (columns for only(), select_related lookups, prefetch_related lookups)
+        read by the current fields, or None when a field does not map to a
+        model attribute (method fields, source='*', properties)
+        """
+        opts = self.Meta.model._meta
+        columns, related, prefetch = {opts.pk.name}, set(), set()
+        for field in self.fields.values():
+            if field.source == '*':
+                return None
+            name, *rest = field.source_attrs
+            try:
+                model_field = opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if model_field.many_to_many:
+                prefetch.add(name)
+            elif not model_field.concrete:
+                return None
+            else:
+                columns.add(name)
+                if rest and model_field.is_relation:
+                    columns.add('__'.join([name, *rest]))
+                    related.add(name)
+        return columns, related, prefetch
+
+    def to_representation(self, instance):
+        ret = super().to_representation(instance)
+        for name in self.expand:
+            if name in ret:
+                ret[name] = [
+                    {'value': str(related.pk), 'label': related.name}
+                    for related in getattr(instance, self.fields[name].source).all()
+                ]
+        return ret
+
+
+class SparseFieldsMixin:
+    """
+    ``?fields=id,name,age`` and ``?expand=drugs`` for the actions in
+    ``sparse_fields_actions`` of a viewset whose serializer is a
+    DynamicFieldsMixin: the response holds just those fields, and the
+    queryset loads just their columns with only() and prefetches just the
+    requested ManyToMany relations. The ordering fields and
+    ``updated_field`` are always loaded for the keyset cursors and ETags.
+    Unknown names are a 400.
+    """
+    sparse_fields_actions = ('list', 'retrieve')
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def get_sparse_fields(self):
+        """(field names or None, expanded field names) requested for this action"""
+        if hasattr(self, '_sparse_fields'):
+            return self._sparse_fields
+
+        serializer_class = self.get_serializer_class()
+        fields, expand = None, []
+        if self.action in self.sparse_fields_actions and issubclass(serializer_class, DynamicFieldsMixin):
+            fields = parse_field_list(self.request.query_params.get(self.fields_query_param))
+            expand = parse_field_list(self.request.query_params.get(self.expand_query_param)) or []
+            if fields is not None or expand:
+                serializer = serializer_class()
+                errors = {}
+                unknown = [name for name in fields or () if name not in serializer.fields]
+                if unknown:
+                    errors[self.fields_query_param] = [f"Unknown field(s): {', '.join(unknown)}"]
+                unknown = [name for name in expand if name not in serializer.expandable_fields()]
+                if unknown:
+                    errors[self.expand_query_param] = [f"Field(s) cannot be expanded: {', '.join(unknown)}"]
+                if errors:
+                    raise ValidationError(errors)
+
+        self._sparse_fields = fields, expand
+        return self._sparse_fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields, expand = self.get_sparse_fields()
+        if fields is not None or expand:
+            kwargs.setdefault('fields', fields)
+            kwargs.setdefault('expand', expand)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields, expand = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+
+        plan = self.get_serializer_class()(fields=fields, expand=expand).get_queryset_fields()
+        if plan is None:
+            return queryset
+        columns, related, prefetch = plan
+
+        columns.update(view_columns(self, queryset.model))
+
+        # select_related() without lookups would follow every foreign key
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        prefetch = ordered_prefetches(queryset.model, sorted(prefetch))
+        return queryset.prefetch_related(None).prefetch_related(*prefetch).only(*columns)
+
+
+class FastListMixin:
+    """
+    Serves the list action through common.fast when it can: the rows are
+    read with values(), turned into the serializer's output by a ReadPlan
+    and encoded with orjson, skipping the serializer instances entirely.
+    The response bytes are the same as the regular path's, which is used
+    whenever the plan or the JSON settings don't allow it: a serializer the
+    plan can't compile, another renderer (the browsable API, ?format=),
+    JSONRenderer with indented or ASCII-only output, or a float orjson
+    would print differently. ORJSONRenderer renders the plan's output
+    itself.
+    """
+    fast_list = True
+
+    def list(self, request, *args, **kwargs):
+        response = self.fast_list_response(request) if self.fast_list else None
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return response
+
+    def get_fast_renderer(self, request):
+        """
+        Renderer for the ReadPlan output that gives the negotiated renderer's
+        exact bytes, or None
+        """
+        renderer = getattr(request, 'accepted_renderer', None)
+        # Same renderer, same bytes: the plan's output equals the serializer's
+        if type(renderer) is ORJSONRenderer:
+            return renderer
+        if type(renderer) is not JSONRenderer:
+            return None
+        if renderer.get_indent(request.accepted_media_type, self.get_renderer_context()) is not None:
+            return None
+        if not (api_settings.COMPACT_JSON and api_settings.UNICODE_JSON and api_settings.STRICT_JSON):
+            return None
+        return FastJSONRenderer()
+
+    def fast_list_response(self, request):
+        """The list response from a ReadPlan, or None to use the serializer"""
+        renderer = self.get_fast_renderer(request)
+        if renderer is None:
+            return None
+        plan = compile_read_plan(self.get_serializer())
+        if plan is None:
+            return None
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = plan.values(queryset, extra_columns=view_columns(self, queryset.model))
+        page = self.paginate_queryset(rows)
+        try:
+            data = plan.serialize(list(rows if page is None else page), queryset.db)
+        except FloatOutOfRange:
+            return None
+        # finalize_response() hands the request's renderer to the response
+        request.accepted_renderer = renderer
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
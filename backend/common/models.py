@@ -0,0 +1,24 @@
+from django.db import models
+
+
+class BulkDeleteTask(models.Model):
+    """Progress of a background bulk delete, see common.bulk_delete"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('finished', 'Finished'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.CharField(primary_key=True, max_length=32, editable=False)
+    # Model._meta.label of the deleted rows, e.g. 'others.DrugModel'
+    model = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    done = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    counts = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.model} {self.id} {self.status}"
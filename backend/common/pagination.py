@@ -0,0 +1,462 @@
+import base64
+import datetime
+import hashlib
+import json
+import math
+import uuid
+from types import SimpleNamespace
+from urllib import parse
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.db import DatabaseError, connections, router
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class DynamicPageSizeMixin:
+    """
+    Allow the page size to be chosen by the client, capped at max_page_size
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        """
+        Override to allow dynamic page size from query parameters
+        """
+        if self.page_size_query_param:
+            page_size = request.query_params.get(self.page_size_query_param)
+            if page_size is not None:
+                try:
+                    page_size = int(page_size)
+                    if page_size > 0 and page_size <= self.max_page_size:
+                        return page_size
+                except (ValueError, TypeError):
+                    pass
+        return self.page_size
+
+
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATED = 'estimated'
+COUNT_NONE = 'none'
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATED, COUNT_NONE)
+
+
+def estimate_table_rows(model, using=None):
+    """
+    Return the planner's row estimate for the model's table, or None when the
+    database has no statistics for it (e.g. ANALYZE has never run).
+    """
+    connection = connections[using or router.db_for_read(model)]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+            elif connection.vendor == 'sqlite':
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+
+    if row is None or row[0] is None:
+        return None
+    # sqlite_stat1.stat is "<rows> <rows per key> ...", reltuples is -1 until analyzed
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+class CountlessPage:
+    """
+    Page whose has_next comes from fetching one row past the page instead of
+    from a COUNT(*). count/num_pages are an estimate or None.
+    """
+
+    def __init__(self, object_list, number, has_next, count=None, num_pages=None):
+        self.object_list = object_list
+        self.number = number
+        self._has_next = has_next
+        self.paginator = SimpleNamespace(count=count, num_pages=num_pages)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self.number > 1
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+class CustomPageNumberPagination(DynamicPageSizeMixin, PageNumberPagination):
+    """
+    Custom pagination class that provides detailed pagination information
+
+    The total count is controlled by ?count=exact|estimated|none, falling back
+    to the view's ``pagination_count_mode`` and then to ``count_mode``:
+    - exact: COUNT(*) on every request
+    - estimated: table statistics for unfiltered querysets, otherwise a COUNT(*)
+      cached for ``count_cache_timeout`` seconds
+    - none: no count at all; has_next comes from fetching page_size + 1 rows
+    """
+    count_mode = COUNT_EXACT
+    count_mode_query_param = 'count'
+    count_cache_timeout = 60
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = self.get_count_mode(request, view)
+        if self.count_mode == COUNT_EXACT:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        page_number = request.query_params.get(self.page_query_param) or 1
+        try:
+            page_number = int(page_number)
+            if page_number < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message='Invalid page.'))
+
+        offset = (page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and page_number > 1:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message='That page contains no results'))
+
+        count = num_pages = None
+        if self.count_mode == COUNT_ESTIMATED:
+            # The estimate may be stale, but never report less than what was just read
+            count = max(self.estimate_count(queryset), offset + len(rows))
+            num_pages = max(math.ceil(count / page_size), 1)
+
+        self.page = CountlessPage(rows[:page_size], page_number, len(rows) > page_size, count, num_pages)
+        if self.page.has_other_pages() and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+    def get_count_mode(self, request, view=None):
+        for mode in (
+            request.query_params.get(self.count_mode_query_param),
+            getattr(view, 'pagination_count_mode', None),
+        ):
+            if mode in COUNT_MODES:
+                return mode
+        return self.count_mode
+
+    def estimate_count(self, queryset):
+        if not queryset.query.has_filters():
+            estimate = estimate_table_rows(queryset.model, queryset.db)
+            if estimate is not None:
+                return estimate
+
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        key = 'pagination-count:' + hashlib.md5(f'{queryset.db}:{sql}:{params}'.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'page_size': self.page_size,
+            'current_page': self.page.number,
+            'total_pages': self.page.paginator.num_pages,
+            'has_next': self.page.has_next(),
+            'has_previous': self.page.has_previous(),
+            'results': data
+        })
+
+
+class KeysetPagination(DynamicPageSizeMixin, BasePagination):
+    """
+    Keyset (seek) pagination over a composite, unique ordering.
+
+    The cursor holds the ordering values of the last row seen and the next
+    page is selected with a WHERE predicate on them instead of an OFFSET, so
+    page 5,000 costs the same as page one. The ordering comes from the view's
+    OrderingFilter (or ``ordering`` below) with the primary key appended as a
+    tie-breaker.
+    Usage: ?cursor=<opaque token>&page_size=50
+    """
+    ordering = ('-created_at', 'id')
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.nullable = self.get_nullable_fields(queryset.model)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['reverse'])
+
+        if cursor is not None:
+            queryset = queryset.filter(self.get_seek_predicate(cursor['values'], reverse))
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+
+        # Fetch one extra row to learn whether there is a page beyond this one
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = cursor is not None if not reverse else has_more
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'page_size': self.page_size,
+            'has_next': self.has_next,
+            'has_previous': self.has_previous,
+            'results': data
+        })
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Return the ordering fields, always ending with the primary key so that
+        the ordering is total and the seek predicate never skips a row.
+        """
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        ordering = list(ordering or self.ordering)
+
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            # A model keyed by a OneToOneField (AdultSummary) has no id field
+            has_id = any(field.name == 'id' for field in queryset.model._meta.get_fields())
+            ordering.append('id' if has_id else 'pk')
+        return tuple(ordering)
+
+    def get_nullable_fields(self, model):
+        """Names in the ordering whose value can be NULL, through relations too"""
+        nullable = set()
+        for field in self.ordering:
+            name = field.lstrip('-')
+            opts = model._meta
+            for part in name.split('__'):
+                try:
+                    model_field = opts.get_field(part)
+                except FieldDoesNotExist:
+                    break
+                if model_field.null:
+                    nullable.add(name)
+                    break
+                if not model_field.is_relation:
+                    break
+                opts = model_field.related_model._meta
+        return nullable
+
+    def get_order_by(self, reverse=False):
+        """
+        The ordering as expressions; NULLs come after every value, so before
+        them when walking backwards.
+        """
+        nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+        order_by = []
+        for field in self._invert(self.ordering) if reverse else self.ordering:
+            name = field.lstrip('-')
+            if name not in self.nullable:
+                order_by.append(field)
+            elif field.startswith('-'):
+                order_by.append(F(name).desc(**nulls))
+            else:
+                order_by.append(F(name).asc(**nulls))
+        return order_by
+
+    def get_seek_predicate(self, values, reverse=False):
+        """
+        Build the lexicographic "comes after" predicate for the cursor values:
+        (a > x) OR (a = x AND b > y) OR ..., honouring each field's direction
+        and the position of NULLs, which compare equal to each other.
+        """
+        predicate = Q()
+        for index, field in enumerate(self.ordering):
+            clause = self._after(field, values[index], reverse)
+            if clause is None:
+                continue
+            for previous, value in zip(self.ordering[:index], values):
+                clause &= self._equal(previous, value)
+            predicate |= clause
+        return predicate
+
+    def _after(self, field, value, reverse):
+        """Rows whose ``field`` comes strictly after ``value``, None when none can"""
+        name = field.lstrip('-')
+        nullable = name in self.nullable
+        if value is None:
+            # NULLs come last going forwards and first going backwards
+            return Q(**{f'{name}__isnull': False}) if reverse and nullable else None
+        lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+        clause = Q(**{f'{name}__{lookup}': value})
+        if nullable and not reverse:
+            clause |= Q(**{f'{name}__isnull': True})
+        return clause
+
+    @staticmethod
+    def _equal(field, value):
+        name = field.lstrip('-')
+        return Q(**{f'{name}__isnull': True}) if value is None else Q(**{name: value})
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse):
+        payload = {
+            'o': list(self.ordering),
+            'v': [self._to_primitive(self._get_value(instance, field)) for field in self.ordering],
+            'r': int(reverse),
+        }
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(parse.unquote(token).encode()))
+            values = payload['v']
+            reverse = bool(payload.get('r'))
+            ordering = tuple(payload['o'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # A cursor is only meaningful for the ordering it was produced with
+        if ordering != self.ordering or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return {'values': values, 'reverse': reverse}
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+    @staticmethod
+    def _invert(ordering):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+    @staticmethod
+    def _get_value(instance, field):
+        # values() rows hold the whole lookup under one key
+        if isinstance(instance, dict):
+            return instance[field.lstrip('-')]
+        value = instance
+        for attr in field.lstrip('-').split('__'):
+            value = getattr(value, attr)
+        return value
+
+    @staticmethod
+    def _to_primitive(value):
+        # Keep full microsecond precision; the seek predicate relies on exact values
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        return value
+
+
+class RequestedPagination(BasePagination):
+    """
+    Paginate only when the request asks for it, so that a plain list request
+    still returns the whole list:
+    - ?page= pages by number, see CustomPageNumberPagination (?page_size=, ?count=)
+    - ?cursor= or ?page_size= alone pages with KeysetPagination on views that
+      opt in with ``keyset_pagination = True``, by number elsewhere
+    - neither returns the unpaginated list
+    """
+    keyset_class = KeysetPagination
+    page_number_class = CustomPageNumberPagination
+
+    def __init__(self):
+        self.paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request, view)
+        if self.paginator is None:
+            return None
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginator(self, request, view=None):
+        params = request.query_params
+        keyset = getattr(view, 'keyset_pagination', False)
+        page_number = self.page_number_class()
+        if page_number.page_query_param in params:
+            return page_number
+        if keyset and (self.keyset_class.cursor_query_param in params or page_number.page_size_query_param in params):
+            return self.keyset_class()
+        if page_number.page_size_query_param in params:
+            return page_number
+        return None
+
+    def get_schema_operation_parameters(self, view):
+        parameters = self.page_number_class().get_schema_operation_parameters(view)
+        if getattr(view, 'keyset_pagination', False):
+            names = {parameter['name'] for parameter in parameters}
+            parameters += [
+                parameter for parameter in self.keyset_class().get_schema_operation_parameters(view)
+                if parameter['name'] not in names
+            ]
+        return parameters
@@ -0,0 +1,12 @@
+from django.db import models
+
+
+def ordered_prefetches(model, field_names):
+    """
+    Prefetch objects for ManyToMany fields of ``model`` that list the related
+    rows by primary key, so the order does not depend on the query plan
+    """
+    return [
+        models.Prefetch(name, queryset=model._meta.get_field(name).related_model._default_manager.order_by('pk'))
+        for name in field_names
+    ]
@@ -0,0 +1,104 @@
+"""
+orjson renderer and parser for the REST API.
+
+ORJSONRenderer encodes UUIDs and datetimes natively and Decimals (and the
+other types DRF knows) through DRF's encoder, several times faster than
+the stdlib json behind JSONRenderer. With ``API_COMPRESS_MIN_SIZE`` set,
+bodies of at least that many bytes are compressed for clients that accept
+it; it is off by default, as CompressionMiddleware covers every response.
+stream_json_array() writes a large array piece by piece for streaming
+responses.
+
+orjson is optional: without it both classes behave as DRF's, and settings
+pick them with ``API_JSON_ENGINE``.
+"""
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils import encoders
+
+from .compression import compress_response_content
+from .fast import orjson
+
+# Same output as DRF's encoder: 'Z' for UTC, integer keys as strings
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+_encoder = encoders.JSONEncoder()
+
+
+def _escape_separators(content):
+    # U+2028/U+2029 are valid JSON but end a JavaScript string, as JSONRenderer escapes them
+    return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def encode(data, indent=False):
+    """
+    ``data`` as UTF-8 JSON bytes with orjson, using DRF's encoder for the
+    types orjson does not know (Decimal, lazy strings, querysets...)
+    """
+    option = ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else ORJSON_OPTIONS
+    return _escape_separators(orjson.dumps(data, default=_encoder.default, option=option))
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer on orjson. Any ``indent`` in the Accept header gives two
+    spaces, the only indentation orjson has; values orjson rejects (integers
+    beyond 64 bits) and a missing orjson fall back to JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+
+        content = None
+        if orjson is not None:
+            indent = self.get_indent(accepted_media_type, renderer_context)
+            try:
+                content = encode(data, indent=bool(indent))
+            except orjson.JSONEncodeError:
+                pass
+        if content is None:
+            content = super().render(data, accepted_media_type, renderer_context)
+
+        request = renderer_context.get('request')
+        response = renderer_context.get('response')
+        if request is not None and response is not None:
+            min_size = getattr(settings, 'API_COMPRESS_MIN_SIZE', 0)
+            content = compress_response_content(request, response, content, min_size)
+        return content
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser on orjson, for UTF-8 bodies"""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+def stream_json_array(chunks):
+    """
+    Yield the JSON array of the items in ``chunks`` (an iterable of lists) a
+    chunk at a time, for a StreamingHttpResponse
+    """
+    yield b'['
+    separator = b''
+    for chunk in chunks:
+        if chunk:
+            content = encode(chunk) if orjson is not None else renderers.JSONRenderer().render(chunk)
+            # The items without the chunk's own brackets
+            yield separator + content[1:-1]
+            separator = b','
+    yield b']'
@@ -0,0 +1,83 @@
+"""
+Cache of serialized response data for hot read endpoints.
+
+Entries live in the "responses" cache alias (locmem, file, database or
+redis, see CACHES in settings) under the view's ETag, which already covers
+the path, query string, media type and the versions of the vocabularies the
+response is built from. A write bumps a version, so later requests use new
+keys and the old entries simply expire; nothing has to be deleted. The
+compression middleware stores the compressed bodies of the same responses
+next to them, one ``variant`` per content coding.
+
+Hits, misses, stores and evictions are counted per process. An eviction is
+a miss on a key this process stored earlier, i.e. an entry culled by the
+backend or expired before its data changed.
+"""
+import threading
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+
+RESPONSE_CACHE_ALIAS = 'responses'
+
+# Stored keys remembered to tell evictions from first misses
+REMEMBERED_KEYS = 10000
+
+
+class ResponseCache:
+    def __init__(self, alias=RESPONSE_CACHE_ALIAS):
+        self.alias = alias
+        self.lock = threading.Lock()
+        self.counters = Counter()
+        self.stored = OrderedDict()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def key(self, etag, variant=None):
+        key = 'response:' + etag.strip('"')
+        return f'{key}:{variant}' if variant else key
+
+    def get(self, etag, variant=None):
+        """Cached data for ``etag``, or None"""
+        key = self.key(etag, variant)
+        data = self.cache.get(key)
+        with self.lock:
+            if data is not None:
+                self.counters['hits'] += 1
+            else:
+                self.counters['misses'] += 1
+                if self.stored.pop(key, None):
+                    self.counters['evictions'] += 1
+        return data
+
+    def set(self, etag, data, variant=None):
+        key = self.key(etag, variant)
+        self.cache.set(key, data)
+        with self.lock:
+            self.counters['stores'] += 1
+            self.stored[key] = True
+            self.stored.move_to_end(key)
+            while len(self.stored) > REMEMBERED_KEYS:
+                self.stored.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            counters = {name: self.counters[name] for name in ('hits', 'misses', 'stores', 'evictions')}
+        lookups = counters['hits'] + counters['misses']
+        return {
+            'backend': type(self.cache).__name__,
+            **counters,
+            'hit_ratio': round(counters['hits'] / lookups, 4) if lookups else None,
+        }
+
+    def clear(self):
+        """Drop every entry and reset the counters (tests, deployments)"""
+        self.cache.clear()
+        with self.lock:
+            self.counters.clear()
+            self.stored.clear()
+
+
+response_cache = ResponseCache()
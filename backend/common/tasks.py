@@ -0,0 +1,11 @@
+from celery import shared_task
+from django.apps import apps
+
+from .bulk_delete import run_bulk_delete
+
+
+@shared_task(name='common.bulk_delete')
+def bulk_delete_task(task_id, model_label, ids, chunk_size):
+    """Celery side of start_bulk_delete(); the IDs arrive as strings"""
+    model = apps.get_model(model_label)
+    run_bulk_delete(task_id, model, [model._meta.pk.to_python(pk) for pk in ids], chunk_size)
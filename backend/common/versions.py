@@ -0,0 +1,96 @@
+"""
+Shared version tokens of tables, kept in Django's default cache. Writers
+bump a table's token (see others.signals) and readers compare tokens to
+notice the change: the vocabulary copies in others.cache and the ETags of
+ConditionalGetMixin.
+
+A token only moves for the processes sharing the cache. With a per-process
+cache get_table_tokens() adds get_table_states(), read from the tables
+themselves, so a write in another worker is still noticed.
+"""
+import uuid
+from collections import defaultdict
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections, router
+
+
+def version_key(model):
+    return f'vocabulary-version:{model._meta.label_lower}'
+
+
+def get_table_version(model):
+    """
+    Shared version token of a table. Tokens are random rather than a
+    counter, so a key evicted from the cache never comes back with a version
+    some process has already seen.
+    """
+    key = version_key(model)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_table_version(model):
+    cache.set(version_key(model), uuid.uuid4().hex, None)
+
+
+def updated_field_name(model):
+    """Name of the model's auto_now timestamp, or None"""
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False):
+            return field.name
+    return None
+
+
+def get_table_states(models):
+    """
+    '<rows>:<latest update>' of each model's table, in order, read with one
+    query per database. Inserts and deletes change the row count, updates
+    the latest auto_now timestamp.
+    """
+    by_database = defaultdict(list)
+    for index, model in enumerate(models):
+        by_database[router.db_for_read(model)].append((index, model))
+
+    states = [None] * len(models)
+    for using, indexed in by_database.items():
+        connection = connections[using]
+        quote = connection.ops.quote_name
+        columns = []
+        for _, model in indexed:
+            table = quote(model._meta.db_table)
+            columns.append(f'(SELECT COUNT(*) FROM {table})')
+            updated = updated_field_name(model)
+            if updated:
+                column = quote(model._meta.get_field(updated).column)
+                columns.append(f'(SELECT MAX({column}) FROM {table})')
+            else:
+                columns.append('NULL')
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT ' + ', '.join(columns))
+            row = cursor.fetchone()
+        for position, (index, _) in enumerate(indexed):
+            states[index] = f'{row[2 * position]}:{row[2 * position + 1]}'
+    return states
+
+
+def versions_are_shared():
+    """Whether every worker reads the same default cache, and so the same version tokens"""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def get_table_tokens(models):
+    """
+    Values that change whenever one of the ``models`` tables does: their
+    version tokens and, unless the cache is shared between the workers, their
+    get_table_states()
+    """
+    tokens = [get_table_version(model) for model in models]
+    if models and not versions_are_shared():
+        tokens.extend(get_table_states(models))
+    return tokens
@@ -0,0 +1,181 @@
+"""
+Per-process cache of the others vocabularies.
+
+Symptoms, drugs, medical history, cyanosis, family history and clinics are
+small and rarely change, so each process keeps them in memory: entries by
+id, ids by name and, for symptoms, entries by clinic. A copy is reloaded
+lazily once its model's table tokens change (common.versions): the version
+bumped in Django's cache by the post_save / post_delete receivers in
+others.signals and, with a per-process cache, the table's row count and
+latest update. Either way a write in one worker is picked up by the others
+within ``version_check_interval`` seconds; the writing process drops its
+own copy immediately. Autocomplete is answered from a VocabularyIndex built
+with each copy.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import DatabaseError, router, transaction
+
+from common.versions import bump_table_version, get_table_tokens, version_key
+
+from .models import (
+    FamilyHistoryModel,
+    MedicalModel,
+    CyanosisModel,
+    DrugModel,
+    ClinicModel,
+    SymptomModel
+)
+from .search_index import VocabularyIndex
+
+VOCABULARY_MODELS = [FamilyHistoryModel, MedicalModel, CyanosisModel, DrugModel, ClinicModel, SymptomModel]
+
+# clinic_id is only set for symptoms
+VocabularyEntry = namedtuple('VocabularyEntry', ['id', 'name', 'clinic_id'])
+
+
+class Vocabulary:
+    """In-memory copy of one vocabulary model, reloaded when its table tokens change"""
+
+    # Seconds between checks of the table tokens
+    version_check_interval = 1.0
+
+    def __init__(self, model):
+        self.model = model
+        self.version = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+        self.by_id = {}
+        self.by_name = {}
+        self.by_clinic = {}
+        self.ordered = []
+        self.index = VocabularyIndex([])
+
+    def invalidate(self):
+        """Drop the local copy; the next read reloads it"""
+        self.version = None
+
+    def load(self):
+        has_clinic = any(field.name == 'clinic' for field in self.model._meta.concrete_fields)
+        fields = ['id', 'name', 'clinic_id'] if has_clinic else ['id', 'name']
+        rows = self.model._base_manager.using(router.db_for_read(self.model)).values_list(*fields)
+        entries = [VocabularyEntry(*row) if has_clinic else VocabularyEntry(*row, None) for row in rows]
+        entries.sort(key=lambda entry: (entry.name.casefold(), str(entry.id)))
+
+        by_name = {}
+        by_clinic = {}
+        for entry in entries:
+            by_name.setdefault(entry.name.strip().casefold(), entry.id)
+            if has_clinic:
+                by_clinic.setdefault(entry.clinic_id, []).append(entry)
+
+        self.by_id = {entry.id: entry for entry in entries}
+        self.by_name = by_name
+        self.by_clinic = by_clinic
+        self.ordered = entries
+        self.index = VocabularyIndex(entries)
+
+    def refresh(self):
+        """Reload the local copy if it was dropped or its table tokens moved"""
+        now = time.monotonic()
+        if self.version is not None and now - self.checked_at < self.version_check_interval:
+            return
+        with self.lock:
+            version = get_table_tokens([self.model])
+            if version != self.version:
+                self.load()
+                self.version = version
+            self.checked_at = now
+
+    def entries(self):
+        """Every entry, ordered by name"""
+        self.refresh()
+        return self.ordered
+
+    def get(self, pk):
+        self.refresh()
+        return self.by_id.get(pk)
+
+    def pk_for_name(self, name):
+        """Primary key of the entry called ``name``, in any case"""
+        self.refresh()
+        return self.by_name.get(name.strip().casefold())
+
+    def for_clinic(self, clinic_id):
+        """Symptom entries of a clinic, ordered by name"""
+        self.refresh()
+        return self.by_clinic.get(clinic_id, [])
+
+    def instances(self, pks):
+        """
+        {pk: model instance} for the given primary keys that exist, like
+        in_bulk() but without a query when the local copy has them all. Keys
+        it lacks are looked up with in_bulk(), since a row created in another
+        worker only shows up at the next check of the table tokens. Only id
+        and name are loaded; the instances are meant for assigning relations.
+        """
+        self.refresh()
+        using = router.db_for_read(self.model)
+        found = {
+            pk: self.model.from_db(using, ['id', 'name'], [pk, self.by_id[pk].name])
+            for pk in pks if pk in self.by_id
+        }
+        missing = [pk for pk in pks if pk not in found]
+        if missing:
+            rows = self.model._base_manager.using(using).only('id', 'name').in_bulk(missing)
+            if rows:
+                # The local copy is behind the table, reload it on the next read
+                self.invalidate()
+            found.update(rows)
+        return found
+
+    def search(self, query, limit, clinic_id=None):
+        """
+        Entries whose name contains ``query``, ignoring case, diacritics and
+        Arabic letter variants, at most ``limit``: names starting with the
+        query first, then names with a word starting with it, then the rest
+        """
+        self.refresh()
+        accept = None if clinic_id is None else (lambda entry: entry.clinic_id == clinic_id)
+        return self.index.search(query, limit, accept)
+
+
+VOCABULARIES = {model: Vocabulary(model) for model in VOCABULARY_MODELS}
+
+
+def get_vocabulary(model):
+    return VOCABULARIES[model]
+
+
+def invalidate_vocabulary(model):
+    """
+    Drop this process's copy of ``model`` now, and move the shared version
+    once the write commits so other workers never reload the old rows under
+    the new version.
+    """
+    VOCABULARIES[model].invalidate()
+    transaction.on_commit(lambda: bump_table_version(model), using=router.db_for_write(model))
+
+
+def warm_vocabularies():
+    """
+    Load every vocabulary and its search index up front, so the first
+    autocomplete request does not pay for it. Skipped while the database is
+    not reachable or not migrated yet.
+    """
+    try:
+        for vocabulary in VOCABULARIES.values():
+            vocabulary.refresh()
+    except DatabaseError:
+        for vocabulary in VOCABULARIES.values():
+            vocabulary.invalidate()
+
+
+def clear_vocabularies():
+    """Forget every local copy and shared version (tests, cache flushes)"""
+    for model, vocabulary in VOCABULARIES.items():
+        vocabulary.invalidate()
+        cache.delete(version_key(model))
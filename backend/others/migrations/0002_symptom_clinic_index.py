@@ -0,0 +1,17 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("others", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="symptommodel",
+            index=models.Index(fields=["clinic", "-created_on", "id"], name="symptom_clinic_created_idx"),
+        ),
+    ]
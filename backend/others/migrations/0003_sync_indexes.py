@@ -0,0 +1,47 @@
+# Generated by Django 5.0.8 on 2026-10-18 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("others", "0002_symptom_clinic_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="clinicmodel",
+            name="created_on",
+            field=models.DateTimeField(auto_now_add=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="clinicmodel",
+            name="updated_on",
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="clinicmodel",
+            index=models.Index(fields=["updated_on", "id"], name="clinic_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cyanosismodel",
+            index=models.Index(fields=["updated_on", "id"], name="cyanosis_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="drugmodel",
+            index=models.Index(fields=["updated_on", "id"], name="drug_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="familyhistorymodel",
+            index=models.Index(fields=["updated_on", "id"], name="familyhistory_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="medicalmodel",
+            index=models.Index(fields=["updated_on", "id"], name="medical_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="symptommodel",
+            index=models.Index(fields=["updated_on", "id"], name="symptom_updated_idx"),
+        ),
+    ]
@@ -11,6 +11,12 @@ class FamilyHistoryModel(models.Model):
     updated_on = models.DateTimeField(auto_now=True, null=True, blank=True)
     name = models.CharField(max_length=255)
 
+    class Meta:
+        # The sync endpoint reads changes in (updated_on, id) order
+        indexes = [
+            models.Index(fields=['updated_on', 'id'], name='familyhistory_updated_idx'),
+        ]
+
     def __str__(self):
         return self.name
     
@@ -20,6 +26,11 @@ class MedicalModel(models.Model):
     updated_on = models.DateTimeField(auto_now=True, null=True, blank=True)
     name = models.CharField(max_length=255)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_on', 'id'], name='medical_updated_idx'),
+        ]
+
     def __str__(self):
         return self.name
     
@@ -36,6 +47,9 @@ class CyanosisModel(models.Model):
         """Meta definition for Cyanosis."""
         verbose_name = 'Cyanosis'
         verbose_name_plural = 'Cyanoses'
+        indexes = [
+            models.Index(fields=['updated_on', 'id'], name='cyanosis_updated_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -52,6 +66,9 @@ class DrugModel(models.Model):
         """Meta definition for Drug."""
         verbose_name = _('Drug')
         verbose_name_plural = _('Drugs')
+        indexes = [
+            models.Index(fields=['updated_on', 'id'], name='drug_updated_idx'),
+        ]
 
     def __str__(self):
         """Unicode representation of Drug."""
@@ -61,12 +78,17 @@ class ClinicModel(models.Model):
     """Model definition for Clinic."""
     name = models.CharField("Clinic Name", max_length=255)
     description = models.TextField("Clinic Descriptions", null=True, blank=True)
+    created_on = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    updated_on = models.DateTimeField(auto_now=True, null=True, blank=True)
 
     class Meta:
         """Meta definition for Clinic."""
 
         verbose_name = 'Clinic'
         verbose_name_plural = 'Clinics'
+        indexes = [
+            models.Index(fields=['updated_on', 'id'], name='clinic_updated_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name}"
@@ -86,6 +108,11 @@ class SymptomModel(models.Model):
         verbose_name = _("Symptom")
         verbose_name_plural = _("Symptoms")
         unique_together = ('name', 'clinic')
+        # Symptom lists are filtered by clinic and paged by (-created_on, id)
+        indexes = [
+            models.Index(fields=['clinic', '-created_on', 'id'], name='symptom_clinic_created_idx'),
+            models.Index(fields=['updated_on', 'id'], name='symptom_updated_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -0,0 +1,147 @@
+"""
+In-memory autocomplete index over a vocabulary.
+
+Names are folded (case, Latin diacritics, Arabic tashkeel, tatweel and
+letter variants) so "cafe" finds "Café" and "اسبرين" finds "أسبرين". A prefix
+trie over the words of each name answers prefix queries, and an n-gram map
+narrows substring queries down to a few candidates before the final
+``in`` check.
+"""
+import unicodedata
+
+# Longest n-gram indexed; shorter queries use the map of their own length
+NGRAM_SIZE = 3
+
+# Tatweel, the elongation character, is a letter modifier rather than a mark
+TATWEEL = '\u0640'
+
+ARABIC_LETTERS = str.maketrans({
+    '\u0671': '\u0627',  # alef wasla -> alef
+    '\u0649': '\u064a',  # alef maksura -> yeh
+    '\u0629': '\u0647',  # teh marbuta -> heh
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic-Indic digits
+})
+
+def fold(text):
+    """
+    Search form of ``text``. NFKD splits accented Latin letters and the
+    hamza/madda forms of alef, waw and yeh into a base letter plus
+    nonspacing marks, which are dropped together with the tashkeel.
+    """
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if unicodedata.category(char) != 'Mn' and char != TATWEEL)
+    return ' '.join(text.translate(ARABIC_LETTERS).casefold().split())
+
+
+class TrieNode:
+    __slots__ = ('children', 'positions', 'starts')
+
+    def __init__(self):
+        self.children = {}
+        # Names with a word starting with this prefix, and names starting with it
+        self.positions = []
+        self.starts = []
+
+
+class Lazy:
+    """Iterable that calls ``factory`` for its iterator only when iterated"""
+
+    __slots__ = ('factory',)
+
+    def __init__(self, factory):
+        self.factory = factory
+
+    def __iter__(self):
+        return iter(self.factory())
+
+
+class VocabularyIndex:
+    """
+    Index over ``entries``, which must already be in result order; matches
+    are returned by relevance tier and then in that order.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.folded = [fold(entry.name) for entry in entries]
+        self.trie = TrieNode()
+        self.ngrams = [{} for _ in range(NGRAM_SIZE + 1)]
+
+        for position, name in enumerate(self.folded):
+            words = name.split()
+            for word in set(words):
+                node = self.trie
+                for char in word:
+                    node = node.children.setdefault(char, TrieNode())
+                    if not node.positions or node.positions[-1] != position:
+                        node.positions.append(position)
+                    if word == words[0]:
+                        node.starts.append(position)
+            for size in range(1, NGRAM_SIZE + 1):
+                for start in range(len(name) - size + 1):
+                    postings = self.ngrams[size].setdefault(name[start:start + size], [])
+                    if not postings or postings[-1] != position:
+                        postings.append(position)
+
+    def find(self, prefix):
+        node = self.trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def substring_positions(self, query):
+        """Positions of the names containing ``query``, lazily and in order"""
+        size = min(len(query), NGRAM_SIZE)
+        grams = {query[start:start + size] for start in range(len(query) - size + 1)}
+        # The rarest n-gram bounds the candidates, the ``in`` check settles them
+        candidates = min((self.ngrams[size].get(gram, []) for gram in grams), key=len)
+        return (position for position in candidates if query in self.folded[position])
+
+    def ranked_positions(self, query):
+        """Iterables of positions per relevance tier, computed only as far as they are consumed"""
+        if ' ' in query:
+            # No single word starts with a multi-word query, but a name still can
+            matches = list(self.substring_positions(query))
+            return [
+                [position for position in matches if self.folded[position].startswith(query)],
+                [position for position in matches if not self.folded[position].startswith(query)],
+            ]
+
+        node = self.find(query)
+        if node is None:
+            return [self.substring_positions(query)]
+
+        def word_prefixes():
+            starts = set(node.starts)
+            return (position for position in node.positions if position not in starts)
+
+        def substrings():
+            prefixed = set(node.positions)
+            return (position for position in self.substring_positions(query) if position not in prefixed)
+
+        return [node.starts, Lazy(word_prefixes), Lazy(substrings)]
+
+    def search(self, query, limit, accept=None):
+        """
+        Entries whose folded name contains the folded ``query``, at most
+        ``limit``, optionally restricted to entries for which ``accept``
+        returns True
+        """
+        query = fold(query)
+        if not query:
+            tiers = [range(len(self.entries))]
+        else:
+            tiers = self.ranked_positions(query)
+
+        results = []
+        for tier in tiers:
+            for position in tier:
+                entry = self.entries[position]
+                if accept is None or accept(entry):
+                    results.append(entry)
+                    if len(results) >= limit:
+                        return results
+        return results
+
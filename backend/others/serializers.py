@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from common.mixins import DynamicFieldsMixin
 from .models import (
     FamilyHistoryModel, 
     MedicalModel, 
@@ -9,7 +10,7 @@ from .models import (
 )
 
 
-class FamilyHistorySerializer(serializers.ModelSerializer):
+class FamilyHistorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Full serializer for FamilyHistoryModel"""
     
     class Meta:
@@ -35,7 +36,7 @@ class FamilyHistoryAutocompleteSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
 
-class MedicalSerializer(serializers.ModelSerializer):
+class MedicalSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Full serializer for MedicalModel"""
     
     class Meta:
@@ -61,7 +62,7 @@ class MedicalAutocompleteSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
 
-class CyanosisSerializer(serializers.ModelSerializer):
+class CyanosisSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Full serializer for CyanosisModel"""
     
     class Meta:
@@ -87,7 +88,7 @@ class CyanosisAutocompleteSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
 
-class DrugSerializer(serializers.ModelSerializer):
+class DrugSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Full serializer for DrugModel"""
     
     class Meta:
@@ -113,7 +114,7 @@ class DrugAutocompleteSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
 
-class ClinicSerializer(serializers.ModelSerializer):
+class ClinicSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Full serializer for ClinicModel"""
     
     class Meta:
@@ -138,7 +139,7 @@ class ClinicAutocompleteSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
 
-class SymptomSerializer(serializers.ModelSerializer):
+class SymptomSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Full serializer for SymptomModel"""
     clinic_name = serializers.CharField(source='clinic.name', read_only=True)
     
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save, post_delete
+
+from .cache import VOCABULARY_MODELS, invalidate_vocabulary
+
+
+def vocabulary_changed(sender, **kwargs):
+    """Invalidate the cached vocabulary of a saved or deleted row"""
+    invalidate_vocabulary(sender)
+
+
+for model in VOCABULARY_MODELS:
+    post_save.connect(vocabulary_changed, sender=model, dispatch_uid=f'others_vocabulary_save_{model.__name__}')
+    post_delete.connect(vocabulary_changed, sender=model, dispatch_uid=f'others_vocabulary_delete_{model.__name__}')
@@ -6,7 +6,8 @@ from .views import (
     CyanosisViewSet,
     DrugViewSet,
     ClinicViewSet,
-    SymptomViewSet
+    SymptomViewSet,
+    cache_stats
 )
 
 # Create router and register viewsets
@@ -19,5 +20,6 @@ router.register(r'clinics', ClinicViewSet, basename='clinics')
 router.register(r'symptoms', SymptomViewSet, basename='symptoms')
 
 urlpatterns = [
+    path('cache-stats/', cache_stats, name='cache-stats'),
     path('', include(router.urls)),
 ]
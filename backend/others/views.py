@@ -1,8 +1,12 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from common.mixins import BulkDeleteMixin, ResponseCacheMixin, SparseFieldsMixin
+from common.pagination import RequestedPagination
+from common.response_cache import response_cache
+from .cache import get_vocabulary
 from .models import (
     FamilyHistoryModel, 
     MedicalModel, 
@@ -20,17 +24,52 @@ from .serializers import (
     SymptomSerializer, SymptomAutocompleteSerializer
 )
 
+# GET actions answered with 304 while the vocabulary version is unchanged
+VOCABULARY_CONDITIONAL_ACTIONS = ('list', 'retrieve', 'autocomplete')
 
-class FamilyHistoryViewSet(viewsets.ModelViewSet):
+# Autocomplete repeats the same prefixes while typing, let the browser reuse them briefly
+VOCABULARY_ACTION_CACHE_CONTROL = {'autocomplete': {'private': True, 'max_age': 10}}
+
+# Responses kept in the response cache; autocomplete only for short prefixes
+VOCABULARY_CACHED_ACTIONS = ('list', 'autocomplete', 'by_clinic')
+AUTOCOMPLETE_CACHED_PREFIX = 3
+
+
+class VocabularyResponseCacheMixin(ResponseCacheMixin):
+    """Response cache for the vocabulary lists and short autocomplete prefixes"""
+    cached_actions = VOCABULARY_CACHED_ACTIONS
+
+    def should_cache_response(self, request):
+        if self.action == 'autocomplete':
+            return len(request.query_params.get('search', '')) <= AUTOCOMPLETE_CACHED_PREFIX
+        return True
+
+
+@api_view(['GET'])
+def cache_stats(request):
+    """
+    Hit, miss, store and eviction counters of the response cache in this process
+    Usage: /api/cache-stats/
+    """
+    return Response(response_cache.stats())
+
+
+class FamilyHistoryViewSet(BulkDeleteMixin, VocabularyResponseCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for FamilyHistoryModel with autocomplete functionality
     """
     queryset = FamilyHistoryModel.objects.all()
     serializer_class = FamilyHistorySerializer
+    pagination_class = RequestedPagination
+    keyset_pagination = True
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['name', 'created_on', 'updated_on']
     ordering = ['-created_on']
+    conditional_actions = VOCABULARY_CONDITIONAL_ACTIONS
+    etag_models = [FamilyHistoryModel]
+    updated_field = 'updated_on'
+    action_cache_control = VOCABULARY_ACTION_CACHE_CONTROL
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -50,9 +89,7 @@ class FamilyHistoryViewSet(viewsets.ModelViewSet):
         if not search_query:
             return Response([])
         
-        family_history = FamilyHistoryModel.objects.filter(
-            name__icontains=search_query
-        )[:limit]
+        family_history = get_vocabulary(FamilyHistoryModel).search(search_query, limit)
         
         serializer = self.get_serializer(family_history, many=True)
         return Response(serializer.data)
@@ -63,24 +100,31 @@ class FamilyHistoryViewSet(viewsets.ModelViewSet):
         Bulk delete family history records
         Usage: /api/family-history/bulk_delete/
         Body: {
-            "family_history_ids": ["1", "2", "3"]
+            "family_history_ids": ["1", "2", "3"],
+            "async": false
         }
+        Chunked, with counts per deleted model; "async": true runs it in the
+        background, see bulk_delete_status
         """
-        family_history_ids = request.data.get('family_history_ids', [])
-        FamilyHistoryModel.objects.filter(id__in=family_history_ids).delete()
-        return Response(status=status.HTTP_204_NO_CONTENT, data={'message': 'Family history records deleted successfully'})
+        return self.perform_bulk_delete(request, 'family_history_ids', 'Family history records deleted successfully')
 
 
-class MedicalViewSet(viewsets.ModelViewSet):
+class MedicalViewSet(BulkDeleteMixin, VocabularyResponseCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for MedicalModel with autocomplete functionality
     """
     queryset = MedicalModel.objects.all()
     serializer_class = MedicalSerializer
+    pagination_class = RequestedPagination
+    keyset_pagination = True
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['name', 'created_on', 'updated_on']
     ordering = ['-created_on']
+    conditional_actions = VOCABULARY_CONDITIONAL_ACTIONS
+    etag_models = [MedicalModel]
+    updated_field = 'updated_on'
+    action_cache_control = VOCABULARY_ACTION_CACHE_CONTROL
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -100,9 +144,7 @@ class MedicalViewSet(viewsets.ModelViewSet):
         if not search_query:
             return Response([])
         
-        medical = MedicalModel.objects.filter(
-            name__icontains=search_query
-        )[:limit]
+        medical = get_vocabulary(MedicalModel).search(search_query, limit)
         
         serializer = self.get_serializer(medical, many=True)
         return Response(serializer.data)
@@ -113,24 +155,31 @@ class MedicalViewSet(viewsets.ModelViewSet):
         Bulk delete medical records
         Usage: /api/medical/bulk_delete/
         Body: {
-            "medical_ids": ["1", "2", "3"]
+            "medical_ids": ["1", "2", "3"],
+            "async": false
         }
+        Chunked, with counts per deleted model; "async": true runs it in the
+        background, see bulk_delete_status
         """
-        medical_ids = request.data.get('medical_ids', [])
-        MedicalModel.objects.filter(id__in=medical_ids).delete()
-        return Response(status=status.HTTP_204_NO_CONTENT, data={'message': 'Medical records deleted successfully'})
+        return self.perform_bulk_delete(request, 'medical_ids', 'Medical records deleted successfully')
 
 
-class CyanosisViewSet(viewsets.ModelViewSet):
+class CyanosisViewSet(BulkDeleteMixin, VocabularyResponseCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for CyanosisModel with autocomplete functionality
     """
     queryset = CyanosisModel.objects.all()
     serializer_class = CyanosisSerializer
+    pagination_class = RequestedPagination
+    keyset_pagination = True
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['name', 'created_on', 'updated_on']
     ordering = ['-created_on']
+    conditional_actions = VOCABULARY_CONDITIONAL_ACTIONS
+    etag_models = [CyanosisModel]
+    updated_field = 'updated_on'
+    action_cache_control = VOCABULARY_ACTION_CACHE_CONTROL
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -150,9 +199,7 @@ class CyanosisViewSet(viewsets.ModelViewSet):
         if not search_query:
             return Response([])
         
-        cyanosis = CyanosisModel.objects.filter(
-            name__icontains=search_query
-        )[:limit]
+        cyanosis = get_vocabulary(CyanosisModel).search(search_query, limit)
         
         serializer = self.get_serializer(cyanosis, many=True)
         return Response(serializer.data)
@@ -163,24 +210,31 @@ class CyanosisViewSet(viewsets.ModelViewSet):
         Bulk delete cyanosis records
         Usage: /api/cyanosis/bulk_delete/
         Body: {
-            "cyanosis_ids": ["1", "2", "3"]
+            "cyanosis_ids": ["1", "2", "3"],
+            "async": false
         }
+        Chunked, with counts per deleted model; "async": true runs it in the
+        background, see bulk_delete_status
         """
-        cyanosis_ids = request.data.get('cyanosis_ids', [])
-        CyanosisModel.objects.filter(id__in=cyanosis_ids).delete()
-        return Response(status=status.HTTP_204_NO_CONTENT, data={'message': 'Cyanosis records deleted successfully'})
+        return self.perform_bulk_delete(request, 'cyanosis_ids', 'Cyanosis records deleted successfully')
 
 
-class DrugViewSet(viewsets.ModelViewSet):
+class DrugViewSet(BulkDeleteMixin, VocabularyResponseCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for DrugModel with autocomplete functionality
     """
     queryset = DrugModel.objects.all()
     serializer_class = DrugSerializer
+    pagination_class = RequestedPagination
+    keyset_pagination = True
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['name', 'created_on', 'updated_on']
     ordering = ['-created_on']
+    conditional_actions = VOCABULARY_CONDITIONAL_ACTIONS
+    etag_models = [DrugModel]
+    updated_field = 'updated_on'
+    action_cache_control = VOCABULARY_ACTION_CACHE_CONTROL
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -200,9 +254,7 @@ class DrugViewSet(viewsets.ModelViewSet):
         if not search_query:
             return Response([])
         
-        drugs = DrugModel.objects.filter(
-            name__icontains=search_query
-        )[:limit]
+        drugs = get_vocabulary(DrugModel).search(search_query, limit)
         
         serializer = self.get_serializer(drugs, many=True)
         return Response(serializer.data)
@@ -213,24 +265,30 @@ class DrugViewSet(viewsets.ModelViewSet):
         Bulk delete drug records
         Usage: /api/drugs/bulk_delete/
         Body: {
-            "drug_ids": ["1", "2", "3"]
+            "drug_ids": ["1", "2", "3"],
+            "async": false
         }
+        Chunked, with counts per deleted model; "async": true runs it in the
+        background, see bulk_delete_status
         """
-        drug_ids = request.data.get('drug_ids', [])
-        DrugModel.objects.filter(id__in=drug_ids).delete()
-        return Response(status=status.HTTP_204_NO_CONTENT, data={'message': 'Drug records deleted successfully'})
+        return self.perform_bulk_delete(request, 'drug_ids', 'Drug records deleted successfully')
 
 
-class ClinicViewSet(viewsets.ModelViewSet):
+class ClinicViewSet(BulkDeleteMixin, VocabularyResponseCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for ClinicModel with autocomplete functionality
     """
     queryset = ClinicModel.objects.all()
     serializer_class = ClinicSerializer
+    pagination_class = RequestedPagination
+    keyset_pagination = True
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     search_fields = ['name', 'description']
     ordering_fields = ['name']
     ordering = ['name']
+    conditional_actions = VOCABULARY_CONDITIONAL_ACTIONS
+    etag_models = [ClinicModel]
+    action_cache_control = VOCABULARY_ACTION_CACHE_CONTROL
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -250,9 +308,7 @@ class ClinicViewSet(viewsets.ModelViewSet):
         if not search_query:
             return Response([])
         
-        clinics = ClinicModel.objects.filter(
-            name__icontains=search_query
-        )[:limit]
+        clinics = get_vocabulary(ClinicModel).search(search_query, limit)
         
         serializer = self.get_serializer(clinics, many=True)
         return Response(serializer.data)
@@ -263,25 +319,32 @@ class ClinicViewSet(viewsets.ModelViewSet):
         Bulk delete clinic records
         Usage: /api/clinics/bulk_delete/
         Body: {
-            "clinic_ids": ["1", "2", "3"]
+            "clinic_ids": ["1", "2", "3"],
+            "async": false
         }
+        Chunked, with counts per deleted model; "async": true runs it in the
+        background, see bulk_delete_status
         """
-        clinic_ids = request.data.get('clinic_ids', [])
-        ClinicModel.objects.filter(id__in=clinic_ids).delete()
-        return Response(status=status.HTTP_204_NO_CONTENT, data={'message': 'Clinic records deleted successfully'})
+        return self.perform_bulk_delete(request, 'clinic_ids', 'Clinic records deleted successfully')
 
 
-class SymptomViewSet(viewsets.ModelViewSet):
+class SymptomViewSet(BulkDeleteMixin, VocabularyResponseCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for SymptomModel with autocomplete functionality
     """
     queryset = SymptomModel.objects.select_related('clinic').all()
     serializer_class = SymptomSerializer
+    pagination_class = RequestedPagination
+    keyset_pagination = True
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     search_fields = ['name', 'description', 'clinic__name']
     ordering_fields = ['name', 'clinic__name', 'created_on', 'updated_on']
     ordering = ['-created_on']
     filterset_fields = ['clinic']
+    conditional_actions = VOCABULARY_CONDITIONAL_ACTIONS + ('by_clinic',)
+    etag_models = [SymptomModel, ClinicModel]
+    updated_field = 'updated_on'
+    action_cache_control = VOCABULARY_ACTION_CACHE_CONTROL
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -299,17 +362,13 @@ class SymptomViewSet(viewsets.ModelViewSet):
         limit = int(request.query_params.get('limit', 10))
         clinic_id = request.query_params.get('clinic_id', '')
                 
-        if search_query:
-            symptoms = SymptomModel.objects.select_related('clinic').filter(
-                name__icontains=search_query
-            )
-        else:
-            symptoms = SymptomModel.objects.select_related('clinic').all()
-        
         if clinic_id:
-            symptoms = symptoms.filter(clinic_id=clinic_id)
+            try:
+                clinic_id = int(clinic_id)
+            except ValueError:
+                return Response([])
         
-        symptoms = symptoms[:limit]
+        symptoms = get_vocabulary(SymptomModel).search(search_query, limit, clinic_id=clinic_id or None)
         
         serializer = self.get_serializer(symptoms, many=True)
 
@@ -336,9 +395,10 @@ class SymptomViewSet(viewsets.ModelViewSet):
         Bulk delete symptom records
         Usage: /api/symptoms/bulk_delete/
         Body: {
-            "symptom_ids": ["1", "2", "3"]
+            "symptom_ids": ["1", "2", "3"],
+            "async": false
         }
+        Chunked, with counts per deleted model; "async": true runs it in the
+        background, see bulk_delete_status
         """
-        symptom_ids = request.data.get('symptom_ids', [])
-        SymptomModel.objects.filter(id__in=symptom_ids).delete()
-        return Response(status=status.HTTP_204_NO_CONTENT, data={'message': 'Symptom records deleted successfully'})
\ No newline at end of file
+        return self.perform_bulk_delete(request, 'symptom_ids', 'Symptom records deleted successfully')
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Bulk write paths for patients; the chunked bulk delete lives in
+common.bulk_delete.
+
+Rows created or updated here skip Model.save() and the model signals, so
+these helpers fill the derived mobile digits and update the search index
+and the adult summaries themselves.
+"""
+from django.db import IntegrityError, connections, router, transaction
+from django.utils import timezone
+
+from .models import Patient, Adult, ADULT_M2M_FIELDS, VITAL_FIELDS
+from .search import get_search_backend
+from .summary import refresh_adult_summaries
+
+# Adults inserted per bulk_create round trip
+BULK_CREATE_BATCH_SIZE = 500
+
+# Adults written per bulk_update statement
+BULK_UPDATE_BATCH_SIZE = 500
+
+
+def build_adult(data):
+    """Unsaved Adult from validated data, plus its ManyToMany values by field"""
+    data = dict(data)
+    relations = {field_name: data.pop(field_name, None) or [] for field_name in ADULT_M2M_FIELDS}
+    adult = Adult(**data)
+    adult.patient_ptr_id = adult.id
+    adult.set_mobile_digits()
+    return adult, relations
+
+
+def insert_adults(entries, using):
+    """
+    Insert (adult, relations) pairs: one bulk_create for the patient rows, one
+    multi-row insert for the adult rows and one bulk_create per through table.
+    """
+    adults = [adult for adult, _ in entries]
+
+    parents = [
+        Patient(**{field.attname: getattr(adult, field.attname) for field in Patient._meta.concrete_fields})
+        for adult in adults
+    ]
+    Patient.objects.using(using).bulk_create(parents)
+    for adult, parent in zip(adults, parents):
+        adult.created_at = parent.created_at
+        adult.updated_at = parent.updated_at
+
+    # Django refuses bulk_create on multi-table children; write the child table
+    # the same way Model.save() does for each table of the chain
+    fields = Adult._meta.local_concrete_fields
+    batch_size = connections[using].ops.bulk_batch_size(fields, adults) or len(adults)
+    for start in range(0, len(adults), batch_size):
+        Adult._base_manager.using(using)._insert(adults[start:start + batch_size], fields=fields, using=using)
+    for adult in adults:
+        adult._state.adding = False
+        adult._state.db = using
+
+    for field_name in ADULT_M2M_FIELDS:
+        field = Adult._meta.get_field(field_name)
+        through = field.remote_field.through
+        source = through._meta.get_field(field.m2m_field_name()).attname
+        target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+        rows = [
+            through(**{source: adult.pk, target: related.pk})
+            for adult, relations in entries
+            for related in relations[field_name]
+        ]
+        if rows:
+            through.objects.using(using).bulk_create(rows)
+
+
+def bulk_create_adults(items, batch_size=BULK_CREATE_BATCH_SIZE):
+    """
+    Insert validated adults in chunks of ``batch_size`` and return one entry
+    per item: the created Adult, or a dict of errors for an item the database
+    rejected. A chunk that hits an integrity error (a duplicate code) is
+    retried one item at a time, so only the offending items fail.
+    """
+    using = router.db_for_write(Adult)
+    results = []
+
+    for start in range(0, len(items), batch_size):
+        entries = [build_adult(data) for data in items[start:start + batch_size]]
+        try:
+            with transaction.atomic(using=using):
+                insert_adults(entries, using)
+        except IntegrityError:
+            for entry in entries:
+                try:
+                    with transaction.atomic(using=using):
+                        insert_adults([entry], using)
+                except IntegrityError as exc:
+                    results.append(integrity_errors(entry[0], exc, using))
+                else:
+                    results.append(entry[0])
+        else:
+            results.extend(adult for adult, _ in entries)
+
+    created = [result for result in results if isinstance(result, Adult)]
+    get_search_backend(Adult).index_many(created)
+    refresh_adult_summaries([adult.pk for adult in created], using)
+    return results
+
+
+def integrity_errors(adult, exc, using):
+    """Error dict for an adult whose insert raised ``exc``"""
+    if Patient.objects.using(using).filter(code=adult.code).exists():
+        return {'code': ['patient with this Code already exists.']}
+    return {'non_field_errors': [str(exc)]}
+
+
+def bulk_update_vitals(items, batch_size=BULK_UPDATE_BATCH_SIZE):
+    """
+    Apply validated ``{id, <vital>: value}`` items in one transaction and
+    return (updated IDs, missing IDs). Items for the same adult are merged,
+    later values winning. Rows are locked while they are read and written
+    back with bulk_update, setting updated_at as save() would; vitals are not
+    part of the search index, only updated_at of the adult summaries changes.
+    """
+    changes = {}
+    for item in items:
+        data = dict(item)
+        changes.setdefault(data.pop('id'), {}).update(data)
+
+    fields = [field for field in VITAL_FIELDS if any(field in data for data in changes.values())]
+    using = router.db_for_write(Adult)
+    with transaction.atomic(using=using):
+        adults = (
+            Adult.objects.using(using)
+            .select_for_update()
+            .only(*VITAL_FIELDS)
+            .in_bulk(list(changes))
+        )
+        now = timezone.now()
+        for pk, adult in adults.items():
+            for field, value in changes[pk].items():
+                setattr(adult, field, value)
+            adult.updated_at = now
+        Adult.objects.using(using).bulk_update(adults.values(), [*fields, 'updated_at'], batch_size=batch_size)
+        refresh_adult_summaries(list(adults), using)
+
+    missing = [pk for pk in changes if pk not in adults]
+    return list(adults), missing
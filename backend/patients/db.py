@@ -0,0 +1,18 @@
+"""
+Per-connection database setup.
+
+SQLite keeps most tuning per connection, so the SQLITE_PRAGMAS from settings
+are applied whenever Django opens a new SQLite connection.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created, dispatch_uid='patients.db.apply_sqlite_pragmas')
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,171 @@
+"""
+Streaming export of adult patients as CSV, NDJSON, a JSON array or Parquet.
+
+Rows are read with QuerySet.iterator(chunk_size=...), which also runs the
+ManyToMany prefetches once per chunk, and every format is written chunk by
+chunk, so memory use does not depend on the size of the table. Parquet needs
+the optional pyarrow package.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+from .models import Adult, ADULT_M2M_FIELDS
+from common.renderers import stream_json_array
+
+# Adults read, and their relations prefetched, per round trip
+EXPORT_CHUNK_SIZE = 1000
+
+# Derived columns that are not part of the export
+EXCLUDED_FIELDS = ('patient_ptr', 'mobile_digits', 'mobile_digits_reversed')
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def export_fields():
+    """Concrete Adult fields in export order, parent fields first"""
+    return [field for field in Adult._meta.concrete_fields if field.name not in EXCLUDED_FIELDS]
+
+
+def export_columns():
+    return [field.name for field in export_fields()] + ADULT_M2M_FIELDS
+
+
+def iter_adult_chunks(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield lists of at most ``chunk_size`` export rows. Each row is a dict of
+    the column values, with ManyToMany fields as lists of names.
+    """
+    fields = export_fields()
+    queryset = queryset.prefetch_related(*ADULT_M2M_FIELDS)
+
+    chunk = []
+    for adult in queryset.iterator(chunk_size=chunk_size):
+        row = {field.name: field.value_from_object(adult) for field in fields}
+        for field_name in ADULT_M2M_FIELDS:
+            row[field_name] = [related.name for related in getattr(adult, field_name).all()]
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Echo:
+    """File-like object whose write() returns the data, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    columns = export_columns()
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for chunk in iter_adult_chunks(queryset, chunk_size):
+        lines = []
+        for row in chunk:
+            for field_name in ADULT_M2M_FIELDS:
+                row[field_name] = '; '.join(row[field_name])
+            lines.append(writer.writerow([row[column] for column in columns]))
+        yield ''.join(lines)
+
+
+def stream_ndjson(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    for chunk in iter_adult_chunks(queryset, chunk_size):
+        yield ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in chunk)
+
+
+def stream_json(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """One JSON array, encoded with orjson a chunk at a time"""
+    return stream_json_array(iter_adult_chunks(queryset, chunk_size))
+
+
+class _ParquetSink:
+    """Write-only file object that hands the bytes written so far to the response"""
+
+    def __init__(self):
+        self.buffer = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.buffer.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.buffer)
+        self.buffer = []
+        return data
+
+
+def parquet_schema(pa):
+    types = {
+        models.IntegerField: pa.int64(),
+        models.FloatField: pa.float64(),
+        models.DateTimeField: pa.timestamp('us', tz='UTC'),
+    }
+    schema = []
+    for field in export_fields():
+        field_type = next((t for cls, t in types.items() if isinstance(field, cls)), pa.string())
+        schema.append((field.name, field_type))
+    schema.extend((field_name, pa.list_(pa.string())) for field_name in ADULT_M2M_FIELDS)
+    return pa.schema(schema)
+
+
+def stream_parquet(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """One Parquet row group per chunk"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = parquet_schema(pa)
+    uuid_columns = [field.name for field in export_fields() if isinstance(field, models.UUIDField)]
+    sink = _ParquetSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for chunk in iter_adult_chunks(queryset, chunk_size):
+        for row in chunk:
+            for column in uuid_columns:
+                row[column] = str(row[column])
+        writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+    'json': stream_json,
+    'parquet': stream_parquet,
+}
+
+
+def stream_adults(queryset, file_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Iterator over the encoded export of ``queryset`` in ``file_format``"""
+    return STREAMERS[file_format](queryset, chunk_size)
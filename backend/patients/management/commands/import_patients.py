@@ -0,0 +1,233 @@
+"""
+Import adult patients from a CSV or XLSX convoy spreadsheet.
+
+Usage: python manage.py import_patients convoy.xlsx --batch-size 1000
+"""
+import csv
+import json
+import os
+import re
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from others.cache import get_vocabulary
+from patients.bulk import bulk_create_adults
+from patients.models import Adult
+from patients.serializers import AdultBulkSerializer, MANY_TO_MANY_MODELS
+
+# Separators accepted between the names of a ManyToMany cell
+NAME_SEPARATORS = re.compile(r'[;,\n]')
+
+
+def normalize_header(value):
+    """'Mobile Number ' -> 'mobile_number'"""
+    return re.sub(r'[^a-z0-9]+', '_', str(value or '').strip().lower()).strip('_')
+
+
+def read_csv_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        reader = csv.DictReader(handle)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def read_xlsx_rows(path, sheet=None):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise CommandError('Importing XLSX files needs openpyxl installed')
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None) or []
+        for row_number, values in enumerate(rows, 2):
+            if any(value not in (None, '') for value in values):
+                yield row_number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def read_rows(path, sheet=None):
+    """
+    Stream the records of a CSV or XLSX file as (row number, {header: value})
+    pairs, skipping blank rows
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return read_csv_rows(path)
+    if extension in ('.xlsx', '.xlsm'):
+        return read_xlsx_rows(path, sheet)
+    raise CommandError(f'Unsupported file type "{extension}", expected .csv or .xlsx')
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class RowConverter:
+    """
+    Turns spreadsheet rows into AdultBulkSerializer input. Headers match a
+    field by name or verbose name, choice values by key or label in any case,
+    and ManyToMany cells hold names resolved through the cached name -> id
+    maps of the vocabularies.
+    """
+
+    def __init__(self):
+        fields = [
+            field for field in Adult._meta.get_fields()
+            if getattr(field, 'editable', False) and not field.auto_created
+        ]
+        # Verbose names only count when no other field shares them ("Duration", "Other", ...)
+        aliases = {}
+        for field in fields:
+            aliases.setdefault(normalize_header(field.verbose_name), []).append(field.name)
+        self.columns = {alias: names[0] for alias, names in aliases.items() if len(names) == 1}
+        self.columns.update((field.name, field.name) for field in fields)
+
+        self.choices = {}
+        for field in fields:
+            if field.choices:
+                self.choices[field.name] = {
+                    str(option).casefold(): key for key, label in field.choices for option in (key, label)
+                }
+
+        self.vocabularies = {
+            field_name: get_vocabulary(model_class) for field_name, model_class in MANY_TO_MANY_MODELS.items()
+        }
+
+    def convert(self, row):
+        """Return (data, errors) for one row; empty cells keep the model defaults"""
+        data = {}
+        errors = {}
+        for header, value in row.items():
+            field_name = self.columns.get(normalize_header(header))
+            if field_name is None or value is None or value == '':
+                continue
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+
+            if field_name in self.vocabularies:
+                ids = []
+                for name in NAME_SEPARATORS.split(str(value)):
+                    name = name.strip()
+                    if not name:
+                        continue
+                    pk = self.vocabularies[field_name].pk_for_name(name)
+                    if pk is None:
+                        errors.setdefault(field_name, []).append(f'Unknown name "{name}".')
+                    else:
+                        ids.append(str(pk))
+                data[field_name] = ids
+            elif field_name in self.choices and isinstance(value, str):
+                data[field_name] = self.choices[field_name].get(value.strip().casefold(), value)
+            else:
+                data[field_name] = value
+        return data, errors
+
+
+class Command(BaseCommand):
+    help = (
+        'Import adult patients from a CSV or XLSX spreadsheet. Rows are validated with the '
+        'AdultSerializer rules a batch at a time and inserted with bulk_create; progress is '
+        'saved to a checkpoint file after every batch so an interrupted import resumes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file with one adult per row and a header row')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows validated and inserted per batch')
+        parser.add_argument('--sheet', help='XLSX worksheet to read, defaults to the active one')
+        parser.add_argument('--checkpoint', help='Checkpoint file, defaults to <path>.checkpoint')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+        parser.add_argument('--errors', help='Append the rejected rows and their errors to this CSV file')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        batch_size = options['batch_size']
+        if not os.path.isfile(path):
+            raise CommandError(f'File "{path}" does not exist')
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        state = {'rows_done': 0, 'created': 0, 'rejected': 0}
+        if os.path.exists(checkpoint_path) and not options['restart']:
+            with open(checkpoint_path) as handle:
+                state = json.load(handle)
+            self.stdout.write(f'Resuming after {state["rows_done"]} rows from {checkpoint_path}')
+
+        converter = RowConverter()
+        rows = islice(read_rows(path, options['sheet']), state['rows_done'], None)
+
+        for batch in batches(rows, batch_size):
+            created, rejected = self.import_batch(batch, converter, batch_size)
+            if options['errors'] and rejected:
+                self.write_errors(options['errors'], rejected)
+
+            state['rows_done'] += len(batch)
+            state['created'] += created
+            state['rejected'] += len(rejected)
+            self.save_checkpoint(checkpoint_path, state)
+            self.stdout.write(
+                f'Rows {batch[0][0]}-{batch[-1][0]}: {created} created, {len(rejected)} rejected'
+            )
+            for row_number, errors in rejected[:5]:
+                self.stdout.write(f'  row {row_number}: {json.dumps(errors)}')
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {state["created"]} adults from {state["rows_done"]} rows, {state["rejected"]} rejected'
+        ))
+
+    def import_batch(self, batch, converter, batch_size):
+        """Validate and insert one batch; return (created count, [(row number, errors)])"""
+        rejected = []
+        row_numbers = []
+        items = []
+        for row_number, row in batch:
+            data, errors = converter.convert(row)
+            if errors:
+                rejected.append((row_number, errors))
+            else:
+                row_numbers.append(row_number)
+                items.append(data)
+
+        serializer = AdultBulkSerializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+        for index, errors in serializer.item_errors.items():
+            rejected.append((row_numbers[index], errors))
+
+        with transaction.atomic():
+            results = bulk_create_adults(serializer.validated_data, batch_size)
+
+        created = 0
+        for index, result in zip(serializer.valid_indexes, results):
+            if isinstance(result, Adult):
+                created += 1
+            else:
+                rejected.append((row_numbers[index], result))
+
+        rejected.sort(key=lambda entry: entry[0])
+        return created, rejected
+
+    def save_checkpoint(self, checkpoint_path, state):
+        # Written after the batch commits, and replaced atomically
+        temporary_path = f'{checkpoint_path}.tmp'
+        with open(temporary_path, 'w') as handle:
+            json.dump(state, handle)
+        os.replace(temporary_path, checkpoint_path)
+
+    def write_errors(self, errors_path, rejected):
+        new_file = not os.path.exists(errors_path)
+        with open(errors_path, 'a', newline='') as handle:
+            writer = csv.writer(handle)
+            if new_file:
+                writer.writerow(['row', 'errors'])
+            for row_number, errors in rejected:
+                writer.writerow([row_number, json.dumps(errors)])
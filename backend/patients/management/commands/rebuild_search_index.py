@@ -0,0 +1,30 @@
+"""
+Repopulate the patient search index from the tables, e.g. after patients
+were changed with raw SQL or queryset.update(), which the index signals do
+not see. With --check it only reports the stale rows and fails when there
+are any.
+
+Usage: python manage.py rebuild_search_index [--check]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from patients.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the patient search index, or check it with --check'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only count the stale rows, fail if there are any')
+        parser.add_argument('--database', default=None, help='Database alias of the index')
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(using=options['database'])
+        if options['check']:
+            stale = backend.stale_rows()
+            if stale:
+                raise CommandError(f'{stale} stale rows in the {type(backend).__name__} index')
+            self.stdout.write(f'{type(backend).__name__} index is up to date')
+            return
+        backend.rebuild()
+        self.stdout.write(f'Rebuilt the {type(backend).__name__} index')
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+FTS_TABLE = "patients_patient_search"
+
+TRIGRAM_INDEXES = [
+    ("patients_patient_name_trgm", "patients_patient", "name"),
+    ("patients_patient_mobile_number_trgm", "patients_patient", "mobile_number"),
+    ("patients_adult_occupation_trgm", "patients_adult", "occupation"),
+]
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            # The trigram tokenizer needs SQLite 3.34+; without it search falls back to icontains
+            cursor.execute("SELECT sqlite_version()")
+            version = tuple(int(part) for part in cursor.fetchone()[0].split("."))
+            if version < (3, 34):
+                return
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                f"name, mobile_number, occupation, tokenize = 'trigram')"
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, mobile_number, occupation) "
+                f"SELECT p.rowid, p.name, p.mobile_number, COALESCE(a.occupation, '') "
+                f"FROM patients_patient p LEFT JOIN patients_adult a ON a.patient_ptr_id = p.id"
+            )
+    elif connection.vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # Matches the UPPER(column::text) LIKE UPPER(...) that icontains compiles to
+        for name, table, column in TRIGRAM_INDEXES:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+                f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif connection.vendor == "postgresql":
+        for name, table, column in TRIGRAM_INDEXES:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0003_remove_adult_age_patient_age"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
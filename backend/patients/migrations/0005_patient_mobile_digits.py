@@ -0,0 +1,51 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:07
+
+import re
+
+from django.db import migrations, models
+
+
+def normalize_mobile_number(value):
+    # Frozen copy of patients.models.normalize_mobile_number
+    digits = re.sub(r"\D", "", value or "")
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if digits.startswith("20") and len(digits) >= 12:
+        digits = digits[2:]
+    if digits.startswith("0"):
+        digits = digits[1:]
+    return digits
+
+
+def fill_mobile_digits(apps, schema_editor):
+    Patient = apps.get_model("patients", "Patient")
+    batch = []
+    for patient in Patient.objects.only("id", "mobile_number").iterator(chunk_size=2000):
+        patient.mobile_digits = normalize_mobile_number(patient.mobile_number)
+        patient.mobile_digits_reversed = patient.mobile_digits[::-1]
+        batch.append(patient)
+        if len(batch) >= 2000:
+            Patient.objects.bulk_update(batch, ["mobile_digits", "mobile_digits_reversed"])
+            batch = []
+    Patient.objects.bulk_update(batch, ["mobile_digits", "mobile_digits_reversed"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0004_patient_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="patient",
+            name="mobile_digits",
+            field=models.CharField(db_index=True, default="", editable=False, max_length=15),
+        ),
+        migrations.AddField(
+            model_name="patient",
+            name="mobile_digits_reversed",
+            field=models.CharField(db_index=True, default="", editable=False, max_length=15),
+        ),
+        migrations.RunPython(fill_mobile_digits, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0005_patient_mobile_digits"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["-created_at", "id"], name="patient_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["patient_type", "-created_at", "id"], name="patient_type_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["age"], name="patient_age_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["gender", "age"], name="patient_gender_age_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["name", "id"], name="patient_name_idx"),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SUMMARY_FIELDS = ["code", "name", "gender", "mobile_number", "age", "occupation", "created_at", "updated_at"]
+
+TRIGRAM_INDEXES = [
+    ("patients_adultsummary_name_trgm", "name"),
+    ("patients_adultsummary_mobile_number_trgm", "mobile_number"),
+    ("patients_adultsummary_occupation_trgm", "occupation"),
+]
+
+BATCH_SIZE = 500
+
+
+def fill_adult_summaries(apps, schema_editor):
+    Adult = apps.get_model("patients", "Adult")
+    AdultSummary = apps.get_model("patients", "AdultSummary")
+    through = Adult._meta.get_field("complaints").remote_field.through
+    using = schema_editor.connection.alias
+
+    rows = list(Adult.objects.using(using).order_by().values("id", *SUMMARY_FIELDS))
+    for start in range(0, len(rows), BATCH_SIZE):
+        chunk = rows[start:start + BATCH_SIZE]
+        complaints = {}
+        for adult_id, symptom_id in (
+            through.objects.using(using)
+            .filter(adult_id__in=[row["id"] for row in chunk])
+            .order_by("id")
+            .values_list("adult_id", "symptommodel_id")
+        ):
+            complaints.setdefault(adult_id, []).append(str(symptom_id))
+        AdultSummary.objects.using(using).bulk_create([
+            AdultSummary(
+                adult_id=row["id"],
+                complaint_ids=complaints.get(row["id"], []),
+                **{field: row[field] for field in SUMMARY_FIELDS},
+            )
+            for row in chunk
+        ])
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Same pg_trgm indexes as migration 0004, for autocomplete on the summary table
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON patients_adultsummary "
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0006_patient_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdultSummary",
+            fields=[
+                (
+                    "adult",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="patients.adult",
+                    ),
+                ),
+                ("code", models.CharField(default="", max_length=255)),
+                ("name", models.CharField(default="", max_length=200)),
+                ("gender", models.CharField(default="male", max_length=10)),
+                ("mobile_number", models.CharField(default="", max_length=15)),
+                ("age", models.IntegerField(default=0)),
+                ("occupation", models.CharField(default="", max_length=255)),
+                ("complaint_ids", models.JSONField(default=list)),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(fields=["-created_at", "adult"], name="adultsummary_created_idx"),
+                    models.Index(fields=["name", "adult"], name="adultsummary_name_idx"),
+                    models.Index(fields=["age"], name="adultsummary_age_idx"),
+                    models.Index(fields=["gender", "age"], name="adultsummary_gender_age_idx"),
+                ],
+            },
+        ),
+        migrations.RunPython(fill_adult_summaries, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
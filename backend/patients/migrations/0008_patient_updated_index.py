@@ -0,0 +1,17 @@
+# Generated by Django 5.0.8 on 2026-10-18 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0007_adult_summary"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["updated_at", "id"], name="patient_updated_idx"),
+        ),
+    ]
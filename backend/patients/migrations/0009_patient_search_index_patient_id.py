@@ -0,0 +1,59 @@
+from django.db import migrations
+
+FTS_TABLE = "patients_patient_search"
+
+
+def _has_search_index(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+    return cursor.fetchone() is not None
+
+
+def key_search_index_by_patient_id(apps, schema_editor):
+    # The rowid of patients_patient is implicit and VACUUM may renumber it, so
+    # the index keeps the patient's primary key in a column of its own
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        if not _has_search_index(cursor):
+            return
+        cursor.execute(f"DROP TABLE {FTS_TABLE}")
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"patient_id UNINDEXED, name, mobile_number, occupation, tokenize = 'trigram')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (patient_id, name, mobile_number, occupation) "
+            f"SELECT p.id, p.name, p.mobile_number, COALESCE(a.occupation, '') "
+            f"FROM patients_patient p LEFT JOIN patients_adult a ON a.patient_ptr_id = p.id"
+        )
+
+
+def key_search_index_by_rowid(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        if not _has_search_index(cursor):
+            return
+        cursor.execute(f"DROP TABLE {FTS_TABLE}")
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"name, mobile_number, occupation, tokenize = 'trigram')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, mobile_number, occupation) "
+            f"SELECT p.rowid, p.name, p.mobile_number, COALESCE(a.occupation, '') "
+            f"FROM patients_patient p LEFT JOIN patients_adult a ON a.patient_ptr_id = p.id"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0008_patient_updated_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(key_search_index_by_patient_id, key_search_index_by_rowid),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def order_complaint_ids(apps, schema_editor):
+    # Summaries filled by 0007 list complaints in through-row order; the adult
+    # endpoints list them by symptom id, so rewrite complaint_ids that way
+    Adult = apps.get_model("patients", "Adult")
+    AdultSummary = apps.get_model("patients", "AdultSummary")
+    through = Adult._meta.get_field("complaints").remote_field.through
+    using = schema_editor.connection.alias
+
+    adult_ids = list(AdultSummary.objects.using(using).order_by("adult_id").values_list("adult_id", flat=True))
+    for start in range(0, len(adult_ids), BATCH_SIZE):
+        chunk = adult_ids[start:start + BATCH_SIZE]
+        complaints = {}
+        for adult_id, symptom_id in (
+            through.objects.using(using)
+            .filter(adult_id__in=chunk)
+            .order_by("symptommodel_id")
+            .values_list("adult_id", "symptommodel_id")
+        ):
+            complaints.setdefault(adult_id, []).append(str(symptom_id))
+        AdultSummary.objects.using(using).bulk_update(
+            [AdultSummary(adult_id=adult_id, complaint_ids=complaints.get(adult_id, [])) for adult_id in chunk],
+            ["complaint_ids"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0009_patient_search_index_patient_id"),
+    ]
+
+    operations = [
+        migrations.RunPython(order_complaint_ids, migrations.RunPython.noop),
+    ]
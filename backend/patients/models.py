@@ -1,3 +1,4 @@
+import re
 import uuid
 from django.db import models
 
@@ -35,6 +36,27 @@ SURGICALS = [
     ('operation', 'Operation'),
 ]
 
+# Many-to-many relations of Adult, loaded together on every read path
+ADULT_M2M_FIELDS = ['complaints', 'cyanosis', 'medical', 'drugs', 'family_history']
+
+# General examination fields filled in by the follow-up stations
+VITAL_FIELDS = ['bp', 'hr', 'temp', 'rbs', 'spo2']
+
+
+def normalize_mobile_number(value):
+    """
+    Reduce a phone number to its national digits so every spelling of it
+    compares equal: '+20 101-234-5678', '00201012345678' and '01012345678'
+    all become '1012345678'.
+    """
+    digits = re.sub(r'\D', '', value or '')
+    if digits.startswith('00'):
+        digits = digits[2:]
+    if digits.startswith('20') and len(digits) >= 12:
+        digits = digits[2:]
+    if digits.startswith('0'):
+        digits = digits[1:]
+    return digits
 
 
 class Patient(models.Model):
@@ -47,6 +69,9 @@ class Patient(models.Model):
     name = models.CharField(max_length=200, default='')
     gender = models.CharField(max_length=10, choices=[('male', 'Male'), ('female', 'Female')], default='male')
     mobile_number = models.CharField(max_length=15, default='')
+    # Derived from mobile_number on save; the reversed copy turns suffix search into a prefix range
+    mobile_digits = models.CharField(max_length=15, default='', db_index=True, editable=False)
+    mobile_digits_reversed = models.CharField(max_length=15, default='', db_index=True, editable=False)
     age = models.IntegerField(default=0)
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -54,10 +79,32 @@ class Patient(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        # Listings page by (-created_at, id) or (name, id), see KeysetPagination;
+        # the adult search and by_age_range actions filter on gender and age;
+        # the sync endpoint reads changes in (updated_at, id) order
+        indexes = [
+            models.Index(fields=['-created_at', 'id'], name='patient_created_idx'),
+            models.Index(fields=['patient_type', '-created_at', 'id'], name='patient_type_created_idx'),
+            models.Index(fields=['age'], name='patient_age_idx'),
+            models.Index(fields=['gender', 'age'], name='patient_gender_age_idx'),
+            models.Index(fields=['name', 'id'], name='patient_name_idx'),
+            models.Index(fields=['updated_at', 'id'], name='patient_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.mobile_number})"
 
+    def save(self, *args, **kwargs):
+        self.set_mobile_digits()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'mobile_number' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'mobile_digits', 'mobile_digits_reversed'}
+        super().save(*args, **kwargs)
+
+    def set_mobile_digits(self):
+        self.mobile_digits = normalize_mobile_number(self.mobile_number)
+        self.mobile_digits_reversed = self.mobile_digits[::-1]
+
 class Adult(Patient):
     occupation = models.CharField(max_length=255, default='')
     marital_status = models.CharField(max_length=255, choices=[('married', 'Married'), ('single', 'Single'), ('divorced', 'Divorced'), ('widowed', 'Widowed')], default='single')
@@ -115,4 +162,38 @@ class Adult(Patient):
     family_history = models.ManyToManyField("others.FamilyHistoryModel", related_name='adult_family_history', blank=True, verbose_name="Family History")
 
 class Pediatric(Patient):
-    pass
\ No newline at end of file
+    pass
+
+
+class AdultSummary(models.Model):
+    """
+    Denormalised, read-only copy of the Adult columns the summary listing and
+    autocomplete show, one row per adult, so they read a single table instead
+    of joining patients_patient to patients_adult. Rows are written by
+    patients.summary after every save, relation change and bulk write of an
+    adult and go away with it. Complaint labels are resolved from the
+    vocabulary cache when serialized, so renaming a symptom needs no rewrite.
+    """
+    adult = models.OneToOneField(Adult, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    code = models.CharField(max_length=255, default='')
+    name = models.CharField(max_length=200, default='')
+    gender = models.CharField(max_length=10, default='male')
+    mobile_number = models.CharField(max_length=15, default='')
+    age = models.IntegerField(default=0)
+    occupation = models.CharField(max_length=255, default='')
+    complaint_ids = models.JSONField(default=list)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at']
+        # Same listing orders and filters as the Patient indexes, on one table
+        indexes = [
+            models.Index(fields=['-created_at', 'adult'], name='adultsummary_created_idx'),
+            models.Index(fields=['name', 'adult'], name='adultsummary_name_idx'),
+            models.Index(fields=['age'], name='adultsummary_age_idx'),
+            models.Index(fields=['gender', 'age'], name='adultsummary_gender_age_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.mobile_number})"
@@ -1,39 +0,0 @@
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.response import Response
-
-
-class CustomPageNumberPagination(PageNumberPagination):
-    """
-    Custom pagination class that provides detailed pagination information
-    """
-    page_size = 20
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-    
-    def get_paginated_response(self, data):
-        return Response({
-            'count': self.page.paginator.count,
-            'next': self.get_next_link(),
-            'previous': self.get_previous_link(),
-            'page_size': self.page_size,
-            'current_page': self.page.number,
-            'total_pages': self.page.paginator.num_pages,
-            'has_next': self.page.has_next(),
-            'has_previous': self.page.has_previous(),
-            'results': data
-        })
-    
-    def get_page_size(self, request):
-        """
-        Override to allow dynamic page size from query parameters
-        """
-        if self.page_size_query_param:
-            page_size = request.query_params.get(self.page_size_query_param)
-            if page_size is not None:
-                try:
-                    page_size = int(page_size)
-                    if page_size > 0 and page_size <= self.max_page_size:
-                        return page_size
-                except (ValueError, TypeError):
-                    pass
-        return self.page_size
@@ -0,0 +1,291 @@
+"""
+Search backends behind the patient autocomplete endpoints.
+
+The backend is chosen with the PATIENT_SEARCH_BACKEND setting: "auto" picks
+the indexed backend for the current database (SQLite FTS5 or Postgres
+pg_trgm) and falls back to plain ``icontains`` queries; a dotted path selects
+a backend class explicitly. Only an indexed pick of "auto" is kept for the
+life of the process: the fallback is chosen again on every call, so the FTS
+table created by a later ``migrate`` is picked up without a restart.
+``python manage.py rebuild_search_index`` repopulates an index that writes
+bypassing the model signals (raw SQL, queryset.update()) left behind.
+"""
+import abc
+import uuid
+
+from django.conf import settings
+from django.db import DatabaseError, connections, router
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+# Name of the SQLite FTS5 shadow table, created by migration 0004 and keyed
+# by the patient's primary key in its patient_id column since 0009
+FTS_TABLE = 'patients_patient_search'
+
+# Index rows are read back from the tables, so saving the bare Patient row of an
+# adult keeps its occupation in the index
+FTS_INSERT_SQL = f"""
+    INSERT INTO {FTS_TABLE} (patient_id, name, mobile_number, occupation)
+    SELECT p.id, p.name, p.mobile_number, COALESCE(a.occupation, '')
+    FROM patients_patient p LEFT JOIN patients_adult a ON a.patient_ptr_id = p.id
+"""
+
+
+# Relevance tiers shared by every backend: exact phone > name prefix > substring > occupation
+RANK_EXACT_PHONE = 0
+RANK_PREFIX = 1
+RANK_SUBSTRING = 2
+RANK_OTHER = 3
+
+# Fields whose matches only count in the last tier
+LOW_RANK_FIELDS = ('occupation',)
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class BaseSearchBackend(abc.ABC):
+    """
+    Interface of a patient search backend.
+
+    ``search`` returns at most ``limit`` model instances from ``queryset``
+    matching ``query`` in any of ``fields``, ordered by relevance tier
+    (exact phone, prefix of the first field, substring, occupation) and then
+    in a stable, backend specific order.
+    The index hooks are no-ops for backends that rely on database indexes.
+    """
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    @classmethod
+    def is_available(cls, connection):
+        return True
+
+    @abc.abstractmethod
+    def search(self, queryset, query, fields, limit):
+        pass
+
+    def index(self, patient):
+        pass
+
+    def index_many(self, patients):
+        for patient in patients:
+            self.index(patient)
+
+    def remove(self, patient):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def stale_rows(self):
+        """Patients missing from the index plus index rows that are out of date"""
+        return 0
+
+
+def relevance_rank(query, fields):
+    """Case expression giving the relevance tier of a row matching ``query``"""
+    whens = []
+    if 'mobile_number' in fields:
+        whens.append(When(mobile_number=query, then=Value(RANK_EXACT_PHONE)))
+    whens.append(When(**{f'{fields[0]}__istartswith': query}, then=Value(RANK_PREFIX)))
+
+    substring = Q()
+    for field in fields:
+        if field not in LOW_RANK_FIELDS:
+            substring |= Q(**{f'{field}__icontains': query})
+    if substring:
+        whens.append(When(substring, then=Value(RANK_SUBSTRING)))
+    return Case(*whens, default=Value(RANK_OTHER), output_field=IntegerField())
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """
+    Plain ``icontains`` search in one query over all fields, ranked with
+    relevance_rank(). The LIMIT is part of the query, so the database keeps a
+    bounded top-N sort instead of sorting every match. Works everywhere, but
+    the leading wildcard means a full table scan unless the database has a
+    trigram index.
+    """
+
+    def search(self, queryset, query, fields, limit):
+        return list(self.get_queryset(queryset, query, fields)[:limit])
+
+    def get_queryset(self, queryset, query, fields):
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': query})
+        return (
+            queryset.filter(condition)
+            .annotate(search_rank=relevance_rank(query, fields))
+            .order_by('search_rank', fields[0], 'pk')
+        )
+
+
+class PostgresTrigramSearchBackend(DatabaseSearchBackend):
+    """
+    ``icontains`` search served by the pg_trgm GIN indexes from migration 0004,
+    which index UPPER(column::text) exactly as Django's icontains compiles it.
+    """
+
+    @classmethod
+    def is_available(cls, connection):
+        return connection.vendor == 'postgresql'
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """
+    Search through an FTS5 table using the trigram tokenizer, which answers
+    substring matches from the index. Rows hold the patient's primary key in
+    the unindexed patient_id column and are kept in sync by the signals in
+    patients.signals.
+    Queries shorter than three characters cannot use trigrams and scan the
+    FTS table instead.
+    """
+    columns = ('name', 'mobile_number', 'occupation')
+    batch_size = 500
+
+    @classmethod
+    def is_available(cls, connection):
+        if connection.vendor != 'sqlite':
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                return cursor.fetchone() is not None
+        except DatabaseError:
+            return False
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def search(self, queryset, query, fields, limit):
+        fields = [field for field in fields if field in self.columns]
+        ranked_fields = [field for field in fields if field not in LOW_RANK_FIELDS]
+
+        # One pass per relevance tier, each in rowid order so it can stop at the
+        # limit instead of sorting every match
+        passes = []
+        if 'mobile_number' in fields:
+            passes.append(self._match(['mobile_number'], query, "s.mobile_number = %s", [query]))
+        passes.append(self._match(
+            fields[:1], query, f"s.{fields[0]} LIKE %s ESCAPE '\\'", [_escape_like(query) + '%']
+        ))
+        if ranked_fields:
+            passes.append(self._match(ranked_fields, query))
+        if len(ranked_fields) < len(fields):
+            passes.append(self._match(fields, query))
+
+        ids = []
+        for condition, params in passes:
+            # Rows already found can come back again, at most len(ids) of them
+            for pk in self._match_ids(queryset.model, condition, params, limit):
+                if pk not in ids:
+                    ids.append(pk)
+            if len(ids) >= limit:
+                break
+        ids = ids[:limit]
+
+        found = queryset.in_bulk(ids)
+        return [found[pk] for pk in ids if pk in found]
+
+    def _match(self, fields, query, extra_condition=None, extra_params=()):
+        """WHERE clause matching ``query`` as a substring of any of ``fields``"""
+        if len(query) >= 3:
+            # Column filter plus a quoted phrase: substring match on the trigram index
+            condition = f'{FTS_TABLE} MATCH %s'
+            params = ['{%s} : "%s"' % (' '.join(fields), query.replace('"', '""'))]
+        else:
+            condition = '(' + ' OR '.join(f"s.{field} LIKE %s ESCAPE '\\'" for field in fields) + ')'
+            params = ['%' + _escape_like(query) + '%'] * len(fields)
+        if extra_condition:
+            condition = f'{condition} AND {extra_condition}'
+            params = [*params, *extra_params]
+        return condition, params
+
+    def _match_ids(self, model, condition, params, limit):
+        # Keep only patients with a row in the searched table (patients_patient,
+        # patients_adult, patients_adultsummary, ...), whose primary key is the patient's
+        sql = f"""
+            SELECT s.patient_id FROM {FTS_TABLE} s
+            JOIN {model._meta.db_table} t ON t.{model._meta.pk.column} = s.patient_id
+            WHERE {condition}
+            ORDER BY s.rowid
+            LIMIT %s
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, [*params, limit])
+            return [uuid.UUID(row[0]) for row in cursor.fetchall()]
+
+    def index(self, patient):
+        self.index_many([patient])
+
+    def index_many(self, patients):
+        ids = [patient.pk.hex for patient in patients]
+        with self.connection.cursor() as cursor:
+            for start in range(0, len(ids), self.batch_size):
+                chunk = ids[start:start + self.batch_size]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE patient_id IN ({placeholders})", chunk)
+                cursor.execute(f"{FTS_INSERT_SQL} WHERE p.id IN ({placeholders})", chunk)
+
+    def remove(self, patient):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE patient_id = %s", [patient.pk.hex])
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(FTS_INSERT_SQL)
+
+    def stale_rows(self):
+        # Joined on the patient primary key index, patient_id itself is unindexed
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT
+                    (SELECT COUNT(*) FROM patients_patient)
+                    - (SELECT COUNT(DISTINCT s.patient_id) FROM {FTS_TABLE} s
+                       JOIN patients_patient p ON p.id = s.patient_id),
+                    (SELECT COUNT(*) - COUNT(DISTINCT patient_id) FROM {FTS_TABLE}),
+                    (SELECT COUNT(*) FROM {FTS_TABLE} s
+                     LEFT JOIN patients_patient p ON p.id = s.patient_id
+                     LEFT JOIN patients_adult a ON a.patient_ptr_id = p.id
+                     WHERE p.id IS NULL OR s.name IS NOT p.name OR s.mobile_number IS NOT p.mobile_number
+                        OR s.occupation IS NOT COALESCE(a.occupation, ''))
+            """)
+            return sum(cursor.fetchone())
+
+
+AUTO_BACKENDS = [SQLiteFTSSearchBackend, PostgresTrigramSearchBackend]
+
+# (PATIENT_SEARCH_BACKEND, database alias) -> backend instance
+_backends = {}
+
+
+def _load_backend(path, using):
+    key = (path, using)
+    if key in _backends:
+        return _backends[key]
+    if path != 'auto':
+        backend = import_string(path)(using)
+    else:
+        connection = connections[using]
+        backend = next(
+            (backend_class(using) for backend_class in AUTO_BACKENDS if backend_class.is_available(connection)), None,
+        )
+        if backend is None:
+            # Not kept: the indexed backend may become available with the next migration
+            return DatabaseSearchBackend(using)
+    _backends[key] = backend
+    return backend
+
+
+def get_search_backend(model=None, using=None):
+    """Return the configured search backend for ``using``, by default the database ``model`` reads from"""
+    from .models import Patient
+
+    using = using or router.db_for_read(model or Patient)
+    return _load_backend(getattr(settings, 'PATIENT_SEARCH_BACKEND', 'auto'), using)
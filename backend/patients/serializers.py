@@ -1,13 +1,55 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import Patient, Adult
+from rest_framework.settings import api_settings
+from common.mixins import DynamicFieldsMixin
+from .models import Patient, Adult, AdultSummary, VITAL_FIELDS
+from others.models import SymptomModel, CyanosisModel, MedicalModel, DrugModel, FamilyHistoryModel
+from others.cache import get_vocabulary
 from others.serializers import SymptomAutocompleteSerializer
 
-class PatientSerializer(serializers.ModelSerializer):
+
+# Related model of each ManyToMany field of Adult
+MANY_TO_MANY_MODELS = {
+    'complaints': SymptomModel,
+    'cyanosis': CyanosisModel,
+    'medical': MedicalModel,
+    'drugs': DrugModel,
+    'family_history': FamilyHistoryModel,
+}
+
+
+def many_to_many_pks(model_class, field_data):
+    """
+    Convert a ManyToMany value from the frontend format ({value, label}
+    objects or plain IDs) to a list of distinct primary keys, plus the errors
+    of the IDs that are not valid keys
+    """
+    if not field_data or field_data == "no complaints":
+        return [], []
+    
+    pk_field = model_class._meta.pk
+    pks = []
+    errors = []
+    for item in field_data:
+        item_id = item.get("value") if isinstance(item, dict) else item
+        if item_id is None:
+            continue
+        try:
+            pk = pk_field.to_python(item_id)
+        except DjangoValidationError:
+            errors.append(f'Invalid pk "{item_id}" - object does not exist.')
+            continue
+        if pk not in pks:
+            pks.append(pk)
+    return pks, errors
+
+
+class PatientSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Full serializer for Patient model"""
     
     class Meta:
         model = Patient
-        fields = "__all__"
+        exclude = ['mobile_digits', 'mobile_digits_reversed']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
@@ -47,12 +89,14 @@ class PatientAutocompleteSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'mobile_number']
 
 
-class AdultSerializer(serializers.ModelSerializer):
+class AdultSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Full serializer for Adult model"""
+    # complaints are rendered as a list of {value, label} objects
+    expanded_fields = ('complaints',)
     
     class Meta:
         model = Adult
-        fields = "__all__"
+        exclude = ['mobile_digits', 'mobile_digits_reversed']
         read_only_fields = ['id', 'created_at', 'updated_at']
         extra_kwargs = {
             'complaints': {'write_only': False}
@@ -121,61 +165,36 @@ class AdultSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Allergy must be one of: {', '.join(valid_choices)}")
         return value
 
-    def to_representation(self, instance):
-        ret = super().to_representation(instance)
-        
-        # convert the complaints to a list of {value, label} objects
-        ret['complaints'] = [
-            {
-                'value': str(complaint.id),
-                'label': complaint.name
-            }
-            for complaint in instance.complaints.all()
-        ]
-        
-        return ret
-
     def to_internal_value(self, data):
-        from others.models import SymptomModel, CyanosisModel, MedicalModel, DrugModel, FamilyHistoryModel
-
         # data = super().to_internal_value(data)
-        
-        # Define ManyToMany field mappings
-        many_to_many_mappings = {
-            'complaints': SymptomModel,
-            'cyanosis': CyanosisModel,
-            'medical': MedicalModel,
-            'drugs': DrugModel,
-            'family_history': FamilyHistoryModel,
-        }
-        
-        # Handle all ManyToMany fields
-        for field_name, model_class in many_to_many_mappings.items():
-            field_data = data.get(field_name)
+        data.update(self.resolve_many_to_many(data))
+        return data
+
+    def resolve_many_to_many(self, data):
+        """
+        Map the ManyToMany fields of ``data`` to model instances, looked up in
+        the cached vocabularies and only in the database for IDs they lack
+        """
+        resolved = {}
+        errors = {}
+        for field_name, model_class in MANY_TO_MANY_MODELS.items():
+            pks, field_errors = many_to_many_pks(model_class, data.get(field_name))
             
-            if field_data and field_data != "no complaints" and field_data != []:
-                try:
-                    # Convert from frontend format to model instances
-                    instances = []
-                    for item in field_data:
-                        if isinstance(item, dict) and "value" in item:
-                            item_id = item["value"]
-                            instance = model_class.objects.get(id=item_id)
-                            instances.append(instance)
-                        elif isinstance(item, str):
-                            # Handle case where ID is passed directly as string
-                            instance = model_class.objects.get(id=item)
-                            instances.append(instance)
-                    data[field_name] = instances
-                except model_class.DoesNotExist as e:
-                    data[field_name] = []
-                except Exception as e:
-                    data[field_name] = []
+            instances = get_vocabulary(model_class).instances(pks) if pks else {}
+            field_errors.extend(
+                f'Invalid pk "{pk}" - object does not exist.'
+                for pk in pks if pk not in instances
+            )
+            
+            if field_errors:
+                errors[field_name] = field_errors
             else:
-                data[field_name] = []
+                resolved[field_name] = [instances[pk] for pk in pks]
+        
+        if errors:
+            raise serializers.ValidationError(errors)
             
-        return data
-
+        return resolved
 
 
     # # def create(self, validated_data):
@@ -236,3 +255,110 @@ class AdultAutocompleteSerializer(serializers.ModelSerializer):
             }
             for symptom in obj.complaints.all()
         ]
+
+
+class AdultSummarySerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for AdultSummary rows. Complaint labels come from the
+    symptom vocabulary cache, so a page costs no query beyond its own
+    """
+    id = serializers.UUIDField(source='adult_id', read_only=True)
+    complaints = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = AdultSummary
+        fields = ['id', 'code', 'name', 'gender', 'mobile_number', 'age', 'occupation', 'complaints',
+                  'created_at', 'updated_at']
+        read_only_fields = fields
+    
+    def get_complaints(self, obj):
+        """Return complaints as list of {value, label} objects, skipping deleted symptoms"""
+        vocabulary = get_vocabulary(SymptomModel)
+        pk_field = SymptomModel._meta.pk
+        complaints = []
+        for pk in obj.complaint_ids:
+            entry = vocabulary.get(pk_field.to_python(pk))
+            if entry is not None:
+                complaints.append({'value': str(entry.id), 'label': entry.name})
+        return complaints
+
+
+class AdultSummaryAutocompleteSerializer(AdultSummarySerializer):
+    """Same data as AdultAutocompleteSerializer, read from AdultSummary"""
+    
+    class Meta(AdultSummarySerializer.Meta):
+        fields = ['id', 'name', 'mobile_number', 'age', 'occupation', 'complaints']
+        read_only_fields = fields
+
+
+class AdultBulkListSerializer(serializers.ListSerializer):
+    """
+    Validates a batch of adults item by item. Invalid items are kept in
+    ``item_errors`` by their index instead of failing the whole batch.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            message = self.error_messages['not_a_list'].format(input_type=type(data).__name__)
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]}, code='not_a_list')
+        
+        if not self.allow_empty and len(data) == 0:
+            message = self.error_messages['empty']
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]}, code='empty')
+        
+        self.item_errors = {}
+        self.valid_indexes = []
+        validated = []
+        for index, item in enumerate(data):
+            try:
+                validated.append(self.child.run_validation(item))
+            except serializers.ValidationError as exc:
+                self.item_errors[index] = exc.detail
+            else:
+                self.valid_indexes.append(index)
+        return validated
+
+
+class AdultBulkSerializer(AdultSerializer):
+    """
+    Item serializer of the bulk create endpoint. The rows are inserted with
+    bulk_create and never go through Model.save(), so unlike AdultSerializer
+    the fields are validated and coerced here; code uniqueness is checked by
+    the database insert rather than one query per item.
+    """
+
+    class Meta(AdultSerializer.Meta):
+        list_serializer_class = AdultBulkListSerializer
+        extra_kwargs = {
+            **AdultSerializer.Meta.extra_kwargs,
+            'code': {'validators': []},
+        }
+
+    def to_internal_value(self, data):
+        if not isinstance(data, dict):
+            return super(AdultSerializer, self).to_internal_value(data)
+        
+        fields = {key: value for key, value in data.items() if key not in MANY_TO_MANY_MODELS}
+        validated = {}
+        errors = {}
+        try:
+            validated = super(AdultSerializer, self).to_internal_value(fields)
+        except serializers.ValidationError as exc:
+            errors.update(exc.detail)
+        try:
+            validated.update(self.resolve_many_to_many(data))
+        except serializers.ValidationError as exc:
+            errors.update(exc.detail)
+        
+        if errors:
+            raise serializers.ValidationError(errors)
+        return validated
+
+
+class AdultVitalsSerializer(serializers.ModelSerializer):
+    """Item serializer of the bulk vitals update: the adult ID plus any vitals to set"""
+    id = serializers.UUIDField()
+    
+    class Meta:
+        model = Adult
+        fields = ['id', *VITAL_FIELDS]
@@ -0,0 +1,120 @@
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.utils import timezone
+
+from .models import ADULT_M2M_FIELDS, Patient, Adult, AdultSummary, Pediatric
+from .search import get_search_backend
+from .summary import refresh_adult_summaries
+
+
+# Saving an Adult only sends post_save for Adult, not for its Patient parent,
+# so every patient model is listed. Receivers are never connected for all
+# senders: any delete receiver on a model turns off Django's raw delete path
+# for it, which bulk deletes rely on for the ManyToMany through tables
+PATIENT_MODELS = [Patient, Adult, Pediatric]
+
+
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """Keep the patient search index in sync with saved patients"""
+    if raw:
+        return
+    get_search_backend(sender).index(instance)
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    """Drop deleted patients from the search index"""
+    get_search_backend(sender).remove(instance)
+
+
+for model in PATIENT_MODELS:
+    post_save.connect(update_search_index, sender=model, dispatch_uid=f'patients_search_index_save_{model.__name__}')
+    pre_delete.connect(remove_from_search_index, sender=model, dispatch_uid=f'patients_search_index_delete_{model.__name__}')
+
+
+def update_adult_summary(sender, instance, raw=False, **kwargs):
+    """
+    Rewrite the summary row of a saved adult; the bare Patient row of an adult
+    carries most of its columns, so Patient saves count too
+    """
+    if raw:
+        return
+    refresh_adult_summaries([instance.pk])
+
+
+def update_adult_summary_complaints(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep the complaint IDs of the summary rows in sync with Adult.complaints"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_adult_summaries([instance.pk])
+    elif action == 'pre_clear':
+        # symptom.adult_complaints.clear() does not say which adults it affects
+        instance._summary_adult_ids = list(
+            sender.objects.filter(symptommodel_id=instance.pk).values_list('adult_id', flat=True)
+        )
+    elif action == 'post_clear':
+        refresh_adult_summaries(getattr(instance, '_summary_adult_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        refresh_adult_summaries(pk_set)
+
+
+for model in [Patient, Adult]:
+    post_save.connect(update_adult_summary, sender=model, dispatch_uid=f'patients_adult_summary_save_{model.__name__}')
+m2m_changed.connect(
+    update_adult_summary_complaints, sender=Adult.complaints.through, dispatch_uid='patients_adult_summary_complaints'
+)
+
+
+# Vocabulary model -> (through model, column of the vocabulary row) of each
+# Adult ManyToMany field
+ADULT_RELATIONS = {
+    field.related_model: (field.remote_field.through, field.m2m_reverse_name())
+    for field in (Adult._meta.get_field(name) for name in ADULT_M2M_FIELDS)
+}
+
+
+def touch_adults(adult_ids):
+    """
+    Move updated_at of the given adults, and of their summary rows, to now:
+    the delta sync reads changes from it, and relation changes do not save
+    the adult. ``adult_ids`` may also be a values() queryset, used as a
+    subquery.
+    """
+    if not isinstance(adult_ids, QuerySet):
+        adult_ids = list(adult_ids)
+        if not adult_ids:
+            return
+    now = timezone.now()
+    Patient.objects.filter(pk__in=adult_ids).update(updated_at=now)
+    AdultSummary.objects.filter(adult_id__in=adult_ids).update(updated_at=now)
+
+
+def touch_adults_on_relation_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Count a change to any ManyToMany field of an adult as an update of the adult"""
+    if not reverse:
+        if action in ('post_add', 'post_remove') and pk_set or action == 'post_clear':
+            touch_adults([instance.pk])
+    elif action == 'pre_clear':
+        _, column = ADULT_RELATIONS[type(instance)]
+        instance._touched_adult_ids = list(
+            sender.objects.filter(**{column: instance.pk}).values_list('adult_id', flat=True)
+        )
+    elif action == 'post_clear':
+        touch_adults(getattr(instance, '_touched_adult_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        touch_adults(pk_set)
+
+
+def touch_adults_of_deleted_row(sender, instance, **kwargs):
+    """Deleting a vocabulary row drops it from its adults without a ManyToMany signal"""
+    through, column = ADULT_RELATIONS[sender]
+    # Subqueries of the UPDATEs, the through rows themselves are left to the raw cascade delete
+    touch_adults(through.objects.filter(**{column: instance.pk}).values('adult_id'))
+
+
+for model, (through, _) in ADULT_RELATIONS.items():
+    m2m_changed.connect(
+        touch_adults_on_relation_change, sender=through, dispatch_uid=f'patients_adult_touch_{through.__name__}',
+    )
+    pre_delete.connect(
+        touch_adults_of_deleted_row, sender=model, dispatch_uid=f'patients_adult_touch_delete_{model.__name__}',
+    )
@@ -0,0 +1,68 @@
+"""
+Maintenance of the AdultSummary read model.
+
+Writes still go through Patient and Adult; afterwards the affected summary
+rows are rebuilt from them with one SELECT per table and a single upsert, so
+refreshing a row twice (a save followed by complaints.set()) is harmless.
+The model signals in patients.signals cover single saves and relation
+changes, the bulk paths in patients.bulk call refresh_adult_summaries()
+themselves, and deletes cascade.
+"""
+from django.db import router
+
+from .models import Adult, AdultSummary
+
+# Columns copied from Adult (and its Patient parent) as they are
+SUMMARY_FIELDS = ['code', 'name', 'gender', 'mobile_number', 'age', 'occupation', 'created_at', 'updated_at']
+
+# Adults rebuilt per round trip, well below SQLite's variable limit
+SUMMARY_CHUNK_SIZE = 500
+
+
+def complaint_ids_by_adult(adult_ids, using):
+    """{adult id: [symptom id, ...]}, by symptom id like the adult endpoints list them"""
+    through = Adult.complaints.through
+    complaints = {}
+    rows = (
+        through.objects.using(using)
+        .filter(adult_id__in=adult_ids)
+        .order_by('symptommodel_id')
+        .values_list('adult_id', 'symptommodel_id')
+    )
+    for adult_id, symptom_id in rows:
+        complaints.setdefault(adult_id, []).append(str(symptom_id))
+    return complaints
+
+
+def refresh_adult_summaries(adult_ids, using=None):
+    """
+    Rebuild the summary rows of the given adults from the normalised tables.
+    IDs of patients that are not adults are ignored.
+    """
+    adult_ids = list(dict.fromkeys(adult_ids))
+    using = using or router.db_for_write(AdultSummary)
+
+    for start in range(0, len(adult_ids), SUMMARY_CHUNK_SIZE):
+        chunk = adult_ids[start:start + SUMMARY_CHUNK_SIZE]
+        rows = list(Adult.objects.using(using).filter(pk__in=chunk).order_by().values('id', *SUMMARY_FIELDS))
+        if not rows:
+            continue
+        complaints = complaint_ids_by_adult([row['id'] for row in rows], using)
+        summaries = []
+        for row in rows:
+            adult_id = row.pop('id')
+            summaries.append(AdultSummary(adult_id=adult_id, complaint_ids=complaints.get(adult_id, []), **row))
+        AdultSummary.objects.using(using).bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['adult'],
+            update_fields=[*SUMMARY_FIELDS, 'complaint_ids'],
+        )
+
+
+def rebuild_adult_summaries(using=None):
+    """Rewrite every summary row, e.g. after data was changed with raw SQL"""
+    using = using or router.db_for_write(AdultSummary)
+    AdultSummary.objects.using(using).all().delete()
+    adult_ids = Adult.objects.using(using).values_list('id', flat=True).order_by()
+    refresh_adult_summaries(list(adult_ids), using)
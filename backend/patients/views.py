@@ -1,24 +1,38 @@
+import re
+
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from .models import Patient, Adult
-from .serializers import PatientSerializer, PatientAutocompleteSerializer, AdultSerializer, AdultAutocompleteSerializer
-from .pagination import CustomPageNumberPagination
+from common.mixins import BulkDeleteMixin, ConditionalGetMixin, FastListMixin, SparseFieldsMixin
+from common.pagination import RequestedPagination
+from common.queries import ordered_prefetches
+from .models import Patient, Adult, AdultSummary, ADULT_M2M_FIELDS, normalize_mobile_number
+from .serializers import (
+    PatientSerializer, PatientAutocompleteSerializer,
+    AdultSerializer, AdultBulkSerializer, AdultVitalsSerializer,
+    AdultSummarySerializer, AdultSummaryAutocompleteSerializer
+)
+from .bulk import bulk_create_adults, bulk_update_vitals
+from .export import EXPORT_FORMATS, parquet_available, stream_adults
+from .search import get_search_backend
 
 
-class PatientViewSet(viewsets.ModelViewSet):
+class PatientViewSet(BulkDeleteMixin, ConditionalGetMixin, FastListMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for Patient model with autocomplete functionality
     """
     queryset = Patient.objects.all()
     serializer_class = PatientSerializer
-    # pagination_class = CustomPageNumberPagination
+    pagination_class = RequestedPagination
+    keyset_pagination = True
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     search_fields = ['name', 'mobile_number']
     ordering_fields = ['name', 'created_at', 'updated_at']
     ordering = ['-created_at']
+    updated_field = 'updated_at'
     
     @action(detail=False, methods=['get'])
     def autocomplete(self, request):
@@ -32,13 +46,50 @@ class PatientViewSet(viewsets.ModelViewSet):
         if not search_query:
             return Response([])
         
-        patients = Patient.objects.filter(
-            name__icontains=search_query
-        )[:limit]
+        patients = get_search_backend(Patient).search(
+            Patient.objects.all(), search_query, ['name'], limit
+        )
         
         serializer = PatientAutocompleteSerializer(patients, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def by_phone(self, request):
+        """
+        Find patients by the full phone number or by its last digits, through
+        the indexed normalised digits instead of scanning mobile_number
+        Usage: /api/patients/by_phone/?number=5678&match=suffix
+        """
+        number = request.query_params.get('number', '')
+        match = request.query_params.get('match', 'suffix')
+        limit = int(request.query_params.get('limit', 10))
+        
+        if match == 'exact':
+            digits = normalize_mobile_number(number)
+            patients = Patient.objects.filter(mobile_digits=digits).order_by('mobile_digits', 'id')
+        elif match == 'suffix':
+            digits = re.sub(r'\D', '', number)
+            if len(digits) < 4:
+                return Response({'error': 'number must have at least 4 digits'}, status=status.HTTP_400_BAD_REQUEST)
+            # A full number is stored without its 0 or country code prefix;
+            # shorter inputs are taken as they are, leading zeros included
+            if len(digits) >= 11 and digits.startswith(('0', '20')):
+                digits = normalize_mobile_number(digits)
+            # Numbers ending in the digits start with them once reversed: a B-tree range scan
+            reversed_digits = digits[::-1]
+            patients = Patient.objects.filter(
+                mobile_digits_reversed__gte=reversed_digits,
+                mobile_digits_reversed__lt=reversed_digits + ':',  # ':' sorts right after '9'
+            ).order_by('mobile_digits_reversed', 'id')
+        else:
+            return Response({'error': 'match must be exact or suffix'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not digits:
+            return Response([])
+        
+        serializer = PatientAutocompleteSerializer(patients[:limit], many=True)
+        return Response(serializer.data)
+
     # restore builk delete 
     @action(detail=False, methods=['delete'])
     def bulk_delete(self, request):
@@ -46,30 +97,42 @@ class PatientViewSet(viewsets.ModelViewSet):
         Bulk delete patients
         Usage: /api/patients/bulk_delete/
         Body: {
-            "patient_ids": ["1", "2", "3"]
+            "patient_ids": ["1", "2", "3"],
+            "async": false
         }
+        Chunked, with counts per deleted model; "async": true runs it in the
+        background, see bulk_delete_status
         """
-        patient_ids = request.data.get('patient_ids', [])
-        Patient.objects.filter(id__in=patient_ids).delete()
-        return Response(status=status.HTTP_204_NO_CONTENT, data={'message': 'Patients deleted successfully'})
+        return self.perform_bulk_delete(request, 'patient_ids', 'Patients deleted successfully')
 
 
-class AdultViewSet(viewsets.ModelViewSet):
+class AdultViewSet(ConditionalGetMixin, FastListMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for Adult model with autocomplete functionality
     """
-    queryset = Adult.objects.all()
+    queryset = Adult.objects.prefetch_related(*ordered_prefetches(Adult, ADULT_M2M_FIELDS))
     serializer_class = AdultSerializer
-    # pagination_class = CustomPageNumberPagination
+    pagination_class = RequestedPagination
+    keyset_pagination = True
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     search_fields = ['name', 'mobile_number', 'occupation']
     ordering_fields = ['name', 'age', 'created_at', 'updated_at']
     ordering = ['-created_at']
+    updated_field = 'updated_at'
+    # The body carries the labels of the related vocabulary rows
+    etag_models = [Adult._meta.get_field(name).related_model for name in ADULT_M2M_FIELDS]
+    sparse_fields_actions = ('list', 'retrieve', 'search', 'by_age_range')
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
         if self.action == 'autocomplete':
-            return AdultAutocompleteSerializer
+            return AdultSummaryAutocompleteSerializer
+        if self.action == 'summary':
+            return AdultSummarySerializer
+        if self.action == 'bulk':
+            return AdultBulkSerializer
+        if self.action == 'bulk_vitals':
+            return AdultVitalsSerializer
         return AdultSerializer
 
     def create(self, request, *args, **kwargs):
@@ -90,18 +153,125 @@ class AdultViewSet(viewsets.ModelViewSet):
         if not search_query:
             return Response([])
         
-        # Search by name, phone number, or occupation
-        adults = Adult.objects.filter(
-            name__icontains=search_query
-        ).union(
-            Adult.objects.filter(mobile_number__icontains=search_query)
-        ).union(
-            Adult.objects.filter(occupation__icontains=search_query)
-        )[:limit]
+        # Search by name, phone number, or occupation in the single-table summaries
+        adults = get_search_backend(AdultSummary).search(
+            AdultSummary.objects.all(), search_query, ['name', 'mobile_number', 'occupation'], limit
+        )
         
         serializer = self.get_serializer(adults, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        List view of adults read from the AdultSummary table: no join and no
+        relation queries. Supports the list's search, ordering and cursor
+        pagination, plus gender, min_age and max_age filters.
+        Usage: /api/adults/summary/?search=john&gender=female&min_age=18&ordering=name
+        """
+        queryset = self.filter_queryset(AdultSummary.objects.all())
+        
+        gender = request.query_params.get('gender', '')
+        if gender:
+            queryset = queryset.filter(gender=gender)
+        
+        for param, lookup in (('min_age', 'age__gte'), ('max_age', 'age__lte')):
+            value = request.query_params.get(param, '')
+            if value:
+                try:
+                    queryset = queryset.filter(**{lookup: int(value)})
+                except ValueError:
+                    pass
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create many adults in one request. Items that fail validation or
+        insertion are reported by their index and do not stop the rest.
+        Usage: /api/adults/bulk/
+        Body: [
+            {"code": "A001", "name": "John Doe", "mobile_number": "01012345678", ...},
+            ...
+        ]
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        
+        results = bulk_create_adults(serializer.validated_data)
+        
+        created = []
+        errors = dict(serializer.item_errors)
+        for index, result in zip(serializer.valid_indexes, results):
+            if isinstance(result, Adult):
+                created.append({'index': index, 'id': str(result.pk)})
+            else:
+                errors[index] = result
+        
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        
+        return Response({
+            'created': created,
+            'errors': [{'index': index, 'errors': errors[index]} for index in sorted(errors)],
+        }, status=response_status)
+    
+    @bulk.mapping.patch
+    def bulk_vitals(self, request):
+        """
+        Update the vitals (bp, hr, temp, rbs, spo2) of many adults at once, in
+        a single transaction. Nothing is written if any item is invalid; IDs
+        that do not exist are reported and skipped.
+        Usage: PATCH /api/adults/bulk/
+        Body: [
+            {"id": "<adult id>", "bp": "120/80", "hr": 72},
+            ...
+        ]
+        """
+        serializer = self.get_serializer(data=request.data, many=True, partial=True)
+        serializer.is_valid(raise_exception=True)
+        
+        updated, missing = bulk_update_vitals(serializer.validated_data)
+        
+        return Response({
+            'updated': [str(pk) for pk in updated],
+            'missing': [str(pk) for pk in missing],
+        })
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream every adult, with complaints, drugs and history as names, as a
+        CSV, NDJSON, JSON or Parquet download. Honours the list filters (search,
+        ordering). Parquet needs pyarrow installed.
+        Usage: /api/adults/export/?file_format=csv
+        """
+        file_format = request.query_params.get('file_format', 'csv')
+        
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"file_format must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if file_format == 'parquet' and not parquet_available():
+            return Response({'error': 'Parquet export needs pyarrow installed'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(stream_adults(queryset, file_format), content_type=EXPORT_FORMATS[file_format])
+        response['Content-Disposition'] = f'attachment; filename="adults.{file_format}"'
+        return response
+    
     @action(detail=False, methods=['get'])
     def search(self, request):
         """
@@ -113,7 +283,7 @@ class AdultViewSet(viewsets.ModelViewSet):
         occupation = request.query_params.get('occupation', '')
         gender = request.query_params.get('gender', '')
         
-        queryset = Adult.objects.all()
+        queryset = self.get_queryset()
         
         if name:
             queryset = queryset.filter(name__icontains=name)
@@ -149,7 +319,7 @@ class AdultViewSet(viewsets.ModelViewSet):
         min_age = request.query_params.get('min_age', '')
         max_age = request.query_params.get('max_age', '')
         
-        queryset = Adult.objects.all()
+        queryset = self.get_queryset()
         
         if min_age:
             try:
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark adult listings on the normalised tables against AdultSummary.
+
+Reads the same pages two ways: Adult joined to Patient with its complaints
+prefetched, as the list and autocomplete endpoints used to, and the single
+AdultSummary table. Reports p50/p95 latency per listing.
+
+Usage: python scripts/bench_adult_summary.py --adults 50000 --runs 200
+"""
+
+import argparse
+import random
+
+from bench_utils import OCCUPATIONS, insert_adults, print_table, setup_django, summarize, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--adults", type=int, default=50_000)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+
+    db_name = setup_django()
+    insert_adults(0, args.adults)
+    print(f"Database: {db_name}, {args.adults:,} adults")
+
+    from django.db import connection
+    from patients.models import Adult, AdultSummary
+    from patients.search import get_search_backend
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    size = args.page_size
+    search_fields = ["name", "mobile_number", "occupation"]
+    listings = {
+        "newest first": lambda qs, pk: qs.order_by("-created_at", pk)[:size],
+        "by name": lambda qs, pk: qs.order_by("name", pk)[:size],
+        "female, 30-40": lambda qs, pk: qs.filter(gender="female", age__gte=30, age__lte=40).order_by("-created_at", pk)[:size],
+    }
+
+    rows = []
+    for label, listing in listings.items():
+        for source, run in (
+            ("adult + patient", lambda: list(listing(Adult.objects.prefetch_related("complaints"), "id"))),
+            ("summary", lambda: list(listing(AdultSummary.objects.all(), "pk"))),
+        ):
+            stats = summarize([timed(run)[0] for _ in range(args.runs)])
+            rows.append([label, source, f"{stats['p50']:.2f}", f"{stats['p95']:.2f}", f"{stats['max']:.2f}"])
+
+    queries = [random.choice(OCCUPATIONS)[:random.randint(3, 6)] for _ in range(args.runs)]
+    for source, queryset in (("adult + patient", Adult.objects.prefetch_related("complaints")),
+                             ("summary", AdultSummary.objects.all())):
+        backend = get_search_backend(queryset.model)
+        stats = summarize([timed(backend.search, queryset, query, search_fields, 10)[0] for query in queries])
+        rows.append(["autocomplete", source, f"{stats['p50']:.2f}", f"{stats['p95']:.2f}", f"{stats['max']:.2f}"])
+
+    print()
+    print_table(["listing", "source", "p50 ms", "p95 ms", "max ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
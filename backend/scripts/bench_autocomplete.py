@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark patient autocomplete latency per search backend.
+
+Grows a throwaway database to each size in turn and reports p50/p95 latency
+of name (Patient) and name/phone/occupation (Adult) searches for every
+backend available on it.
+
+Usage: python scripts/bench_autocomplete.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import random
+
+from bench_utils import FIRST_NAMES, OCCUPATIONS, insert_adults, print_table, setup_django, summarize, timed
+
+
+def sample_queries(count):
+    """Keystroke-like queries: name prefixes, inner substrings, phone digits, occupations"""
+    queries = []
+    for _ in range(count):
+        name = random.choice(FIRST_NAMES)
+        kind = random.choice(["prefix", "substring", "phone", "occupation"])
+        if kind == "prefix":
+            queries.append(name[:random.randint(2, len(name))])
+        elif kind == "substring":
+            queries.append(name[1:4])
+        elif kind == "phone":
+            queries.append(str(random.randint(1000, 9999)))
+        else:
+            queries.append(random.choice(OCCUPATIONS)[:4])
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    db_name = setup_django()
+    print(f"Database: {db_name}")
+
+    from django.db import connection
+    from patients.models import Adult, Patient
+    from patients.search import DatabaseSearchBackend, SQLiteFTSSearchBackend
+
+    backends = [DatabaseSearchBackend()]
+    if SQLiteFTSSearchBackend.is_available(connection):
+        backends.append(SQLiteFTSSearchBackend())
+
+    queries = sample_queries(args.queries)
+    adult_queryset = Adult.objects.all()
+    rows = []
+    current = 0
+    for size in sorted(args.sizes):
+        insert_adults(current, size)
+        current = size
+        for backend in backends:
+            backend.rebuild()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        for backend in backends:
+            for label, queryset, fields in (
+                ("patient name", Patient.objects.all(), ["name"]),
+                ("adult name/phone/occupation", adult_queryset, ["name", "mobile_number", "occupation"]),
+            ):
+                samples = [timed(backend.search, queryset, q, fields, args.limit)[0] for q in queries]
+                stats = summarize(samples)
+                rows.append([
+                    f"{size:,}", type(backend).__name__, label,
+                    f"{stats['p50']:.2f}", f"{stats['p95']:.2f}", f"{stats['max']:.2f}",
+                ])
+        print(f"... measured {size:,} patients")
+
+    print()
+    print_table(["patients", "backend", "search", "p50 ms", "p95 ms", "max ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
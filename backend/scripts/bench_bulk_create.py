@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark the bulk adult create endpoint against one POST per adult.
+
+Both paths go through the full Django request stack (test client, JSON
+parsing, validation) against a throwaway database, with every adult carrying
+one complaint and one drug.
+
+Usage: python scripts/bench_bulk_create.py --records 5000
+"""
+
+import argparse
+import json
+import random
+
+from bench_utils import print_table, random_adult_data, setup_django, timed
+
+
+def payloads(start, count, symptoms, drugs):
+    items = []
+    for index in range(start, start + count):
+        data = random_adult_data(index)
+        data["complaints"] = [str(random.choice(symptoms).id)]
+        data["drugs"] = [str(random.choice(drugs).id)]
+        items.append(data)
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=5000)
+    args = parser.parse_args()
+
+    db_name = setup_django()
+    print(f"Database: {db_name}")
+
+    from django.conf import settings
+    from django.test import Client
+    from others.models import ClinicModel, DrugModel, SymptomModel
+    from patients.models import Adult
+
+    # The bulk body of a few thousand adults is larger than Django's 2.5 MB default
+    settings.DATA_UPLOAD_MAX_MEMORY_SIZE = None
+
+    clinic = ClinicModel.objects.create(name="General")
+    symptoms = [SymptomModel.objects.create(name=f"Symptom {i}", clinic=clinic) for i in range(20)]
+    drugs = [DrugModel.objects.create(name=f"Drug {i}") for i in range(20)]
+    client = Client(HTTP_HOST="localhost")
+
+    def single_posts(items):
+        for item in items:
+            response = client.post("/api/patients/adults/", json.dumps(item), content_type="application/json")
+            assert response.status_code == 201, response.content
+
+    def bulk_post(items):
+        response = client.post("/api/patients/adults/bulk/", json.dumps(items), content_type="application/json")
+        assert response.status_code == 201, response.content
+
+    rows = []
+    for label, func, start in (
+        (f"{args.records:,} single POSTs", single_posts, 0),
+        (f"1 bulk POST of {args.records:,}", bulk_post, args.records),
+    ):
+        elapsed, _ = timed(func, payloads(start, args.records, symptoms, drugs))
+        rows.append([label, f"{elapsed:.2f}", f"{args.records / elapsed:,.0f}"])
+
+    assert Adult.objects.count() == 2 * args.records
+    print()
+    print_table(["path", "seconds", "adults/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Measure the bandwidth and latency of a tablet sync with each content coding.
+
+A sync pulls every page of the adult list (following the cursors), every
+vocabulary list and the NDJSON export through the full middleware stack,
+once per coding the client accepts: none, gzip and, when installed, brotli
+and zstd. For each it reports the bytes on the wire and the server and
+decompression time, then estimates the end-to-end time on throttled links
+as server time + decompression + one round trip per request + bytes over
+the link's bandwidth.
+
+Usage: python scripts/bench_compression.py --adults 5000 --page-size 100
+"""
+
+import argparse
+import json
+import time
+import zlib
+
+from bench_utils import insert_adults, print_table, setup_django
+
+# name: (kilobits per second, round trip milliseconds)
+LINKS = {
+    "2G / EDGE": (240, 400),
+    "3G": (1_600, 150),
+    "weak 4G": (4_000, 80),
+}
+
+
+def decompressors():
+    """{content coding: decompress function} of the codings this install can produce"""
+    from common import compression
+
+    codings = {"identity": lambda content: content, "gzip": lambda content: zlib.decompressobj(31).decompress(content)}
+    if compression.brotli is not None:
+        codings["br"] = compression.brotli.decompress
+    if compression.zstandard is not None:
+        codings["zstd"] = lambda content: compression.zstandard.ZstdDecompressor().decompressobj().decompress(content)
+    return codings
+
+
+def sync(client, coding, page_size):
+    """(requests, wire bytes, server seconds, decompression seconds) of one full sync"""
+    headers = {"HTTP_ACCEPT_ENCODING": coding} if coding != "identity" else {}
+    urls = [f"/api/patients/adults/?page_size={page_size}"]
+    urls += [f"/api/{name}/?page_size=100" for name in ("symptoms", "drugs", "medical", "cyanosis", "family-history")]
+    urls.append("/api/patients/adults/export/?file_format=ndjson")
+    decompress = decompressors()
+
+    requests = wire = 0
+    server = client_seconds = 0.0
+    while urls:
+        url = urls.pop(0)
+        started = time.perf_counter()
+        response = client.get(url, **headers)
+        content = b"".join(response.streaming_content) if response.streaming else response.content
+        server += time.perf_counter() - started
+        requests += 1
+        wire += len(content)
+
+        started = time.perf_counter()
+        body = decompress[response.get("Content-Encoding", "identity")](content)
+        client_seconds += time.perf_counter() - started
+        if url.startswith("/api/patients/adults/?"):
+            next_url = json.loads(body)["next"]
+            if next_url:
+                urls.insert(0, next_url.replace("http://localhost", ""))
+    return requests, wire, server, client_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--adults", type=int, default=5_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    db_name = setup_django()
+    insert_adults(0, args.adults)
+    print(f"Database: {db_name}, {args.adults:,} adults")
+
+    from django.test import Client
+
+    client = Client(HTTP_HOST="localhost")
+    results = {}
+    for coding in decompressors():
+        sync(client, coding, args.page_size)  # warm the caches
+        results[coding] = sync(client, coding, args.page_size)
+
+    identity_bytes = results["identity"][1]
+    rows = []
+    for coding, (requests, wire, server, client_seconds) in results.items():
+        row = [coding, requests, f"{wire / 1e6:.2f}", f"{wire / identity_bytes:.0%}", f"{server:.2f}", f"{client_seconds:.2f}"]
+        for kbps, rtt in LINKS.values():
+            row.append(f"{server + client_seconds + requests * rtt / 1000 + wire * 8 / (kbps * 1000):.1f}")
+        rows.append(row)
+
+    print()
+    print_table(["coding", "requests", "wire MB", "of identity", "server s", "decode s", *(f"{name} s" for name in LINKS)], rows)
+
+
+if __name__ == "__main__":
+    main()
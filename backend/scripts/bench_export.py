@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Measure time and peak Python memory of the streaming adult export.
+
+Grows a throwaway database to each size in turn and drains the CSV and
+NDJSON streams, discarding the output: once timed, once under tracemalloc.
+Peak memory should stay flat as the table grows.
+
+Usage: python scripts/bench_export.py --sizes 10000 100000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from bench_utils import insert_adults, print_table, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    db_name = setup_django()
+    print(f"Database: {db_name}")
+
+    from patients.export import stream_adults
+    from patients.models import Adult
+
+    rows = []
+    current = 0
+    for size in sorted(args.sizes):
+        insert_adults(current, size)
+        current = size
+        for file_format in ("csv", "ndjson"):
+            started = time.perf_counter()
+            written = sum(len(part) for part in stream_adults(Adult.objects.all(), file_format))
+            elapsed = time.perf_counter() - started
+
+            # Second pass for memory only, tracemalloc slows it down several times
+            tracemalloc.start()
+            for _ in stream_adults(Adult.objects.all(), file_format):
+                pass
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            rows.append([
+                f"{size:,}", file_format, f"{elapsed:.2f}", f"{written / 1e6:.1f}", f"{peak / 1e6:.1f}",
+            ])
+
+    print()
+    print_table(["adults", "format", "seconds", "output MB", "peak MB"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark the API JSON classes on typical adult payloads.
+
+Renders and parses with DRF's JSONRenderer/JSONParser and with
+common.renderers' ORJSONRenderer/ORJSONParser:
+- a list page of serialized adults (strings, numbers and ID lists),
+- raw export rows holding UUID, datetime and Decimal values,
+- a bulk create request body.
+Then compresses the largest rendered payload with gzip and, when
+installed, brotli. Reports p50/p95 per operation and the sizes.
+
+Usage: python scripts/bench_json_renderers.py --adults 1000 --runs 50
+"""
+
+import argparse
+import io
+from decimal import Decimal
+
+from bench_utils import insert_adults, print_table, random_adult_data, setup_django, summarize, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--adults", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    db_name = setup_django()
+    insert_adults(0, args.adults)
+    print(f"Database: {db_name}, {args.adults:,} adults")
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from common import compression
+    from common.queries import ordered_prefetches
+    from common.renderers import ORJSONParser, ORJSONRenderer, orjson
+    from patients.export import export_fields
+    from patients.models import ADULT_M2M_FIELDS, Adult
+    from patients.serializers import AdultSerializer
+
+    if orjson is None:
+        print("orjson is not installed, ORJSONRenderer falls back to JSONRenderer")
+
+    queryset = Adult.objects.prefetch_related(*ordered_prefetches(Adult, ADULT_M2M_FIELDS)).order_by("-created_at", "id")
+    page = AdultSerializer(queryset[:args.page_size], many=True).data
+    fields = export_fields()
+    rows = [
+        {**{field.name: field.value_from_object(adult) for field in fields}, "dose": Decimal("2.50")}
+        for adult in queryset
+    ]
+    body = JSONRenderer().render([random_adult_data(i) for i in range(args.adults)])
+
+    payloads = {
+        f"list page ({args.page_size})": page,
+        f"export rows ({args.adults:,})": rows,
+    }
+    results = []
+    rendered = {}
+    for label, data in payloads.items():
+        for name, renderer in (("JSONRenderer", JSONRenderer()), ("ORJSONRenderer", ORJSONRenderer())):
+            stats = summarize([timed(renderer.render, data)[0] for _ in range(args.runs)])
+            content = renderer.render(data)
+            rendered[label] = content
+            results.append([f"render {label}", name, f"{stats['p50']:.2f}", f"{stats['p95']:.2f}", f"{len(content):,}"])
+
+    for name, json_parser in (("JSONParser", JSONParser()), ("ORJSONParser", ORJSONParser())):
+        stats = summarize([timed(json_parser.parse, io.BytesIO(body))[0] for _ in range(args.runs)])
+        results.append([f"parse bulk body ({args.adults:,})", name, f"{stats['p50']:.2f}", f"{stats['p95']:.2f}", f"{len(body):,}"])
+
+    label, content = max(rendered.items(), key=lambda item: len(item[1]))
+    for encoding, compress in compression.available_encodings().items():
+        stats = summarize([timed(compress, content)[0] for _ in range(args.runs)])
+        results.append([f"compress {label}", encoding, f"{stats['p50']:.2f}", f"{stats['p95']:.2f}", f"{len(compress(content)):,}"])
+
+    print()
+    print_table(["operation", "with", "p50 ms", "p95 ms", "bytes"], results)
+
+
+if __name__ == "__main__":
+    main()
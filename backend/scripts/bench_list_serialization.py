@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark rows/sec of the adult list serialization: AdultSerializer and
+JSONRenderer against the compiled read path of common.fast.
+
+Reads and encodes the newest adults in batches the size of a list page (or
+larger, for exports-sized reads) three ways: the serializer with the M2M
+fields prefetched, a ReadPlan encoded with orjson, and a ReadPlan encoded
+with DRF's JSONRenderer, i.e. without orjson installed. Each adult gets a
+few complaints so the relation lookups are part of the cost. The outputs
+are checked to be byte-identical before timing.
+
+Usage: python scripts/bench_list_serialization.py --adults 20000 --batches 100 1000
+"""
+
+import argparse
+import random
+from unittest import mock
+
+from bench_utils import insert_adults, print_table, setup_django, summarize, timed
+
+
+def add_complaints(count):
+    """Give every adult one to three of ``count`` symptoms"""
+    from django.db import transaction
+    from others.models import ClinicModel, SymptomModel
+    from patients.models import Adult
+    from patients.summary import rebuild_adult_summaries
+
+    clinic = ClinicModel.objects.create(name="Bench clinic")
+    symptoms = SymptomModel.objects.bulk_create(
+        SymptomModel(name=f"Symptom {i}", clinic=clinic) for i in range(count)
+    )
+    through = Adult.complaints.through
+    with transaction.atomic():
+        through.objects.bulk_create(
+            [
+                through(adult_id=adult_id, symptommodel_id=symptom.pk)
+                for adult_id in Adult.objects.values_list("pk", flat=True)
+                for symptom in random.sample(symptoms, random.randint(1, 3))
+            ],
+            batch_size=5000,
+        )
+    rebuild_adult_summaries()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--adults", type=int, default=20_000)
+    parser.add_argument("--batches", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    db_name = setup_django()
+    insert_adults(0, args.adults)
+    add_complaints(50)
+    print(f"Database: {db_name}, {args.adults:,} adults")
+
+    from rest_framework.renderers import JSONRenderer
+    from common import fast
+    from common.queries import ordered_prefetches
+    from patients.models import ADULT_M2M_FIELDS, Adult
+    from patients.serializers import AdultSerializer
+
+    queryset = Adult.objects.prefetch_related(*ordered_prefetches(Adult, ADULT_M2M_FIELDS)).order_by("-created_at", "id")
+
+    def serializer_path(size):
+        return JSONRenderer().render(AdultSerializer(queryset[:size], many=True).data)
+
+    def fast_path(size):
+        plan = fast.compile_read_plan(AdultSerializer())
+        return fast.dumps(plan.serialize(list(plan.values(queryset)[:size]), queryset.db))
+
+    def fast_path_without_orjson(size):
+        with mock.patch.object(fast, "orjson", None):
+            return fast_path(size)
+
+    paths = {
+        "AdultSerializer + JSONRenderer": serializer_path,
+        "ReadPlan + orjson": fast_path,
+        "ReadPlan + JSONRenderer": fast_path_without_orjson,
+    }
+    if not fast.orjson_available():
+        print("orjson is not installed, both ReadPlan rows use JSONRenderer")
+
+    rows = []
+    for size in args.batches:
+        expected = serializer_path(size)
+        for label, path in paths.items():
+            assert path(size) == expected, f"{label} output differs from AdultSerializer"
+            stats = summarize([timed(path, size)[0] for _ in range(args.runs)])
+            rate = size / (stats["p50"] / 1000)
+            rows.append([f"{size:,}", label, f"{stats['p50']:.1f}", f"{stats['p95']:.1f}", f"{rate:,.0f}"])
+
+    print()
+    print_table(["batch", "path", "p50 ms", "p95 ms", "rows/sec"], rows)
+
+
+if __name__ == "__main__":
+    main()
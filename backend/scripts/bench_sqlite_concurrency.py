@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent intake desks against SQLite per DATABASE_PROFILE.
+
+Each worker process plays one desk: it runs request-like units of work for
+a fixed time, most of them listing recent adults and the rest registering a
+new one, and closes or keeps its connection between them exactly as Django
+does around a request (close_old_connections, honouring CONN_MAX_AGE).
+Reports writes and reads per second and the "database is locked" errors of
+the development and production profiles on the same data.
+
+Usage: python scripts/bench_sqlite_concurrency.py --workers 8 --seconds 10
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+from bench_utils import insert_adults, print_table, random_adult_data, setup_django
+
+
+def desk(profile, db_name, worker, seconds, write_ratio, results):
+    os.environ["DATABASE_PROFILE"] = profile
+    setup_django(db_name, migrate=False)
+
+    from django.db import OperationalError, close_old_connections, transaction
+    from patients.models import Adult
+
+    counts = {"writes": 0, "reads": 0, "locked": 0}
+    index = (worker + 1) * 10_000_000
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        close_old_connections()
+        try:
+            if random.random() < write_ratio:
+                index += 1
+                with transaction.atomic():
+                    Adult.objects.create(**{**random_adult_data(index), "code": f"{profile[:3].upper()}{index}"})
+                counts["writes"] += 1
+            else:
+                list(Adult.objects.order_by("-created_at").values("id", "name", "age")[:20])
+                counts["reads"] += 1
+        except OperationalError as error:
+            if "locked" not in str(error):
+                raise
+            counts["locked"] += 1
+        close_old_connections()
+    results.put(counts)
+
+
+def run(profile, db_name, args):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [
+        context.Process(target=desk, args=(profile, db_name, worker, args.seconds, args.write_ratio, results))
+        for worker in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    totals = {"writes": 0, "reads": 0, "locked": 0}
+    for _ in workers:
+        # A crashed worker never reports, give up instead of waiting forever
+        for key, value in results.get(timeout=args.seconds + 60).items():
+            totals[key] += value
+    for worker in workers:
+        worker.join()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.3)
+    parser.add_argument("--adults", type=int, default=10_000, help="adults inserted before measuring")
+    args = parser.parse_args()
+
+    db_name = setup_django()
+    insert_adults(0, args.adults)
+    print(f"Database: {db_name}")
+
+    rows = []
+    for profile in ("development", "production"):
+        totals = run(profile, db_name, args)
+        rows.append([
+            profile, args.workers,
+            f"{totals['writes'] / args.seconds:.0f}", f"{totals['reads'] / args.seconds:.0f}", totals["locked"],
+        ])
+        print(f"... measured {profile}")
+
+    print()
+    print_table(["profile", "desks", "writes/s", "reads/s", "locked errors"], rows)
+
+
+if __name__ == "__main__":
+    main()
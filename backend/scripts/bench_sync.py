@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Compare a tablet's delta sync with downloading the full lists again.
+
+After a full sync of --adults adults, changes --changed of them, adds as
+many and deletes --deleted, then pulls the changes three ways: every page
+of the adult and vocabulary lists, a full /api/sync/ and a /api/sync/ from
+the first sync's token. Reports requests, response bytes and server time;
+the delta should grow with the changes, not with the table.
+
+Usage: python scripts/bench_sync.py --adults 20000 --changed 200 --deleted 50
+"""
+
+import argparse
+import json
+import time
+
+from bench_utils import insert_adults, print_table, setup_django
+
+
+def fetch_all(client, url, next_of):
+    """(requests, bytes, seconds, last body) following the pages from ``url``"""
+    requests = size = 0
+    seconds = 0.0
+    body = None
+    while url:
+        started = time.perf_counter()
+        response = client.get(url)
+        seconds += time.perf_counter() - started
+        requests += 1
+        size += len(response.content)
+        body = json.loads(response.content)
+        url = next_of(body)
+        if url:
+            url = url.replace("http://localhost", "")
+    return requests, size, seconds, body
+
+
+def full_lists(client, page_size):
+    totals = [0, 0, 0.0]
+    urls = [f"/api/patients/adults/?page_size={page_size}"]
+    urls += [f"/api/{name}/?page_size=100" for name in ("clinics", "symptoms", "drugs", "medical", "cyanosis", "family-history")]
+    for url in urls:
+        requests, size, seconds, _ = fetch_all(client, url, lambda body: body["next"])
+        totals = [totals[0] + requests, totals[1] + size, totals[2] + seconds]
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--adults", type=int, default=20_000)
+    parser.add_argument("--changed", type=int, default=200)
+    parser.add_argument("--deleted", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=500)
+    args = parser.parse_args()
+
+    db_name = setup_django()
+    insert_adults(0, args.adults)
+    print(f"Database: {db_name}, {args.adults:,} adults")
+
+    from django.conf import settings
+    from django.test import Client
+    from common.bulk_delete import bulk_delete
+    from patients.models import Adult
+
+    settings.SYNC_SETTLE_SECONDS = 0
+    client = Client(HTTP_HOST="localhost")
+    sync_url = f"/api/sync/?page_size={args.page_size}"
+    _, _, _, body = fetch_all(client, sync_url, lambda body: body["next"])
+    token = body["token"]
+    time.sleep(0.01)
+
+    pks = list(Adult.objects.order_by("?").values_list("pk", flat=True)[:args.changed + args.deleted])
+    for adult in Adult.objects.filter(pk__in=pks[:args.changed]):
+        adult.occupation = "Changed"
+        adult.save()
+    insert_adults(args.adults, args.adults + args.changed)
+    bulk_delete(Adult, pks[args.changed:])
+
+    rows = []
+    for label, run in (
+        ("full lists", lambda: full_lists(client, min(args.page_size, 100))),
+        ("full sync", lambda: fetch_all(client, sync_url, lambda body: body["next"])[:3]),
+        ("delta sync", lambda: fetch_all(client, f"{sync_url}&since={token}", lambda body: body["next"])[:3]),
+    ):
+        requests, size, seconds = run()
+        rows.append([label, requests, f"{size / 1e6:.2f}", f"{seconds:.2f}"])
+
+    print(f"{args.changed:,} changed, {args.changed:,} added and {args.deleted:,} deleted adults")
+    print()
+    print_table(["download", "requests", "MB", "server s"], rows)
+
+
+if __name__ == "__main__":
+    main()
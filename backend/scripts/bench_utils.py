@@ -0,0 +1,123 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+Benchmarks run against a throwaway SQLite database in a temporary directory,
+never against db.sqlite3.
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+FIRST_NAMES = [
+    "Ahmed", "Mohamed", "Ali", "Omar", "Hassan", "Mahmoud", "Ibrahim", "Youssef",
+    "Fatima", "Aisha", "Khadija", "Zainab", "Mariam", "Amina", "Safiya", "Ruqayya",
+    "Mostafa", "Karim", "Nour", "Hana", "Salma", "Yasmin", "Tarek", "Sherif",
+]
+
+LAST_NAMES = [
+    "Al-Rashid", "Al-Mahmoud", "Al-Hassan", "Al-Omar", "Al-Ahmad", "Al-Ibrahim",
+    "Al-Youssef", "Al-Farouk", "Al-Nasser", "Al-Saad", "Al-Khalil", "Abdelrahman",
+    "Said", "Fawzy", "Mansour", "Shawky", "Ragab", "Naguib", "Salem", "Soliman",
+]
+
+OCCUPATIONS = [
+    "Farmer", "Teacher", "Nurse", "Driver", "Student", "Housewife", "Engineer",
+    "Carpenter", "Merchant", "Retired", "Unemployed", "Doctor", "Accountant",
+]
+
+
+def setup_django(db_name=None, migrate=True):
+    """Configure Django against a fresh SQLite file and migrate it"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bedaya_medical_system.settings")
+
+    import django
+    from django.conf import settings
+
+    if db_name is None:
+        db_name = os.path.join(tempfile.mkdtemp(prefix="bedaya-bench-"), "bench.sqlite3")
+    settings.DATABASES["default"]["NAME"] = db_name
+    settings.DEBUG = False
+    django.setup()
+
+    if migrate:
+        from django.core.management import call_command
+        call_command("migrate", verbosity=0)
+    return db_name
+
+
+def random_adult_data(index):
+    """Field values for one random adult patient"""
+    return {
+        "code": f"BENCH{index:08d}",
+        "house_number": str(random.randint(1, 500)),
+        "name": f"{random.choice(FIRST_NAMES)} {random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}",
+        "gender": random.choice(["male", "female"]),
+        "mobile_number": f"01{random.choice('0125')}{random.randint(10000000, 99999999)}",
+        "age": random.randint(18, 90),
+        "occupation": random.choice(OCCUPATIONS),
+    }
+
+
+def insert_adults(start, stop, batch_size=5000):
+    """
+    Insert adults [start, stop) quickly, bypassing signals. Patient rows go
+    through bulk_create, adult rows through a raw executemany because Django
+    cannot bulk_create multi-table inherited models; the adult summaries are
+    refreshed per batch as patients.bulk does.
+    """
+    import uuid
+
+    from django.db import connection, transaction
+    from patients.models import Adult, Patient
+    from patients.summary import refresh_adult_summaries
+
+    adult_fields = Adult._meta.local_concrete_fields
+    columns = ", ".join(connection.ops.quote_name(f.column) for f in adult_fields)
+    placeholders = ", ".join(["%s"] * len(adult_fields))
+    sql = f"INSERT INTO {Adult._meta.db_table} ({columns}) VALUES ({placeholders})"
+
+    for offset in range(start, stop, batch_size):
+        adults = [Adult(**random_adult_data(i)) for i in range(offset, min(offset + batch_size, stop))]
+        for adult in adults:
+            adult.id = adult.patient_ptr_id = uuid.uuid4()
+            adult.set_mobile_digits()
+        with transaction.atomic():
+            Patient.objects.bulk_create([
+                Patient(**{f.attname: getattr(adult, f.attname) for f in Patient._meta.concrete_fields})
+                for adult in adults
+            ])
+            rows = [[f.get_db_prep_save(getattr(adult, f.attname), connection) for f in adult_fields]
+                    for adult in adults]
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+            refresh_adult_summaries([adult.pk for adult in adults])
+
+
+def timed(func, *args, **kwargs):
+    """Run func once and return (elapsed seconds, result)"""
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def summarize(samples):
+    """p50 / p95 / max of a list of durations in milliseconds"""
+    samples = sorted(s * 1000 for s in samples)
+    p95 = statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+    return {"p50": statistics.median(samples), "p95": p95, "max": samples[-1]}
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark vocabulary autocomplete: database icontains against the in-memory index.
+
+Fills the drug vocabulary of a throwaway database with generated Latin and
+Arabic names and reports p50/p95 latency of the old name__icontains query
+and of the VocabularyIndex that now answers the autocomplete endpoints.
+
+Usage: python scripts/bench_vocabulary_autocomplete.py --sizes 1000 10000
+"""
+
+import argparse
+import random
+
+from bench_utils import print_table, setup_django, summarize, timed
+
+LATIN_SYLLABLES = ["pa", "ra", "ce", "ta", "mol", "ibu", "pro", "fen", "amo", "xi", "cil", "lin", "met", "for"]
+ARABIC_SYLLABLES = ["با", "را", "سي", "تا", "مول", "إيبو", "برو", "فين", "أمو", "كسي", "سيل", "لين"]
+
+
+def drug_name(index):
+    syllables = ARABIC_SYLLABLES if index % 4 == 0 else LATIN_SYLLABLES
+    name = "".join(random.choice(syllables) for _ in range(random.randint(2, 4)))
+    return f"{name.capitalize()} {random.choice([100, 250, 500])} mg #{index}"
+
+
+def sample_queries(count):
+    """Keystroke-like prefixes and inner substrings of generated names"""
+    queries = []
+    for _ in range(count):
+        name = drug_name(0 if random.random() < 0.25 else 1).split()[0]
+        start = 0 if random.random() < 0.7 else random.randint(1, max(1, len(name) - 3))
+        queries.append(name[start:start + random.randint(1, 5)])
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    db_name = setup_django()
+    print(f"Database: {db_name}")
+
+    from others.cache import get_vocabulary
+    from others.models import DrugModel
+
+    queries = sample_queries(args.queries)
+    vocabulary = get_vocabulary(DrugModel)
+    rows = []
+    current = 0
+    for size in sorted(args.sizes):
+        DrugModel.objects.bulk_create(DrugModel(name=drug_name(i)) for i in range(current, size))
+        current = size
+        vocabulary.invalidate()
+        build_seconds, _ = timed(vocabulary.entries)
+
+        def database(query):
+            return list(DrugModel.objects.filter(name__icontains=query).values("id", "name")[:args.limit])
+
+        for label, search in (
+            ("database icontains", database),
+            ("in-memory index", lambda query: vocabulary.search(query, args.limit)),
+        ):
+            stats = summarize([timed(search, query)[0] for query in queries])
+            rows.append([
+                f"{size:,}", label,
+                f"{stats['p50'] * 1000:.1f}", f"{stats['p95'] * 1000:.1f}", f"{stats['max'] * 1000:.1f}",
+            ])
+        print(f"... measured {size:,} drugs, index built in {build_seconds * 1000:.0f} ms")
+
+    print()
+    print_table(["drugs", "search", "p50 us", "p95 us", "max us"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Run the test suite against a throwaway PostgreSQL cluster.
+
+Creates a cluster with initdb in a temporary directory, starts it on a free
+localhost port, runs pytest with DATABASE_URL pointing at it, then stops the
+cluster and deletes it. Needs the PostgreSQL server binaries (initdb,
+pg_ctl) on PATH or under `pg_config --bindir`; extra arguments go to pytest.
+
+Usage: python scripts/run_tests_postgres.py -q tests
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def find_binary(name):
+    path = shutil.which(name)
+    if path:
+        return path
+    try:
+        bindir = subprocess.run(["pg_config", "--bindir"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        bindir = ""
+    candidate = os.path.join(bindir, name)
+    if bindir and os.path.exists(candidate):
+        return candidate
+    sys.exit(f"{name} not found; install the PostgreSQL server binaries")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    initdb, pg_ctl = find_binary("initdb"), find_binary("pg_ctl")
+    directory = tempfile.mkdtemp(prefix="bedaya-pg-")
+    data_dir = os.path.join(directory, "data")
+    port = free_port()
+
+    subprocess.run(
+        [initdb, "-D", data_dir, "-U", "postgres", "--auth=trust", "-E", "UTF8", "--no-sync"],
+        check=True, stdout=subprocess.DEVNULL,
+    )
+    subprocess.run(
+        [pg_ctl, "-D", data_dir, "-l", os.path.join(directory, "server.log"), "-w", "start",
+         "-o", f"-p {port} -k {directory} -c listen_addresses=127.0.0.1 -c fsync=off"],
+        check=True, stdout=subprocess.DEVNULL,
+    )
+    try:
+        env = {**os.environ, "DATABASE_URL": f"postgres://postgres@127.0.0.1:{port}/bedaya"}
+        args = sys.argv[1:] or ["-q", "tests"]
+        result = subprocess.run([sys.executable, "-m", "pytest", *args], cwd=BACKEND_DIR, env=env)
+    finally:
+        subprocess.run([pg_ctl, "-D", data_dir, "-m", "fast", "-w", "stop"], stdout=subprocess.DEVNULL)
+        shutil.rmtree(directory, ignore_errors=True)
+    sys.exit(result.returncode)
+
+
+if __name__ == "__main__":
+    main()
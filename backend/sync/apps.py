@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class SyncConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "sync"
+
+    def ready(self):
+        from common.bulk_delete import chunk_contexts
+        from . import signals  # noqa: F401
+        from .tombstones import collect_tombstones
+
+        # Bulk deletes write a chunk's tombstones with one bulk_create
+        chunk_contexts.append(collect_tombstones)
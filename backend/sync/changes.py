@@ -0,0 +1,254 @@
+"""
+Delta reads behind GET /api/sync/.
+
+A sync token is a point in time. A sync from token T returns, stream by
+stream (see sync.streams), the rows created or updated after T, read in
+(updated, pk) order from the updated_at / updated_on indexes, followed by
+the primary keys in the tombstones recorded after T. A sync without a token
+returns every row, in primary key order, and no deletions. Either way the
+new token is the sync's upper bound, so the next sync picks up where this
+one stopped and its traffic grows with the changes, not with the tables.
+
+Timestamps are taken when a row is saved, not when its transaction
+commits, so the upper bound stays ``SYNC_SETTLE_SECONDS`` behind the clock:
+a write still in flight during a sync lands after its token and is sent
+next time. Tokens never go backwards, even when the clock does.
+
+One sync is read in pages of at most ``page_size`` rows and tombstones.
+Each page ends with a SyncCursor for the next one, which keeps the sync's
+bounds, so rows changed while the tablet pages through are sent by the next
+sync rather than shuffled into this one.
+"""
+import base64
+import json
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from urllib import parse
+
+from django.conf import settings
+from django.db import router
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+
+from common.fast import FloatOutOfRange, compile_read_plan
+
+from .models import Tombstone
+from .streams import STREAMS
+from .tombstones import tombstone_horizon
+
+# Phases of a stream within a sync
+ROWS = 0
+DELETES = 1
+
+# ``since`` and ``until`` bound the sync; ``index`` and ``phase`` locate the
+# next page and ``after`` holds the ordering values of the last row read
+SyncCursor = namedtuple('SyncCursor', ['since', 'until', 'index', 'phase', 'after'])
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Sync token older than the deletions on record, sync again without since.'
+    default_code = 'sync_token_expired'
+
+
+def _encode(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+
+def _decode(token):
+    return json.loads(base64.urlsafe_b64decode(parse.unquote(token).encode()))
+
+
+def _parse_time(value):
+    if value is None:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None or timezone.is_naive(parsed):
+        raise ValueError(value)
+    return parsed
+
+
+def _to_primitive(value):
+    # Full microsecond precision, the seek predicate compares exact values
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def encode_token(when):
+    return _encode({'t': when.isoformat()})
+
+
+def decode_token(token):
+    try:
+        return _parse_time(_decode(token)['t'])
+    except (TypeError, ValueError, KeyError):
+        raise ValidationError({'since': ['Invalid sync token.']})
+
+
+def encode_cursor(cursor):
+    return _encode({
+        's': cursor.since and cursor.since.isoformat(),
+        'u': cursor.until.isoformat(),
+        'i': cursor.index,
+        'p': cursor.phase,
+        'v': cursor.after and [_to_primitive(value) for value in cursor.after],
+    })
+
+
+def decode_cursor(token):
+    try:
+        payload = _decode(token)
+        cursor = SyncCursor(
+            _parse_time(payload['s']), _parse_time(payload['u']), payload['i'], payload['p'], payload['v'],
+        )
+    except (TypeError, ValueError, KeyError):
+        raise NotFound('Invalid cursor')
+    if not (isinstance(cursor.index, int) and 0 <= cursor.index < len(STREAMS)) or cursor.phase not in (ROWS, DELETES):
+        raise NotFound('Invalid cursor')
+    if cursor.until is None or cursor.after is not None and not isinstance(cursor.after, list):
+        raise NotFound('Invalid cursor')
+    return cursor
+
+
+def start_cursor(since):
+    """Cursor of the first page of a sync from ``since``, None for a full sync"""
+    until = timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    if since is None:
+        return SyncCursor(None, until, 0, ROWS, None)
+    if since < tombstone_horizon():
+        raise SyncTokenExpired()
+    return SyncCursor(since, max(since, until), 0, ROWS, None)
+
+
+def seek_predicate(ordering, values):
+    """(a > x) OR (a = x AND b > y) for ascending ``ordering``"""
+    if len(values) != len(ordering):
+        raise NotFound('Invalid cursor')
+    predicate = Q()
+    for index, field in enumerate(ordering):
+        clause = Q(**{f'{field}__gt': values[index]})
+        for previous, value in zip(ordering[:index], values):
+            clause &= Q(**{previous: value})
+        predicate |= clause
+    return predicate
+
+
+def read_rows(stream, cursor, limit, using):
+    """
+    (created, updated, ordering values of the last row, more) for the next
+    ``limit`` changed rows of ``stream``, serialized
+    """
+    updated_field, created_field = stream.updated_field, stream.created_field
+    queryset = stream.model._default_manager.using(using)
+    for model in stream.excluded:
+        queryset = queryset.exclude(pk__in=model._default_manager.using(using).values('pk'))
+    if cursor.since is None:
+        ordering = ['pk']
+    else:
+        queryset = queryset.filter(**{f'{updated_field}__gt': cursor.since, f'{updated_field}__lte': cursor.until})
+        ordering = [updated_field, 'pk']
+    if cursor.after is not None:
+        queryset = queryset.filter(seek_predicate(ordering, cursor.after))
+    queryset = queryset.order_by(*ordering)
+
+    data = None
+    plan = compile_read_plan(stream.serializer_class())
+    if plan is not None:
+        rows = list(plan.values(queryset, extra_columns=[updated_field, created_field])[:limit + 1])
+        keys = [(row['pk'], row[updated_field], row[created_field]) for row in rows[:limit]]
+        try:
+            data = plan.serialize(rows[:limit], using)
+        except FloatOutOfRange:
+            pass
+    else:
+        rows = list(queryset.values_list('pk', updated_field, created_field)[:limit + 1])
+        keys = rows[:limit]
+    if data is None:
+        pks = [pk for pk, _, _ in keys]
+        instances = queryset.select_related(*stream.select_related).prefetch_related(*stream.prefetch).in_bulk(pks)
+        data = stream.serializer_class([instances[pk] for pk in pks if pk in instances], many=True).data
+
+    created, updated = [], []
+    for (pk, updated_at, created_at), item in zip(keys, data):
+        is_new = cursor.since is None or created_at is not None and created_at > cursor.since
+        (created if is_new else updated).append(item)
+    last = None
+    if keys:
+        pk, updated_at, _ = keys[-1]
+        last = [pk] if cursor.since is None else [updated_at, pk]
+    return created, updated, last, len(rows) > limit
+
+
+def read_deletes(stream, cursor, limit, using):
+    """
+    (deleted primary keys, ordering values of the last tombstone, tombstones
+    read, more) for the next ``limit`` tombstones of ``stream``
+    """
+    model = stream.model
+    queryset = Tombstone.objects.using(using).filter(
+        model=model._meta.label_lower, deleted_at__gt=cursor.since, deleted_at__lte=cursor.until,
+    )
+    if stream.excluded:
+        queryset = queryset.exclude(object_id__in=Tombstone.objects.using(using).filter(
+            model__in=[excluded._meta.label_lower for excluded in stream.excluded],
+        ).values('object_id'))
+    if cursor.after is not None:
+        queryset = queryset.filter(seek_predicate(['deleted_at', 'id'], cursor.after))
+    rows = list(queryset.order_by('deleted_at', 'id').values_list('deleted_at', 'id', 'object_id')[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    pk_field = model._meta.pk
+    pks = list(dict.fromkeys(pk_field.to_python(object_id) for _, _, object_id in rows))
+    # A primary key deleted and then used again (clinic IDs) is a live row, sent with the changes
+    alive = set(model._default_manager.using(using).filter(pk__in=pks).values_list('pk', flat=True)) if pks else set()
+    deleted = [pk for pk in pks if pk not in alive]
+    last = list(rows[-1][:2]) if rows else None
+    return deleted, last, len(rows), more
+
+
+def read_page(cursor, page_size):
+    """
+    ({stream name: {'created': [...], 'updated': [...], 'deleted': [...]}},
+    cursor of the next page or None) for the page at ``cursor``; streams
+    without changes on the page are left out
+    """
+    changes = {}
+    remaining = page_size
+    index, phase, after = cursor.index, cursor.phase, cursor.after
+    while index < len(STREAMS):
+        position = cursor._replace(index=index, phase=phase, after=after)
+        if not remaining:
+            return changes, position
+
+        stream = STREAMS[index]
+        using = router.db_for_read(stream.model)
+        if phase == ROWS:
+            created, updated, last, more = read_rows(stream, position, remaining, using)
+            read = len(created) + len(updated)
+            deleted = []
+        else:
+            deleted, last, read, more = read_deletes(stream, position, remaining, using)
+            created = updated = []
+        if created or updated or deleted:
+            entry = changes.setdefault(stream.name, {'created': [], 'updated': [], 'deleted': []})
+            entry['created'] += created
+            entry['updated'] += updated
+            entry['deleted'] += deleted
+        if more:
+            return changes, position._replace(after=last)
+
+        remaining -= read
+        after = None
+        if phase == ROWS and cursor.since is not None:
+            phase = DELETES
+        else:
+            index, phase = index + 1, ROWS
+    return changes, None
@@ -0,0 +1,20 @@
+"""
+Delete the tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS. Tablets that
+last synced before then get 410 Gone and download everything again.
+
+Usage: python manage.py purge_tombstones
+"""
+from django.core.management.base import BaseCommand
+
+from sync.tombstones import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete the sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=None, help='Database alias to purge')
+
+    def handle(self, *args, **options):
+        deleted = purge_tombstones(using=options['database'])
+        self.stdout.write(f'Deleted {deleted} tombstones')
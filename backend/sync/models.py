@@ -0,0 +1,19 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Tombstone(models.Model):
+    """Primary key of a deleted row of a synced model, see sync.tombstones"""
+    # Model._meta.label_lower of the deleted row, e.g. 'patients.adult'
+    model = models.CharField(max_length=100)
+    object_id = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # The sync endpoint reads one model's tombstones in (deleted_at, id) order
+        indexes = [
+            models.Index(fields=['model', 'deleted_at', 'id'], name='tombstone_model_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id}"
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete
+
+from .streams import STREAMS
+from .tombstones import record_tombstone
+
+
+def row_deleted(sender, instance, using, **kwargs):
+    """Record a tombstone for a deleted row of a synced model"""
+    record_tombstone(instance, using)
+
+
+# Deleting an Adult sends post_delete for its Patient row as well, so both
+# streams hear about it. Receivers are connected per model, never for all
+# senders, see patients.signals
+for stream in STREAMS:
+    post_delete.connect(row_deleted, sender=stream.model, dispatch_uid=f'sync_tombstone_{stream.model.__name__}')
@@ -0,0 +1,37 @@
+"""
+The tables a sync covers, in the order it reads them: the vocabularies come
+first, so the adults on later pages only refer to rows the tablet already
+has.
+"""
+from collections import namedtuple
+
+from common.queries import ordered_prefetches
+from others.models import ClinicModel, CyanosisModel, DrugModel, FamilyHistoryModel, MedicalModel, SymptomModel
+from others.serializers import (
+    ClinicSerializer, CyanosisSerializer, DrugSerializer, FamilyHistorySerializer, MedicalSerializer, SymptomSerializer,
+)
+from patients.models import ADULT_M2M_FIELDS, Adult, Patient
+from patients.serializers import AdultSerializer, PatientSerializer
+
+# ``name`` keys the stream in sync responses. ``select_related`` and
+# ``prefetch`` are only used when the serializer cannot be read through a
+# common.fast ReadPlan. Rows (and tombstones) of the ``excluded`` child
+# models are left to their own streams.
+SyncStream = namedtuple(
+    'SyncStream',
+    ['name', 'model', 'serializer_class', 'updated_field', 'created_field', 'select_related', 'prefetch', 'excluded'],
+    defaults=[()],
+)
+
+STREAMS = [
+    SyncStream('clinics', ClinicModel, ClinicSerializer, 'updated_on', 'created_on', (), ()),
+    SyncStream('symptoms', SymptomModel, SymptomSerializer, 'updated_on', 'created_on', ('clinic',), ()),
+    SyncStream('drugs', DrugModel, DrugSerializer, 'updated_on', 'created_on', (), ()),
+    SyncStream('medical', MedicalModel, MedicalSerializer, 'updated_on', 'created_on', (), ()),
+    SyncStream('cyanosis', CyanosisModel, CyanosisSerializer, 'updated_on', 'created_on', (), ()),
+    SyncStream('family_history', FamilyHistoryModel, FamilyHistorySerializer, 'updated_on', 'created_on', (), ()),
+    # Adults have a Patient row too, sent once with the adults stream
+    SyncStream('patients', Patient, PatientSerializer, 'updated_at', 'created_at', (), (), (Adult,)),
+    SyncStream('adults', Adult, AdultSerializer, 'updated_at', 'created_at', (),
+               tuple(ordered_prefetches(Adult, ADULT_M2M_FIELDS))),
+]
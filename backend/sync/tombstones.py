@@ -0,0 +1,63 @@
+"""
+Tombstones: the primary keys of deleted rows, kept so that a sync can tell
+the tablets which rows to drop.
+
+The post_delete receivers in sync.signals record one for every deleted row
+of a synced model, in the deleting transaction. Inside collect_tombstones()
+they are buffered instead and written with one bulk_create when the block
+ends; common.bulk_delete enters it around every chunk (see SyncConfig).
+"""
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Tombstone
+
+# Tombstones per INSERT when a collected block is written
+TOMBSTONE_BATCH_SIZE = 500
+
+_collecting = threading.local()
+
+
+def record_tombstone(instance, using):
+    tombstone = Tombstone(model=instance._meta.label_lower, object_id=str(instance.pk), deleted_at=timezone.now())
+    pending = getattr(_collecting, 'tombstones', None)
+    if pending is not None:
+        pending.append(tombstone)
+    else:
+        tombstone.save(using=using)
+
+
+@contextmanager
+def collect_tombstones(using):
+    """
+    Buffer the tombstones of the deletions in the block and bulk_create them
+    on ``using`` at its end; call it inside the deleting transaction so that
+    they commit with the deletions. Nested blocks write with the outer one.
+    """
+    if getattr(_collecting, 'tombstones', None) is not None:
+        yield
+        return
+
+    _collecting.tombstones = []
+    try:
+        yield
+        pending = _collecting.tombstones
+    finally:
+        _collecting.tombstones = None
+    Tombstone.objects.using(using).bulk_create(pending, batch_size=TOMBSTONE_BATCH_SIZE)
+
+
+def tombstone_horizon():
+    """Oldest deletion still on record; syncs from before it must start over"""
+    return timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def purge_tombstones(using=None):
+    """Delete the tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS, return how many"""
+    queryset = Tombstone.objects.using(using) if using else Tombstone.objects
+    deleted, _ = queryset.filter(deleted_at__lt=tombstone_horizon()).delete()
+    return deleted
@@ -0,0 +1,44 @@
+from django.conf import settings
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .changes import decode_cursor, decode_token, encode_cursor, encode_token, read_page, start_cursor
+
+
+def get_page_size(request):
+    """?page_size= when it is within SYNC_MAX_PAGE_SIZE, SYNC_PAGE_SIZE otherwise"""
+    try:
+        page_size = int(request.query_params.get('page_size', settings.SYNC_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return settings.SYNC_PAGE_SIZE
+    if 0 < page_size <= settings.SYNC_MAX_PAGE_SIZE:
+        return page_size
+    return settings.SYNC_PAGE_SIZE
+
+
+@api_view(['GET'])
+def sync(request):
+    """
+    Patients, adults and vocabularies created, updated or deleted since a
+    sync token, see sync.changes. Follow "next" until it is null, then keep
+    "token" for the next sync; without since every row is sent.
+    Usage: /api/sync/?since=<token>&page_size=500
+    """
+    cursor_token = request.query_params.get('cursor')
+    if cursor_token:
+        cursor = decode_cursor(cursor_token)
+    else:
+        since = request.query_params.get('since')
+        cursor = start_cursor(decode_token(since) if since else None)
+
+    changes, next_cursor = read_page(cursor, get_page_size(request))
+    next_link = None
+    if next_cursor is not None:
+        url = remove_query_param(request.build_absolute_uri(), 'since')
+        next_link = replace_query_param(url, 'cursor', encode_cursor(next_cursor))
+    return Response({
+        'changes': changes,
+        'next': next_link,
+        'token': encode_token(cursor.until) if next_cursor is None else None,
+    })
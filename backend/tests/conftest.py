@@ -9,6 +9,8 @@ from django.test.utils import get_runner
 
 # Set up Django settings for testing
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bedaya_medical_system.settings')
+# Run Celery tasks in the test process, without a broker
+os.environ.setdefault('CELERY_TASK_ALWAYS_EAGER', 'True')
 django.setup()
 
 
@@ -21,6 +23,22 @@ def django_db_setup(django_db_setup, django_db_blocker):
         execute_from_command_line(['manage.py', 'migrate', '--run-syncdb'])
 
 
+@pytest.fixture(autouse=True)
+def clear_vocabulary_cache():
+    """Rolled back test transactions never invalidate the cached vocabularies"""
+    from others.cache import clear_vocabularies
+    clear_vocabularies()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """Start every test with an empty response cache and zeroed counters"""
+    from common.response_cache import response_cache
+    response_cache.clear()
+    yield
+
+
 @pytest.fixture
 def sample_patient_data():
     """Sample patient data for testing"""
@@ -0,0 +1,115 @@
+"""
+Integration tests for the response compression middleware
+"""
+import gzip
+import json
+import zlib
+from functools import partial
+from unittest import mock, skipUnless
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from others.models import DrugModel
+from common import compression
+from common.response_cache import response_cache
+from patients.export import stream_adults
+from patients.models import Adult
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024, COMPRESSION_ENCODINGS=['br', 'zstd', 'gzip'])
+class CompressionMiddlewareTest(APITestCase):
+    """Test cases for CompressionMiddleware"""
+
+    def setUp(self):
+        """Set up enough adults and drugs for bodies over the threshold"""
+        for i in range(30):
+            Adult.objects.create(code=f'GZ{i:03d}', name=f'Compressed {i}', mobile_number='01012345678', age=20 + i)
+            DrugModel.objects.create(name=f'Drug number {i}')
+        self.url = reverse('adults-list')
+
+    def test_gzip_list(self):
+        """Test that a large list is gzipped for a gzip-only client"""
+        identity = self.client.get(self.url)
+        self.assertFalse(identity.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', identity['Vary'])
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(identity.content) / 3)
+        self.assertEqual(gzip.decompress(response.content), identity.content)
+
+    def test_small_and_unaccepted_bodies(self):
+        """Test that small bodies and clients without a supported coding get identity"""
+        response = self.client.get(self.url, {'page_size': 1, 'fields': 'id'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='deflate, gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_export(self):
+        """Test that a streamed export is compressed chunk by chunk"""
+        url = reverse('adults-export')
+        identity = b''.join(self.client.get(url, {'file_format': 'ndjson'}).streaming_content)
+
+        with mock.patch('patients.views.stream_adults', partial(stream_adults, chunk_size=10)):
+            response = self.client.get(url, {'file_format': 'ndjson'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 2)
+
+        # Every chunk is flushed: the stream decodes as it arrives
+        decompressor = zlib.decompressobj(31)
+        decoded = b''
+        for chunk in chunks[:-1]:
+            decoded += decompressor.decompress(chunk)
+            self.assertTrue(decoded.endswith(b'\n'))
+        decoded += decompressor.decompress(chunks[-1]) + decompressor.flush()
+        self.assertEqual(decoded, identity)
+
+    def test_vocabulary_compressed_bytes_are_cached(self):
+        """Test that the cached vocabulary list keeps its compressed body"""
+        url = reverse('drugs-list')
+        first = self.client.get(url, {'page_size': 30}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertTrue(first['ETag'].startswith('W/"'))
+        key = first['ETag'][2:]
+        self.assertEqual(response_cache.get(key, variant='gzip'), first.content)
+
+        with mock.patch('common.middleware.compress') as compress:
+            second = self.client.get(url, {'page_size': 30}, HTTP_ACCEPT_ENCODING='gzip')
+        compress.assert_not_called()
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(json.loads(gzip.decompress(second.content))['results']), 30)
+
+        response = self.client.get(url, {'page_size': 30}, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_preference_order(self):
+        """Test that the client's q values and then COMPRESSION_ENCODINGS pick the coding"""
+        with mock.patch.object(compression, 'brotli', mock.Mock()), mock.patch.object(compression, 'zstandard', mock.Mock()):
+            self.assertEqual(compression.choose_encoding('gzip, zstd, br'), 'br')
+            self.assertEqual(compression.choose_encoding('gzip, zstd;q=0.9, br;q=0.5'), 'gzip')
+            with override_settings(COMPRESSION_ENCODINGS=['zstd', 'gzip']):
+                self.assertEqual(compression.choose_encoding('gzip, zstd, br'), 'zstd')
+        with mock.patch.object(compression, 'brotli', None), mock.patch.object(compression, 'zstandard', None):
+            self.assertEqual(compression.choose_encoding('br, zstd, gzip'), 'gzip')
+
+    @skipUnless(compression.brotli is not None, 'brotli is not installed')
+    def test_brotli(self):
+        """Test that brotli clients get brotli"""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.content), self.client.get(self.url).content)
+
+    @skipUnless(compression.zstandard is not None, 'zstandard is not installed')
+    def test_zstd(self):
+        """Test that zstd clients get zstd"""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='zstd')
+        self.assertEqual(response['Content-Encoding'], 'zstd')
+        decompressor = compression.zstandard.ZstdDecompressor()
+        self.assertEqual(decompressor.decompressobj().decompress(response.content), self.client.get(self.url).content)
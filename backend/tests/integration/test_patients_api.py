@@ -1,7 +1,11 @@
 """
 Integration tests for Patient and Adult API endpoints
 """
-from django.test import TestCase
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
@@ -208,3 +212,837 @@ class AdultAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['occupation'], 'Doctor')
+
+    
+    def test_adult_autocomplete(self):
+        """Test autocomplete ranks an exact phone match first"""
+        Adult.objects.create(**self.adult_data)
+        Adult.objects.create(**{
+            **self.adult_data,
+            'code': 'ADULT002',
+            'name': 'Engineer Ahmed',
+            'mobile_number': '01111111111'
+        })
+        
+        url = reverse('adults-autocomplete')
+        response = self.client.get(url, {'search': '09876543210'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([a['name'] for a in response.data], ['Adult API'])
+        
+        response = self.client.get(url, {'search': 'engineer', 'limit': 1})
+        self.assertEqual([a['name'] for a in response.data], ['Engineer Ahmed'])
+
+class AdultQueryCountTest(APITestCase):
+    """Query count of Adult read endpoints must not grow with the row count"""
+    
+    def setUp(self):
+        """Set up vocabulary rows shared by every adult"""
+        from others.models import (
+            ClinicModel, SymptomModel, CyanosisModel, MedicalModel, DrugModel, FamilyHistoryModel
+        )
+        clinic = ClinicModel.objects.create(name='General')
+        self.relations = {
+            'complaints': [SymptomModel.objects.create(name=f'Symptom {i}', clinic=clinic) for i in range(2)],
+            'cyanosis': [CyanosisModel.objects.create(name='Central')],
+            'medical': [MedicalModel.objects.create(name='Hypertension')],
+            'drugs': [DrugModel.objects.create(name='Aspirin')],
+            'family_history': [FamilyHistoryModel.objects.create(name='Diabetes')],
+        }
+        self.created = 0
+    
+    def create_adults(self, count):
+        """Create adults with every many-to-many relation filled in"""
+        for _ in range(count):
+            self.created += 1
+            adult = Adult.objects.create(
+                code=f'QC{self.created:04d}',
+                name=f'Adult {self.created}',
+                mobile_number='01234567890',
+                age=30,
+                occupation='Farmer',
+            )
+            for field_name, instances in self.relations.items():
+                getattr(adult, field_name).set(instances)
+    
+    def count_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+    
+    def test_list_query_count_is_constant(self):
+        """Listing adults runs the same number of queries for 2 or 12 rows"""
+        url = reverse('adults-list')
+        self.create_adults(2)
+        small = self.count_queries(url)
+        self.create_adults(10)
+        large = self.count_queries(url)
+        self.assertEqual(small, large)
+    
+    def test_search_and_age_range_query_count_is_constant(self):
+        """search and by_age_range prefetch the relations as well"""
+        for name, params in (('adults-search', {'occupation': 'Farmer'}),
+                             ('adults-by-age-range', {'min_age': 18, 'max_age': 65})):
+            self.create_adults(2)
+            small = self.count_queries(reverse(name), params)
+            self.create_adults(10)
+            large = self.count_queries(reverse(name), params)
+            self.assertEqual(small, large, name)
+    
+    def test_retrieve_loads_all_relations(self):
+        """Retrieving one adult costs the two ETag lookups, one query and one per relation"""
+        self.create_adults(1)
+        adult = Adult.objects.get()
+        url = reverse('adults-detail', kwargs={'pk': adult.pk})
+        with self.assertNumQueries(3 + len(self.relations)):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['complaints']), 2)
+        self.assertEqual(len(response.data['drugs']), 1)
+
+
+class KeysetPaginationTest(APITestCase):
+    """Integration tests for keyset pagination of patient listings"""
+    
+    def setUp(self):
+        """Create patients, several of them sharing one created_at value"""
+        for i in range(25):
+            Patient.objects.create(code=f'KS{i:03d}', name=f'Patient {i}', mobile_number='01234567890')
+        # Ties on created_at must be broken by id without skipping rows
+        Patient.objects.filter(code__in=['KS005', 'KS006', 'KS007']).update(
+            created_at=Patient.objects.get(code='KS005').created_at
+        )
+        self.url = reverse('patients-list')
+    
+    def walk(self, url, params=None):
+        """Follow next links and return every page"""
+        pages = []
+        response = self.client.get(url, params or {})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data)
+            if not response.data['next']:
+                return pages
+            response = self.client.get(response.data['next'])
+    
+    def test_pages_cover_every_row_in_order(self):
+        """Test that walking the cursor returns each patient once, newest first"""
+        pages = self.walk(self.url, {'page_size': 10})
+        ids = [row['id'] for page in pages for row in page['results']]
+        
+        self.assertEqual([len(page['results']) for page in pages], [10, 10, 5])
+        expected = Patient.objects.order_by('-created_at', 'id').values_list('id', flat=True)
+        self.assertEqual(ids, [str(pk) for pk in expected])
+        self.assertFalse(pages[0]['has_previous'])
+        self.assertFalse(pages[-1]['has_next'])
+    
+    def test_previous_link_returns_the_earlier_page(self):
+        """Test that the previous cursor seeks backwards"""
+        first = self.client.get(self.url, {'page_size': 10}).data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        
+        self.assertEqual(back['results'], first['results'])
+        self.assertTrue(second['has_previous'])
+    
+    def test_deep_pages_use_a_seek_predicate(self):
+        """Test that no page is fetched with OFFSET"""
+        first = self.client.get(self.url, {'page_size': 10}).data
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(first['next'])
+        self.assertNotIn('OFFSET', context.captured_queries[-1]['sql'].upper())
+    
+    def test_client_ordering_is_honoured(self):
+        """Test that ?ordering= changes the keyset ordering"""
+        pages = self.walk(self.url, {'page_size': 7, 'ordering': 'name'})
+        names = [row['name'] for page in pages for row in page['results']]
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(len(names), 25)
+    
+    def test_invalid_cursor(self):
+        """Test that a tampered cursor is rejected"""
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_adult_search_is_paginated(self):
+        """Test that the search action pages the same way"""
+        for i in range(3):
+            Adult.objects.create(code=f'KSA{i}', name=f'Adult {i}', mobile_number='01234567890', occupation='Nurse')
+        response = self.client.get(reverse('adults-search'), {'occupation': 'Nurse', 'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertTrue(response.data['has_next'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+    
+    def test_unpaginated_without_pagination_parameters(self):
+        """Test that a plain list request returns every row, as before pagination"""
+        response = self.client.get(self.url)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 25)
+    
+    def test_page_parameter_pages_by_number(self):
+        """Test that ?page= uses page numbers on a keyset view"""
+        response = self.client.get(self.url, {'page': 2, 'page_size': 10})
+        self.assertEqual(response.data['current_page'], 2)
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 10)
+    
+    def test_count_modes(self):
+        """Test that ?count= and the view's pagination_count_mode reach the page numbers"""
+        from patients.views import PatientViewSet
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'page': 2, 'page_size': 10, 'count': 'none'})
+        self.assertIsNone(response.data['count'])
+        self.assertTrue(response.data['has_next'])
+        response = self.client.get(self.url, {'page': 3, 'page_size': 10, 'count': 'estimated'})
+        self.assertEqual(response.data['count'], 25)
+        self.assertFalse(response.data['has_next'])
+        with mock.patch.object(PatientViewSet, 'pagination_count_mode', 'none', create=True):
+            response = self.client.get(self.url, {'page': 1, 'page_size': 10})
+        self.assertIsNone(response.data['total_pages'])
+    
+    def test_vocabulary_lists_page_by_cursor(self):
+        """Test that vocabulary lists seek by cursor and still page by number on ?page="""
+        from others.models import DrugModel
+        for name in ('Aspirin', 'Ibuprofen', 'Paracetamol'):
+            DrugModel.objects.create(name=name)
+        pages = self.walk(reverse('drugs-list'), {'page_size': 2})
+        self.assertEqual([len(page['results']) for page in pages], [2, 1])
+        self.assertIn('cursor=', pages[0]['next'])
+        response = self.client.get(reverse('drugs-list'), {'page': 1, 'page_size': 2})
+        self.assertEqual(response.data['total_pages'], 2)
+        self.assertIn('page=2', response.data['next'])
+        self.assertEqual(len(self.client.get(reverse('drugs-list')).data), 3)
+
+
+class PhoneLookupTest(APITestCase):
+    """Integration tests for the phone number lookup endpoint"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.first = Patient.objects.create(code='PL001', name='First', mobile_number='01012345678')
+        self.second = Patient.objects.create(code='PL002', name='Second', mobile_number='+20 122 000 5678')
+        self.third = Patient.objects.create(code='PL003', name='Third', mobile_number='01099999999')
+        self.url = reverse('patients-by-phone')
+    
+    def test_suffix_lookup(self):
+        """Test lookup by the last digits"""
+        response = self.client.get(self.url, {'number': '5678'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({p['name'] for p in response.data}, {'First', 'Second'})
+        
+        response = self.client.get(self.url, {'number': '45678'})
+        self.assertEqual([p['name'] for p in response.data], ['First'])
+    
+    def test_exact_lookup_ignores_formatting(self):
+        """Test exact lookup with a differently formatted number"""
+        response = self.client.get(self.url, {'number': '+201220005678', 'match': 'exact'})
+        self.assertEqual([p['name'] for p in response.data], ['Second'])
+    
+    def test_suffix_lookup_with_a_full_number(self):
+        """Test that a whole number, with its leading 0 or country code, is found by suffix"""
+        for number in ('01012345678', '+20 101 234 5678'):
+            response = self.client.get(self.url, {'number': number})
+            self.assertEqual([p['name'] for p in response.data], ['First'])
+    
+    def test_suffix_with_a_leading_zero(self):
+        """Test that the zeros of a short suffix are matched, not stripped"""
+        Patient.objects.create(code='PL004', name='Fourth', mobile_number='01012340123')
+        Patient.objects.create(code='PL005', name='Fifth', mobile_number='01012345123')
+        response = self.client.get(self.url, {'number': '0123'})
+        self.assertEqual([p['name'] for p in response.data], ['Fourth'])
+        response = self.client.get(self.url, {'number': '00123'})
+        self.assertEqual(response.data, [])
+    
+    def test_short_suffix_is_rejected(self):
+        """Test that fewer than 4 digits is a bad request"""
+        response = self.client.get(self.url, {'number': '78'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite query plan')
+    def test_suffix_lookup_uses_the_index(self):
+        """Test that the suffix range is answered from the reversed-digits index"""
+        reversed_digits = '8765'
+        queryset = Patient.objects.filter(
+            mobile_digits_reversed__gte=reversed_digits,
+            mobile_digits_reversed__lt=reversed_digits + ':',
+        ).order_by('mobile_digits_reversed', 'id')
+        plan = queryset.explain().upper()
+        self.assertIn('SEARCH PATIENTS_PATIENT USING INDEX PATIENTS_PATIENT_MOBILE_DIGITS_REVERSED', plan)
+        self.assertNotIn('SCAN', plan)
+
+
+class AdultBulkCreateTest(APITestCase):
+    """Integration tests for the bulk adult create endpoint"""
+    
+    def setUp(self):
+        """Set up vocabulary rows to reference from the batch"""
+        from others.models import ClinicModel, SymptomModel, DrugModel
+        clinic = ClinicModel.objects.create(name='General')
+        self.symptom = SymptomModel.objects.create(name='Fever', clinic=clinic)
+        self.drug = DrugModel.objects.create(name='Aspirin')
+        self.url = reverse('adults-bulk')
+    
+    def adult_data(self, index, **overrides):
+        data = {
+            'code': f'BULK{index:04d}',
+            'name': f'Bulk Adult {index}',
+            'mobile_number': f'0101234{index:04d}',
+            'age': 40,
+            'occupation': 'Teacher',
+            'complaints': [{'value': str(self.symptom.id), 'label': self.symptom.name}],
+            'drugs': [str(self.drug.id)],
+        }
+        data.update(overrides)
+        return data
+    
+    def test_bulk_create(self):
+        """Test that every item is created with its relations and derived fields"""
+        response = self.client.post(self.url, [self.adult_data(i) for i in range(3)], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['index'] for item in response.data['created']], [0, 1, 2])
+        self.assertEqual(response.data['errors'], [])
+        
+        adult = Adult.objects.get(code='BULK0001')
+        self.assertEqual(str(adult.pk), response.data['created'][1]['id'])
+        self.assertEqual(adult.occupation, 'Teacher')
+        self.assertEqual(adult.mobile_digits, '1012340001')
+        self.assertIsNotNone(adult.created_at)
+        self.assertEqual(list(adult.complaints.all()), [self.symptom])
+        self.assertEqual(list(adult.drugs.all()), [self.drug])
+        self.assertEqual(adult.cyanosis.count(), 0)
+        
+        response = self.client.get(reverse('adults-autocomplete'), {'search': 'Bulk Adult 2'})
+        self.assertEqual([item['id'] for item in response.data], [str(Adult.objects.get(code='BULK0002').pk)])
+    
+    def test_invalid_items_do_not_abort_the_batch(self):
+        """Test that failing items are reported by index and the rest are created"""
+        Patient.objects.create(code='BULK0003', name='Existing')
+        items = [
+            self.adult_data(0),
+            self.adult_data(1, name='', age='old'),
+            self.adult_data(2, drugs=['00000000-0000-0000-0000-000000000000']),
+            self.adult_data(3),
+            self.adult_data(4),
+            self.adult_data(5, code='BULK0004'),
+        ]
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([item['index'] for item in response.data['created']], [0, 4])
+        
+        errors = {item['index']: item['errors'] for item in response.data['errors']}
+        self.assertEqual(set(errors), {1, 2, 3, 5})
+        self.assertIn('name', errors[1])
+        self.assertIn('age', errors[1])
+        self.assertIn('drugs', errors[2])
+        self.assertIn('code', errors[3])
+        self.assertIn('code', errors[5])
+        self.assertEqual(Adult.objects.count(), 2)
+    
+    def test_query_count_does_not_grow_with_the_batch(self):
+        """Test that a larger batch runs the same number of queries"""
+        def count_queries(items):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(self.url, items, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(context.captured_queries)
+        
+        # The first batch also loads the cached vocabularies
+        count_queries([self.adult_data(i) for i in range(100, 101)])
+        small = count_queries([self.adult_data(i) for i in range(2)])
+        large = count_queries([self.adult_data(i) for i in range(10, 40)])
+        self.assertEqual(small, large)
+    
+    def test_body_must_be_a_list(self):
+        """Test that a single object is rejected"""
+        response = self.client.post(self.url, self.adult_data(0), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Adult.objects.count(), 0)
+
+
+class AdultBulkVitalsTest(APITestCase):
+    """Integration tests for the bulk vitals update endpoint"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.adults = [
+            Adult.objects.create(code=f'VT{i:03d}', name=f'Vitals {i}', mobile_number='01012345678', bp='110/70')
+            for i in range(3)
+        ]
+        self.url = reverse('adults-bulk')
+    
+    def test_bulk_vitals_update(self):
+        """Test that vitals are applied and updated_at moves forward"""
+        first, second, third = self.adults
+        response = self.client.patch(self.url, [
+            {'id': str(first.id), 'bp': '120/80', 'hr': 72},
+            {'id': str(second.id), 'temp': 37.5, 'spo2': 98},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['updated']), {str(first.id), str(second.id)})
+        self.assertEqual(response.data['missing'], [])
+        
+        first.refresh_from_db()
+        second.refresh_from_db()
+        third_updated_at = third.updated_at
+        third.refresh_from_db()
+        self.assertEqual((first.bp, first.hr, first.temp), ('120/80', 72, None))
+        self.assertEqual((second.bp, second.temp, second.spo2), ('110/70', 37.5, 98))
+        self.assertGreater(first.updated_at, self.adults[0].created_at)
+        self.assertEqual(third.updated_at, third_updated_at)
+    
+    def test_missing_ids_are_reported(self):
+        """Test that unknown IDs are listed and the others still updated"""
+        unknown = '00000000-0000-0000-0000-000000000000'
+        response = self.client.patch(self.url, [
+            {'id': str(self.adults[0].id), 'rbs': 140},
+            {'id': unknown, 'rbs': 90},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['missing'], [unknown])
+        self.adults[0].refresh_from_db()
+        self.assertEqual(self.adults[0].rbs, 140)
+    
+    def test_invalid_item_rejects_the_batch(self):
+        """Test that one invalid item leaves every row untouched"""
+        response = self.client.patch(self.url, [
+            {'id': str(self.adults[0].id), 'hr': 80},
+            {'id': str(self.adults[1].id), 'hr': 'fast'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('hr', response.data[1])
+        self.adults[0].refresh_from_db()
+        self.assertIsNone(self.adults[0].hr)
+    
+    def test_query_count_does_not_grow_with_the_batch(self):
+        """Test that updating many adults costs a fixed number of queries"""
+        many = [
+            Adult.objects.create(code=f'VTM{i:03d}', name=f'Many {i}', mobile_number='01012345678')
+            for i in range(20)
+        ]
+        def count_queries(adults):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.patch(self.url, [{'id': str(a.id), 'hr': 60} for a in adults], format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(context.captured_queries)
+        
+        self.assertEqual(count_queries(self.adults[:2]), count_queries(many))
+
+
+class PatientBulkDeleteTest(APITestCase):
+    """Integration tests for the patient bulk delete endpoint"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.patients = [Patient.objects.create(code=f'PBD{i:03d}', name=f'Patient {i}') for i in range(3)]
+        self.url = reverse('patients-bulk-delete')
+    
+    def test_bulk_delete_reports_counts(self):
+        """Test that the response carries the deleted rows per model"""
+        ids = [str(patient.id) for patient in self.patients[:2]]
+        response = self.client.delete(self.url, {'patient_ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertEqual(response.data['counts'], {'patients.Patient': 2})
+        self.assertEqual(Patient.objects.count(), 1)
+    
+    def test_invalid_id_is_rejected(self):
+        """Test that a malformed id is a bad request and nothing is deleted"""
+        response = self.client.delete(self.url, {'patient_ids': [str(self.patients[0].id), 'nope']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Patient.objects.count(), 3)
+    
+    def test_unknown_task(self):
+        """Test that polling an unknown task is a 404"""
+        response = self.client.get(reverse('patients-bulk-delete-status'), {'task_id': 'missing'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BulkDeleteAsyncTest(TransactionTestCase):
+    """Background bulk deletes run as Celery tasks, which commit chunk by chunk"""
+    
+    def test_async_bulk_delete_reports_progress(self):
+        """Test that an async deletion finishes and reports its counts"""
+        import time
+        from others.models import DrugModel
+        
+        drugs = [DrugModel.objects.create(name=f'Drug {i}') for i in range(3)]
+        response = self.client.delete(
+            reverse('drugs-bulk-delete'),
+            json.dumps({'drug_ids': [str(drug.id) for drug in drugs], 'async': True}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json()['total'], 3)
+        
+        status_url = reverse('drugs-bulk-delete-status')
+        for _ in range(100):
+            task = self.client.get(status_url, {'task_id': response.json()['task_id']}).json()
+            if task['status'] in ('finished', 'failed'):
+                break
+            time.sleep(0.05)
+        
+        self.assertEqual(task['status'], 'finished')
+        self.assertEqual(task['done'], 3)
+        self.assertEqual(task['counts'], {'others.DrugModel': 3})
+        self.assertEqual(DrugModel.objects.count(), 0)
+
+
+class AdultExportTest(APITestCase):
+    """Integration tests for the streaming adult export"""
+    
+    def setUp(self):
+        """Set up adults with complaints and drugs"""
+        from others.models import ClinicModel, SymptomModel, DrugModel
+        clinic = ClinicModel.objects.create(name='General')
+        fever = SymptomModel.objects.create(name='Fever', clinic=clinic)
+        cough = SymptomModel.objects.create(name='Cough', clinic=clinic)
+        aspirin = DrugModel.objects.create(name='Aspirin')
+        for i in range(5):
+            adult = Adult.objects.create(
+                code=f'EX{i:03d}', name=f'Export {i}', mobile_number='01012345678', age=30 + i, hr=70.5,
+            )
+            adult.complaints.set([fever, cough])
+            adult.drugs.set([aspirin])
+        self.url = reverse('adults-export')
+    
+    def test_csv_export(self):
+        """Test that the CSV has a header and one row per adult"""
+        import csv
+        import io
+        
+        response = self.client.get(self.url, {'file_format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment', response['Content-Disposition'])
+        
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 5)
+        self.assertNotIn('mobile_digits', rows[0])
+        row = next(row for row in rows if row['code'] == 'EX002')
+        self.assertEqual(row['age'], '32')
+        self.assertEqual(row['hr'], '70.5')
+        self.assertEqual(sorted(row['complaints'].split('; ')), ['Cough', 'Fever'])
+        self.assertEqual(row['drugs'], 'Aspirin')
+        self.assertEqual(row['cyanosis'], '')
+    
+    def test_ndjson_export(self):
+        """Test that every NDJSON line is one adult with its relations as lists"""
+        response = self.client.get(self.url, {'file_format': 'ndjson', 'ordering': '-age'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 5)
+        record = json.loads(lines[0])
+        self.assertEqual(record['code'], 'EX004')
+        self.assertEqual(sorted(record['complaints']), ['Cough', 'Fever'])
+        self.assertEqual(record['medical'], [])
+    
+    def test_json_export(self):
+        """Test that the JSON export is one array of every adult, streamed in chunks"""
+        from patients.export import stream_adults
+        
+        response = self.client.get(self.url, {'file_format': 'json', 'ordering': 'age'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        records = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([record['code'] for record in records], [f'EX{i:03d}' for i in range(5)])
+        self.assertEqual(records[0]['drugs'], ['Aspirin'])
+        
+        chunks = list(stream_adults(Adult.objects.order_by('age'), 'json', chunk_size=2))
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(json.loads(b''.join(chunks)), records)
+    
+    def test_relations_are_loaded_per_chunk(self):
+        """Test that the export costs one query plus one per relation per chunk"""
+        from patients.export import stream_adults
+        from patients.models import ADULT_M2M_FIELDS
+        
+        with self.assertNumQueries(1 + 3 * len(ADULT_M2M_FIELDS)):
+            chunks = list(stream_adults(Adult.objects.all(), 'ndjson', chunk_size=2))
+        self.assertEqual(len(chunks), 3)
+    
+    def test_unknown_format(self):
+        """Test that an unsupported format is a bad request"""
+        response = self.client.get(self.url, {'file_format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AdultConditionalGetTest(APITestCase):
+    """Integration tests for ETag / Last-Modified on adult retrieve"""
+    
+    def setUp(self):
+        """Set up one adult"""
+        self.adult = Adult.objects.create(code='CG001', name='Cached Adult', mobile_number='01012345678', age=40)
+        self.url = reverse('adults-detail', kwargs={'pk': self.adult.pk})
+    
+    def test_validators_and_cache_control(self):
+        """Test that retrieve sends ETag, Last-Modified and a revalidate policy"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+    
+    def test_not_modified_skips_loading(self):
+        """Test that a matching If-None-Match is a 304 after the two ETag queries"""
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        
+    
+    def test_shared_versions_skip_the_table_states(self):
+        """Test that with a shared cache the ETag only reads the adult's update time"""
+        with mock.patch('common.versions.versions_are_shared', return_value=True):
+            etag = self.client.get(self.url)['ETag']
+            with self.assertNumQueries(1):
+                response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_if_modified_since_alone_is_not_trusted(self):
+        """Test that If-Modified-Since without an ETag still gets the body"""
+        last_modified = self.client.get(self.url)['Last-Modified']
+        # A second write within the same second leaves Last-Modified as it was
+        Adult.objects.filter(pk=self.adult.pk).update(age=41)
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['age'], 41)
+    
+    def test_update_changes_etag(self):
+        """Test that an update makes the old ETag stale"""
+        etag = self.client.get(self.url)['ETag']
+        self.client.patch(self.url, {'age': 41}, format='json')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['age'], 41)
+    
+    def test_vocabulary_rename_changes_etag(self):
+        """Test that renaming a related drug makes the old ETag stale"""
+        from others.models import DrugModel
+        drug = DrugModel.objects.create(name='Aspirin')
+        self.adult.drugs.set([drug])
+        etag = self.client.get(self.url, {'expand': 'drugs'})['ETag']
+        drug.name = 'Acetylsalicylic acid'
+        drug.save()
+        response = self.client.get(self.url, {'expand': 'drugs'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['drugs'], [{'value': str(drug.pk), 'label': 'Acetylsalicylic acid'}])
+    
+    def test_missing_adult_is_not_found(self):
+        """Test that unknown and malformed ids still give 404"""
+        import uuid
+        response = self.client.get(reverse('adults-detail', kwargs={'pk': uuid.uuid4()}), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('adults-detail', kwargs={'pk': 'not-a-uuid'}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AdultSummaryAPITest(APITestCase):
+    """Integration tests for the single-table adult summary listing and autocomplete"""
+    
+    def setUp(self):
+        """Set up adults sharing one complaint"""
+        from others.models import ClinicModel, SymptomModel
+        clinic = ClinicModel.objects.create(name='General')
+        self.symptom = SymptomModel.objects.create(name='Headache', clinic=clinic)
+        for i, (name, gender, age) in enumerate([
+            ('Amira Hassan', 'female', 30), ('Basel Omar', 'male', 45), ('Carma Said', 'female', 70),
+        ]):
+            adult = Adult.objects.create(
+                code=f'SUMAPI{i}', name=name, gender=gender, age=age,
+                mobile_number=f'0101234567{i}', occupation='Farmer',
+            )
+            adult.complaints.set([self.symptom])
+        self.url = reverse('adults-summary')
+    
+    def test_summary_fields(self):
+        """Test that summary rows carry the list columns and complaint labels"""
+        response = self.client.get(self.url, {'ordering': 'name'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first = response.data[0]
+        self.assertEqual(first['name'], 'Amira Hassan')
+        self.assertEqual(first['id'], str(Adult.objects.get(code='SUMAPI0').pk))
+        self.assertEqual(first['complaints'], [{'value': str(self.symptom.pk), 'label': 'Headache'}])
+        self.assertEqual(
+            set(first),
+            {'id', 'code', 'name', 'gender', 'mobile_number', 'age', 'occupation', 'complaints',
+             'created_at', 'updated_at'},
+        )
+    
+    def test_single_query_per_page(self):
+        """Test that a page is one query on the summary table, with no join"""
+        self.client.get(self.url)  # loads the symptom vocabulary
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(context.captured_queries), 1)
+        sql = context.captured_queries[0]['sql']
+        self.assertIn('patients_adultsummary', sql)
+        self.assertNotIn('JOIN', sql)
+    
+    def test_renamed_symptom_label(self):
+        """Test that complaint labels follow a renamed symptom"""
+        self.symptom.name = 'Migraine'
+        self.symptom.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data[0]['complaints'][0]['label'], 'Migraine')
+    
+    def test_filters_and_cursor_pagination(self):
+        """Test gender and age filters and paging through the name ordering"""
+        response = self.client.get(self.url, {'gender': 'female', 'min_age': 40})
+        self.assertEqual([row['name'] for row in response.data], ['Carma Said'])
+        
+        names = []
+        params = {'ordering': 'name', 'page_size': 2}
+        response = self.client.get(self.url, params)
+        names += [row['name'] for row in response.data['results']]
+        response = self.client.get(response.data['next'])
+        names += [row['name'] for row in response.data['results']]
+        self.assertEqual(names, ['Amira Hassan', 'Basel Omar', 'Carma Said'])
+        self.assertFalse(response.data['has_next'])
+    
+    def test_autocomplete_reads_summaries(self):
+        """Test that autocomplete keeps its response shape"""
+        response = self.client.get(reverse('adults-autocomplete'), {'search': 'basel'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['name'], 'Basel Omar')
+        self.assertEqual(response.data[0]['complaints'], [{'value': str(self.symptom.pk), 'label': 'Headache'}])
+        self.assertEqual(set(response.data[0]), {'id', 'name', 'mobile_number', 'age', 'occupation', 'complaints'})
+
+
+class AdultSparseFieldsTest(APITestCase):
+    """Integration tests for ?fields= and ?expand= on the adult endpoints"""
+    
+    def setUp(self):
+        """Set up adults with a complaint and a drug"""
+        from others.models import ClinicModel, SymptomModel, DrugModel
+        clinic = ClinicModel.objects.create(name='General')
+        symptom = SymptomModel.objects.create(name='Cough', clinic=clinic)
+        self.drug = DrugModel.objects.create(name='Aspirin')
+        for i in range(3):
+            adult = Adult.objects.create(
+                code=f'SPARSE{i}', name=f'Sparse {i}', mobile_number='01012345678', age=30 + i,
+            )
+            adult.complaints.set([symptom])
+            adult.drugs.set([self.drug])
+        self.url = reverse('adults-list')
+    
+    def test_fields_limit_columns_and_queries(self):
+        """Test that plain fields are read in one query without the other columns"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'fields': 'id,name,age'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {'id', 'name', 'age'})
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertNotIn('occupation', context.captured_queries[0]['sql'])
+    
+    def test_only_requested_relations_are_prefetched(self):
+        """Test that a requested relation costs one prefetch query, expanded or not"""
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'fields': 'id,drugs', 'expand': 'drugs'})
+        self.assertEqual(response.data[0]['drugs'], [{'value': str(self.drug.pk), 'label': 'Aspirin'}])
+    
+    def test_cursor_pagination_with_sparse_fields(self):
+        """Test that pages chain although the ordering columns are not in the output"""
+        response = self.client.get(self.url, {'fields': 'name', 'page_size': 2})
+        names = [row['name'] for row in response.data['results']]
+        response = self.client.get(response.data['next'])
+        names += [row['name'] for row in response.data['results']]
+        self.assertEqual(names, ['Sparse 2', 'Sparse 1', 'Sparse 0'])
+    
+    def test_retrieve_and_unknown_fields(self):
+        """Test sparse retrieve, and that unknown or unexpandable fields are a 400"""
+        adult = Adult.objects.get(code='SPARSE0')
+        response = self.client.get(reverse('adults-detail', kwargs={'pk': adult.pk}), {'fields': 'code'})
+        self.assertEqual(response.data, {'code': 'SPARSE0'})
+        
+        response = self.client.get(self.url, {'fields': 'name,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('secret', str(response.data['fields']))
+        response = self.client.get(self.url, {'expand': 'name'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AdultFastListTest(APITestCase):
+    """Integration tests for the compiled list path (common.fast)"""
+    
+    def setUp(self):
+        """Set up adults with relations, floats, nulls and awkward text"""
+        from others.models import ClinicModel, SymptomModel, DrugModel
+        clinic = ClinicModel.objects.create(name='General')
+        symptoms = [SymptomModel.objects.create(name=f'Symptom "{i}"', clinic=clinic) for i in range(3)]
+        drug = DrugModel.objects.create(name='Paracétamol   500')
+        for i in range(5):
+            adult = Adult.objects.create(
+                code=f'FAST{i}', name=f'مريض {i}\u2028\u2029', mobile_number='01012345678', age=20 + i,
+                occupation='Teacher' if i % 2 else '', hr=72.5 + i, temp=None if i % 2 else 36.6,
+                spo2=0.0, rbs=1e15,
+            )
+            adult.complaints.set(symptoms[:i % 3 + 1])
+            adult.drugs.set([drug] if i % 2 else [])
+        self.url = reverse('adults-list')
+    
+    def assertSameAsSerializer(self, url, params=None, **headers):
+        """Assert that the fast and the serializer paths return the same bytes"""
+        from patients.views import AdultViewSet, PatientViewSet
+        fast = self.client.get(url, params, **headers)
+        with mock.patch.object(AdultViewSet, 'fast_list', False), mock.patch.object(PatientViewSet, 'fast_list', False):
+            regular = self.client.get(url, params, **headers)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast['Content-Type'], regular['Content-Type'])
+        self.assertEqual(fast.content, regular.content)
+        return fast
+    
+    def test_same_bytes_as_the_serializer(self):
+        """Test byte-for-byte equal pages, with the default and custom field sets"""
+        response = self.assertSameAsSerializer(self.url)
+        self.assertEqual(len(response.data), 5)
+        self.assertIn(b'\\u2028', response.content)
+        self.assertSameAsSerializer(self.url, {'fields': 'id,name,temp,drugs', 'expand': 'drugs'})
+        self.assertSameAsSerializer(self.url, {'ordering': 'age', 'search': 'Teacher'})
+        self.assertSameAsSerializer(reverse('patients-list'))
+    
+    def test_cursor_pages_match(self):
+        """Test that the next links of the fast path walk the same pages"""
+        response = self.assertSameAsSerializer(self.url, {'page_size': 2, 'ordering': 'name'})
+        response = self.assertSameAsSerializer(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+    
+    def test_query_count(self):
+        """Test that the page is built by a ReadPlan from one query plus one per relation"""
+        from common.fast import ReadPlan
+        with self.assertNumQueries(6), mock.patch.object(
+            ReadPlan, 'serialize', autospec=True, side_effect=ReadPlan.serialize,
+        ) as serialize:
+            self.client.get(self.url)
+        serialize.assert_called_once()
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'fields': 'id,name'})
+    
+    def test_fallbacks(self):
+        """Test that floats orjson prints differently and indented JSON give the same bytes"""
+        Adult.objects.filter(code='FAST0').update(rbs=1e-5)
+        response = self.assertSameAsSerializer(self.url)
+        self.assertEqual(json.loads(response.content)[-1]['rbs'], 1e-5)
+        
+        response = self.assertSameAsSerializer(self.url, HTTP_ACCEPT='application/json; indent=2')
+        self.assertIn(b'\n  ', response.content)
+
+
+class AdultFastListJSONRendererTest(AdultFastListTest):
+    """The AdultFastListTest cases with DRF's JSONRenderer (API_JSON_ENGINE=json)"""
+    
+    def setUp(self):
+        """Set up the adults and serve the list endpoints with JSONRenderer"""
+        from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
+        from patients.views import AdultViewSet, PatientViewSet
+        super().setUp()
+        for viewset in (AdultViewSet, PatientViewSet):
+            patcher = mock.patch.object(viewset, 'renderer_classes', [JSONRenderer, BrowsableAPIRenderer])
+            patcher.start()
+            self.addCleanup(patcher.stop)
@@ -0,0 +1,137 @@
+"""
+Integration tests for the import_patients management command
+"""
+import csv
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from others.models import ClinicModel, SymptomModel, DrugModel
+from patients.models import Adult
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+class ImportPatientsCommandTest(TestCase):
+    """Test cases for importing adults from spreadsheets"""
+    
+    header = ['Code', 'Name', 'Gender', 'Mobile Number', 'Age', 'Smoking', 'Complaint', 'Drugs', 'HR']
+    
+    def setUp(self):
+        """Set up vocabulary rows and a scratch directory"""
+        clinic = ClinicModel.objects.create(name='General')
+        self.fever = SymptomModel.objects.create(name='Fever', clinic=clinic)
+        self.cough = SymptomModel.objects.create(name='Cough', clinic=clinic)
+        self.aspirin = DrugModel.objects.create(name='Aspirin')
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+    
+    def row(self, index, **overrides):
+        values = {
+            'Code': f'IMP{index:04d}',
+            'Name': f'Imported {index}',
+            'Gender': 'Female',
+            'Mobile Number': '01012345678',
+            'Age': '35',
+            'Smoking': 'No',
+            'Complaint': 'fever; Cough',
+            'Drugs': 'Aspirin',
+            'HR': '',
+        }
+        values.update(overrides)
+        return [values[column] for column in self.header]
+    
+    def write_csv(self, rows):
+        path = os.path.join(self.directory, 'convoy.csv')
+        with open(path, 'w', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(self.header)
+            writer.writerows(rows)
+        return path
+    
+    def run_import(self, path, *args):
+        out = StringIO()
+        call_command('import_patients', path, *args, stdout=out)
+        return out.getvalue()
+    
+    def test_import_csv(self):
+        """Test that rows are imported with choices and names resolved"""
+        path = self.write_csv([self.row(i) for i in range(3)] + [self.row(3, HR='72.5')])
+        output = self.run_import(path, '--batch-size', '2')
+        
+        self.assertIn('Imported 4 adults from 4 rows, 0 rejected', output)
+        adult = Adult.objects.get(code='IMP0003')
+        self.assertEqual(adult.gender, 'female')
+        self.assertEqual(adult.smoking, 'no')
+        self.assertEqual(adult.hr, 72.5)
+        self.assertEqual(adult.mobile_digits, '1012345678')
+        self.assertEqual(set(adult.complaints.all()), {self.fever, self.cough})
+        self.assertEqual(list(adult.drugs.all()), [self.aspirin])
+        self.assertIsNone(Adult.objects.get(code='IMP0000').hr)
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+    
+    def test_rejected_rows_are_reported(self):
+        """Test that invalid rows are skipped and written to the errors file"""
+        path = self.write_csv([
+            self.row(0),
+            self.row(1, Complaint='Headache'),
+            self.row(2, Age='old'),
+            self.row(3, Code='IMP0000'),
+        ])
+        errors_path = os.path.join(self.directory, 'errors.csv')
+        output = self.run_import(path, '--errors', errors_path)
+        
+        self.assertIn('Imported 1 adults from 4 rows, 3 rejected', output)
+        with open(errors_path, newline='') as handle:
+            errors = {int(row['row']): json.loads(row['errors']) for row in csv.DictReader(handle)}
+        self.assertEqual(errors[3], {'complaints': ['Unknown name "Headache".']})
+        self.assertIn('age', errors[4])
+        self.assertIn('code', errors[5])
+    
+    def test_resume_from_checkpoint(self):
+        """Test that an import resumes after the rows recorded in the checkpoint"""
+        path = self.write_csv([self.row(i) for i in range(5)])
+        with open(f'{path}.checkpoint', 'w') as handle:
+            json.dump({'rows_done': 3, 'created': 3, 'rejected': 0}, handle)
+        
+        output = self.run_import(path)
+        
+        self.assertIn('Resuming after 3 rows', output)
+        self.assertIn('Imported 5 adults from 5 rows', output)
+        self.assertEqual(
+            sorted(Adult.objects.values_list('code', flat=True)), ['IMP0003', 'IMP0004']
+        )
+    
+    def test_unsupported_file(self):
+        """Test that an unknown extension is a command error"""
+        path = os.path.join(self.directory, 'convoy.txt')
+        open(path, 'w').close()
+        with self.assertRaises(CommandError):
+            self.run_import(path)
+    
+    @skipUnless(openpyxl, 'openpyxl is not installed')
+    def test_import_xlsx(self):
+        """Test that XLSX numbers and blank rows are handled"""
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(self.header)
+        sheet.append(self.row(0, Age=35, HR=80))
+        sheet.append([None] * len(self.header))
+        sheet.append(self.row(1))
+        path = os.path.join(self.directory, 'convoy.xlsx')
+        workbook.save(path)
+        
+        output = self.run_import(path)
+        
+        self.assertIn('Imported 2 adults from 2 rows', output)
+        self.assertEqual(Adult.objects.get(code='IMP0000').age, 35)
@@ -0,0 +1,172 @@
+"""
+Integration tests for the delta sync endpoint
+"""
+from datetime import timedelta
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from common.bulk_delete import bulk_delete
+from others.models import ClinicModel, DrugModel, SymptomModel
+from patients.models import Adult, Patient
+from sync.changes import decode_token, encode_token
+from sync.models import Tombstone
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0, SYNC_TOMBSTONE_RETENTION_DAYS=90)
+class SyncTest(APITestCase):
+    """Test cases for GET /api/sync/"""
+
+    def setUp(self):
+        """Set up a clinic, a symptom, drugs, adults and a pediatric patient"""
+        self.url = reverse('sync')
+        self.clinic = ClinicModel.objects.create(name='General')
+        self.symptom = SymptomModel.objects.create(name='Fever', clinic=self.clinic)
+        self.drugs = [DrugModel.objects.create(name=f'Drug {i}') for i in range(3)]
+        self.adults = []
+        for i in range(4):
+            adult = Adult.objects.create(code=f'SY{i:03d}', name=f'Synced {i}', mobile_number='01012345678', age=30 + i)
+            adult.complaints.add(self.symptom)
+            self.adults.append(adult)
+        self.child = Patient.objects.create(code='SYP01', name='Synced child', patient_type='pediatric', age=6)
+
+    def sync(self, **params):
+        """Follow the pages of one sync, return them and the final token"""
+        pages = [self.client.get(self.url, params)]
+        while pages[-1].data['next']:
+            self.assertIsNone(pages[-1].data['token'])
+            pages.append(self.client.get(pages[-1].data['next']))
+        for page in pages:
+            self.assertEqual(page.status_code, status.HTTP_200_OK)
+        return pages, pages[-1].data['token']
+
+    def collect(self, pages, stream, kind):
+        return [
+            item if kind == 'deleted' else item['id']
+            for page in pages for item in page.data['changes'].get(stream, {}).get(kind, [])
+        ]
+
+    def test_full_sync(self):
+        """Test that a sync without a token sends every row as created, across pages"""
+        pages, token = self.sync(page_size=3)
+        self.assertGreater(len(pages), 3)
+        self.assertIsNotNone(token)
+
+        adult_ids = sorted(str(adult.id) for adult in self.adults)
+        self.assertEqual(self.collect(pages, 'adults', 'created'), adult_ids)
+        # Adults are only sent once, with the adults stream
+        self.assertEqual(self.collect(pages, 'patients', 'created'), [str(self.child.id)])
+        self.assertEqual(sorted(self.collect(pages, 'drugs', 'created')), sorted(str(drug.id) for drug in self.drugs))
+        self.assertEqual(self.collect(pages, 'clinics', 'created'), [self.clinic.id])
+        self.assertFalse(any(self.collect(pages, name, 'updated') for name in ('adults', 'drugs')))
+
+        # Same output as the adult detail endpoint, ManyToMany fields included
+        adult = pages[-1].data['changes']['adults']['created'][-1]
+        detail = self.client.get(reverse('adults-detail', args=[adult['id']]), HTTP_ACCEPT='application/json')
+        self.assertEqual(adult['complaints'], [{'value': str(self.symptom.id), 'label': 'Fever'}])
+        self.assertEqual(adult, detail.json())
+
+    def test_delta_sync(self):
+        """Test that a sync from a token sends only the rows changed and deleted since"""
+        _, token = self.sync()
+
+        drug = self.drugs[0]
+        drug.name = 'Renamed drug'
+        drug.save()
+        new_adult = Adult.objects.create(code='SY100', name='New adult', mobile_number='01012345678')
+        deleted_id = self.adults[1].id
+        self.adults[1].delete()
+        child_id = self.child.id
+        self.child.delete()
+
+        pages, next_token = self.sync(since=token)
+        self.assertEqual(len(pages), 1)
+        changes = pages[0].data['changes']
+        self.assertEqual(set(changes), {'drugs', 'patients', 'adults'})
+        self.assertEqual([(item['id'], item['name']) for item in changes['drugs']['updated']], [(str(drug.id), 'Renamed drug')])
+        self.assertEqual(changes['drugs']['created'], [])
+        self.assertEqual([item['id'] for item in changes['adults']['created']], [str(new_adult.id)])
+        self.assertEqual(changes['adults']['deleted'], [deleted_id])
+        self.assertEqual(changes['patients']['deleted'], [child_id])
+
+        # Nothing changed since: an empty sync, and the token moves on
+        pages, last_token = self.sync(since=next_token)
+        self.assertEqual(pages[0].data['changes'], {})
+        self.assertGreaterEqual(decode_token(last_token), decode_token(next_token))
+
+    def test_settle_window(self):
+        """Test that rows saved within SYNC_SETTLE_SECONDS wait for the next sync"""
+        token = encode_token(timezone.now() - timedelta(seconds=30))
+        with override_settings(SYNC_SETTLE_SECONDS=60):
+            response = self.client.get(self.url, {'since': token})
+        self.assertEqual(response.data['changes'], {})
+        # The token never goes backwards
+        self.assertEqual(response.data['token'], token)
+
+        response = self.client.get(self.url, {'since': token})
+        self.assertEqual(len(response.data['changes']['adults']['created']), 4)
+
+    def test_bulk_delete_tombstones(self):
+        """Test that a bulk delete records its tombstones with one INSERT per chunk"""
+        _, token = self.sync()
+        ids = [adult.id for adult in self.adults[:3]]
+        with CaptureQueriesContext(connection) as context:
+            bulk_delete(Adult, ids)
+        inserts = [query for query in context.captured_queries if 'INSERT INTO "SYNC_TOMBSTONE"' in query['sql'].upper()]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Tombstone.objects.filter(model='patients.adult').count(), 3)
+
+        pages, _ = self.sync(since=token, page_size=2)
+        self.assertEqual(sorted(self.collect(pages, 'adults', 'deleted')), sorted(ids))
+        self.assertEqual(self.collect(pages, 'patients', 'deleted'), [])
+
+    def test_relation_changes(self):
+        """Test that adding, removing and deleting related rows sends the adults again"""
+        _, token = self.sync()
+        self.adults[0].drugs.add(self.drugs[0])
+        self.adults[1].medical.clear()
+        self.symptom.adult_complaints.remove(self.adults[2])
+        pages, token = self.sync(since=token)
+        self.assertEqual(
+            sorted(self.collect(pages, 'adults', 'updated')), sorted(str(adult.id) for adult in self.adults[:3]),
+        )
+        updated = {item['id']: item for item in pages[0].data['changes']['adults']['updated']}
+        self.assertEqual(updated[str(self.adults[0].id)]['drugs'], [str(self.drugs[0].id)])
+        self.assertEqual(updated[str(self.adults[2].id)]['complaints'], [])
+
+        # The links go away with the symptom, without a ManyToMany signal
+        symptom_id = self.symptom.id
+        self.symptom.delete()
+        pages, _ = self.sync(since=token)
+        self.assertEqual(self.collect(pages, 'symptoms', 'deleted'), [symptom_id])
+        still_linked = [self.adults[0], self.adults[1], self.adults[3]]
+        self.assertEqual(sorted(self.collect(pages, 'adults', 'updated')), sorted(str(adult.id) for adult in still_linked))
+        summaries = Adult.objects.filter(pk__in=[adult.pk for adult in self.adults]).values_list('updated_at', 'summary__updated_at')
+        self.assertTrue(all(updated_at == summary_updated_at for updated_at, summary_updated_at in summaries))
+
+    def test_reused_primary_key(self):
+        """Test that a deleted key used again is sent as a change, not a deletion"""
+        _, token = self.sync()
+        clinic = ClinicModel.objects.create(name='Dental')
+        clinic_id = clinic.id
+        clinic.delete()
+        ClinicModel.objects.create(id=clinic_id, name='Dental again')
+
+        changes = self.client.get(self.url, {'since': token}).data['changes']
+        self.assertEqual(changes['clinics']['deleted'], [])
+        self.assertEqual([item['name'] for item in changes['clinics']['created']], ['Dental again'])
+
+    def test_invalid_and_expired_tokens(self):
+        """Test that malformed tokens are rejected and old ones ask for a full sync"""
+        self.assertEqual(self.client.get(self.url, {'since': 'nope'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'nope'}).status_code, status.HTTP_404_NOT_FOUND)
+
+        expired = encode_token(timezone.now() - timedelta(days=91))
+        response = self.client.get(self.url, {'since': expired})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
@@ -0,0 +1,84 @@
+"""
+Unit tests for the chunked bulk delete in common.bulk_delete
+"""
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from common.bulk_delete import bulk_delete, get_bulk_delete_status, start_bulk_delete
+from others.models import ClinicModel, SymptomModel
+from patients.models import Patient, Adult
+
+
+class BulkDeleteTest(TestCase):
+    """Test cases for the chunked bulk delete"""
+    
+    def setUp(self):
+        """Set up adults sharing two symptoms"""
+        clinic = ClinicModel.objects.create(name='General')
+        self.symptoms = [SymptomModel.objects.create(name=f'Symptom {i}', clinic=clinic) for i in range(2)]
+        self.adults = []
+        for i in range(5):
+            adult = Adult.objects.create(code=f'BD{i:03d}', name=f'Delete {i}', mobile_number='01012345678')
+            adult.complaints.set(self.symptoms)
+            self.adults.append(adult)
+    
+    def test_counts_per_model(self):
+        """Test that cascades and through rows are counted per model"""
+        counts = bulk_delete(Patient, [adult.pk for adult in self.adults[:3]])
+        self.assertEqual(counts, {
+            'patients.Patient': 3,
+            'patients.Adult': 3,
+            'patients.Adult_complaints': 6,
+            'patients.AdultSummary': 3,
+        })
+        self.assertEqual(Adult.objects.count(), 2)
+    
+    def test_ids_are_deleted_in_chunks(self):
+        """Test that no DELETE statement carries more than chunk_size ids"""
+        progress = []
+        with CaptureQueriesContext(connection) as context:
+            counts = bulk_delete(
+                Patient, [adult.pk for adult in self.adults], chunk_size=2,
+                progress=lambda done, total: progress.append((done, total)),
+            )
+        self.assertEqual(counts['patients.Patient'], 5)
+        self.assertEqual(progress, [(2, 5), (4, 5), (5, 5)])
+        
+        patient_deletes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('DELETE FROM "patients_patient"')
+        ]
+        self.assertEqual(len(patient_deletes), 3)
+    
+    def test_through_rows_are_deleted_without_loading_them(self):
+        """Test that deleting vocabulary rows removes the links with raw deletes"""
+        with CaptureQueriesContext(connection) as context:
+            counts = bulk_delete(SymptomModel, [symptom.pk for symptom in self.symptoms])
+        self.assertEqual(counts['patients.Adult_complaints'], 10)
+        
+        selects = [query['sql'] for query in context.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertFalse([sql for sql in selects if 'patients_adult_complaints' in sql])
+        self.assertEqual(self.adults[0].complaints.count(), 0)
+    
+    def test_unknown_and_duplicate_ids(self):
+        """Test that duplicates are deleted once and unknown ids are ignored"""
+        pk = self.adults[0].pk
+        counts = bulk_delete(Adult, [pk, pk, '00000000-0000-0000-0000-000000000000'])
+        self.assertEqual(counts['patients.Adult'], 1)
+    
+    def test_background_progress_is_stored(self):
+        """Test that a queued deletion records its progress where any worker can read it"""
+        task_id = start_bulk_delete(Patient, [adult.pk for adult in self.adults[:2]])
+        task = get_bulk_delete_status(task_id)
+        self.assertEqual((task['status'], task['done'], task['total']), ('finished', 2, 2))
+        self.assertEqual(task['counts']['patients.Patient'], 2)
+        
+        with mock.patch('common.bulk_delete.bulk_delete', side_effect=RuntimeError('disk full')):
+            task_id = start_bulk_delete(Patient, [self.adults[2].pk])
+        self.assertEqual(get_bulk_delete_status(task_id), {
+            'status': 'failed', 'done': 0, 'total': 1, 'error': 'disk full',
+        })
+        self.assertIsNone(get_bulk_delete_status('missing'))
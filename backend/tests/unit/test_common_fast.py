@@ -0,0 +1,75 @@
+"""
+Unit tests for the compiled read path in common.fast
+"""
+from unittest import mock, skipUnless
+
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from others.models import ClinicModel, SymptomModel
+from common import fast
+from common.queries import ordered_prefetches
+from patients.models import Adult, ADULT_M2M_FIELDS
+from patients.serializers import (
+    PatientSerializer, AdultSerializer, AdultAutocompleteSerializer, AdultSummarySerializer,
+)
+
+
+class ReadPlanTest(TestCase):
+    """Test cases for compile_read_plan() and ReadPlan"""
+    
+    def setUp(self):
+        """Set up two adults, one with complaints"""
+        clinic = ClinicModel.objects.create(name='General')
+        self.symptoms = [SymptomModel.objects.create(name=f'Symptom {i}', clinic=clinic) for i in range(3)]
+        self.adult = Adult.objects.create(
+            code='PLAN001', name='Plan Adult', mobile_number='01012345678', age=33, hr=80.5,
+        )
+        self.adult.complaints.set(self.symptoms)
+        Adult.objects.create(code='PLAN002', name='Other Adult', mobile_number='01012345679')
+    
+    def test_rows_equal_serializer_output(self):
+        """Test that serialize() returns what the serializer does for the same rows"""
+        queryset = Adult.objects.prefetch_related(*ordered_prefetches(Adult, ADULT_M2M_FIELDS)).order_by('code')
+        for kwargs in ({}, {'fields': ['name', 'hr', 'drugs'], 'expand': ['drugs']}):
+            serializer = AdultSerializer(**kwargs)
+            plan = fast.compile_read_plan(serializer)
+            rows = plan.values(queryset)
+            self.assertEqual(
+                plan.serialize(list(rows), 'default'),
+                [dict(item) for item in AdultSerializer(queryset, many=True, **kwargs).data],
+            )
+    
+    def test_unsupported_serializers(self):
+        """Test that method fields and custom representations get no plan"""
+        self.assertIsNotNone(fast.compile_read_plan(PatientSerializer()))
+        self.assertIsNone(fast.compile_read_plan(AdultAutocompleteSerializer()))
+        self.assertIsNone(fast.compile_read_plan(AdultSummarySerializer()))
+    
+    def test_float_out_of_range(self):
+        """Test that floats printed in exponent form by json raise FloatOutOfRange"""
+        plan = fast.compile_read_plan(AdultSerializer(fields=['hr']))
+        Adult.objects.filter(pk=self.adult.pk).update(hr=1e-7)
+        with self.assertRaises(fast.FloatOutOfRange):
+            plan.serialize(list(plan.values(Adult.objects.filter(pk=self.adult.pk))), 'default')
+
+
+class DumpsTest(TestCase):
+    """Test cases for fast.dumps()"""
+    
+    def test_same_bytes_as_json_renderer(self):
+        """Test that dumps() matches JSONRenderer, with or without orjson"""
+        data = {'name': 'سطر\u2028فقرة\u2029', 'quote': '"\\', 'values': [1, 2.5, None, True], 'empty': {}}
+        expected = JSONRenderer().render(data)
+        self.assertEqual(fast.dumps(data), expected)
+        with mock.patch.object(fast, 'orjson', None):
+            self.assertEqual(fast.dumps(data), expected)
+    
+    @skipUnless(fast.orjson_available(), 'orjson is not installed')
+    def test_unsupported_types_fall_back(self):
+        """Test that values orjson prints its own way go through JSONRenderer"""
+        import datetime
+        from decimal import Decimal
+        data = {'at': datetime.datetime(2024, 5, 1, 8, 30, 15, 123456, tzinfo=datetime.timezone.utc), 'dose': Decimal('1.50')}
+        self.assertEqual(fast.dumps(data), JSONRenderer().render(data))
+        self.assertEqual(fast.dumps(data), b'{"at":"2024-05-01T08:30:15.123456Z","dose":1.5}')
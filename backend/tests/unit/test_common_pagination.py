@@ -0,0 +1,126 @@
+"""
+Unit tests for patient pagination classes
+"""
+from urllib.parse import parse_qsl, urlsplit
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from others.models import DrugModel
+from patients.models import Patient
+from common.pagination import CustomPageNumberPagination, KeysetPagination
+
+
+class CountModeTest(TestCase):
+    """Test cases for the count modes of CustomPageNumberPagination"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.factory = APIRequestFactory()
+        for i in range(25):
+            Patient.objects.create(code=f'CNT{i:03d}', name=f'Patient {i}', mobile_number='01234567890')
+    
+    def paginate(self, params, view=None, queryset=None):
+        paginator = CustomPageNumberPagination()
+        request = Request(self.factory.get('/api/patients/patients/', params))
+        queryset = Patient.objects.all() if queryset is None else queryset
+        rows = paginator.paginate_queryset(queryset, request, view)
+        return rows, paginator.get_paginated_response([str(row.id) for row in rows]).data
+    
+    def test_exact_mode_counts(self):
+        """Test that the default mode reports the exact count"""
+        rows, data = self.paginate({'page_size': 10})
+        self.assertEqual(data['count'], 25)
+        self.assertEqual(data['total_pages'], 3)
+        self.assertTrue(data['has_next'])
+    
+    def test_none_mode_skips_the_count(self):
+        """Test that count=none runs a single query and still knows has_next"""
+        with self.assertNumQueries(1):
+            rows, data = self.paginate({'page_size': 10, 'page': 2, 'count': 'none'})
+        self.assertEqual(len(rows), 10)
+        self.assertIsNone(data['count'])
+        self.assertIsNone(data['total_pages'])
+        self.assertTrue(data['has_next'])
+        self.assertTrue(data['has_previous'])
+        
+        rows, data = self.paginate({'page_size': 10, 'page': 3, 'count': 'none'})
+        self.assertEqual(len(rows), 5)
+        self.assertFalse(data['has_next'])
+        self.assertIsNone(data['next'])
+    
+    def test_view_count_mode(self):
+        """Test that the view's pagination_count_mode is used when the request has none"""
+        view = type('View', (), {'pagination_count_mode': 'none'})()
+        rows, data = self.paginate({'page_size': 10}, view=view)
+        self.assertIsNone(data['count'])
+        
+        rows, data = self.paginate({'page_size': 10, 'count': 'exact'}, view=view)
+        self.assertEqual(data['count'], 25)
+    
+    def test_estimated_mode_uses_table_statistics(self):
+        """Test that unfiltered querysets are counted from sqlite_stat1"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        with self.assertNumQueries(2):
+            rows, data = self.paginate({'page_size': 10, 'count': 'estimated'})
+        self.assertEqual(data['count'], 25)
+        self.assertEqual(data['total_pages'], 3)
+    
+    def test_estimated_mode_caches_filtered_counts(self):
+        """Test that filtered counts are cached between requests"""
+        rows, data = self.paginate(
+            {'page_size': 5, 'count': 'estimated'},
+            queryset=Patient.objects.filter(name__icontains='Patient 1'),
+        )
+        self.assertEqual(data['count'], 11)
+        
+        # A new row is not visible until the cached count expires
+        Patient.objects.create(code='CNT999', name='Patient 100', mobile_number='01234567890')
+        with self.assertNumQueries(1):
+            rows, data = self.paginate(
+                {'page_size': 5, 'count': 'estimated'},
+                queryset=Patient.objects.filter(name__icontains='Patient 1'),
+            )
+        self.assertEqual(data['count'], 11)
+
+
+class KeysetNullOrderingTest(TestCase):
+    """Test cases for KeysetPagination over a nullable ordering field"""
+    
+    def setUp(self):
+        """Create drugs, some of them without created_on"""
+        self.factory = APIRequestFactory()
+        for i in range(7):
+            DrugModel.objects.create(name=f'Drug {i}')
+        DrugModel.objects.filter(name__in=['Drug 1', 'Drug 4', 'Drug 5']).update(created_on=None)
+    
+    def get_page(self, params):
+        paginator = KeysetPagination()
+        paginator.ordering = ('-created_on',)
+        request = Request(self.factory.get('/api/drugs/', params))
+        rows = paginator.paginate_queryset(DrugModel.objects.all(), request)
+        return paginator.get_paginated_response([row.name for row in rows]).data
+    
+    def walk(self, page_size):
+        pages = [self.get_page({'page_size': page_size})]
+        while pages[-1]['next']:
+            pages.append(self.get_page(dict(parse_qsl(urlsplit(pages[-1]['next']).query))))
+        return pages
+    
+    def test_pages_cover_rows_with_null_values(self):
+        """Test that rows with a NULL ordering value come last and none is skipped"""
+        pages = self.walk(2)
+        names = [name for page in pages for name in page['results']]
+        self.assertEqual(sorted(names), sorted(DrugModel.objects.values_list('name', flat=True)))
+        self.assertEqual(set(names[-3:]), {'Drug 1', 'Drug 4', 'Drug 5'})
+    
+    def test_previous_link_crosses_the_nulls(self):
+        """Test that walking backwards from the NULL rows returns the earlier pages"""
+        pages = self.walk(2)
+        for earlier, later in zip(pages, pages[1:]):
+            back = self.get_page(dict(parse_qsl(urlsplit(later['previous']).query)))
+            self.assertEqual(back['results'], earlier['results'])
@@ -0,0 +1,120 @@
+"""
+Unit tests for the orjson renderer and parser and the response compression
+"""
+import datetime
+import gzip
+import io
+import json
+import uuid
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.test import SimpleTestCase, override_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from common import compression, renderers
+from common.fast import orjson_available
+
+
+class ORJSONRendererTest(SimpleTestCase):
+    """Test cases for ORJSONRenderer and ORJSONParser"""
+
+    def setUp(self):
+        """Set up a payload with the types the serializers leave to the encoder"""
+        self.data = {
+            'id': uuid.UUID('6f1c29a4-3b1e-4d4b-9a53-0f3c1d7e8a11'),
+            'created_at': datetime.datetime(2024, 5, 1, 8, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'visit': datetime.date(2024, 5, 1),
+            'dose': Decimal('2.50'),
+            'name': 'مريض\u2028',
+            1: 'integer key',
+        }
+
+    def test_matches_json_renderer(self):
+        """Test that UUID, datetime, Decimal and key types encode as with JSONRenderer"""
+        content = renderers.ORJSONRenderer().render(self.data)
+        self.assertEqual(json.loads(content), json.loads(JSONRenderer().render(self.data)))
+        self.assertIn(b'"2024-05-01T08:30:15.123456Z"', content)
+        self.assertIn(b'\\u2028', content)
+
+    @skipUnless(orjson_available(), 'orjson is not installed')
+    def test_indent_and_fallback(self):
+        """Test that any indent gives two spaces, and that integers beyond 64 bits fall back"""
+        content = renderers.ORJSONRenderer().render({'a': [1]}, 'application/json; indent=4')
+        self.assertEqual(content, b'{\n  "a": [\n    1\n  ]\n}')
+        self.assertEqual(renderers.ORJSONRenderer().render({'big': 2 ** 70}), b'{"big":1180591620717411303424}')
+
+    def test_without_orjson(self):
+        """Test that the renderer and the parser work without orjson"""
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+            self.assertEqual(renderers.ORJSONParser().parse(io.BytesIO(b'{"a": [1, 2.5]}')), {'a': [1, 2.5]})
+
+    def test_parser(self):
+        """Test parsing a body, and that invalid JSON is a ParseError"""
+        parser = renderers.ORJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"name": "مريض", "age": 30}'.encode())), {'name': 'مريض', 'age': 30})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"name": '))
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"value": NaN}'))
+
+    def test_stream_json_array(self):
+        """Test that chunks, empty ones included, join into one array"""
+        content = b''.join(renderers.stream_json_array([[{'a': 1}, {'a': 2}], [], [{'a': 3}]]))
+        self.assertEqual(json.loads(content), [{'a': 1}, {'a': 2}, {'a': 3}])
+        self.assertEqual(b''.join(renderers.stream_json_array([])), b'[]')
+
+
+@override_settings(API_COMPRESS_MIN_SIZE=1024)
+class CompressionTest(SimpleTestCase):
+    """Test cases for the compression of large ORJSONRenderer bodies"""
+
+    def render(self, data, accept_encoding=None):
+        headers = {'HTTP_ACCEPT_ENCODING': accept_encoding} if accept_encoding is not None else {}
+        request = APIRequestFactory().get('/api/patients/adults/', **headers)
+        response = Response(data)
+        response['ETag'] = '"abc"'
+        content = renderers.ORJSONRenderer().render(data, 'application/json', {'request': request, 'response': response})
+        return response, content
+
+    def test_gzip_above_threshold(self):
+        """Test that a large body is gzipped, with Vary and a weak ETag"""
+        data = [{'name': f'Adult {i}', 'occupation': 'Teacher'} for i in range(100)]
+        response, content = self.render(data, 'gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertEqual(json.loads(gzip.decompress(content)), data)
+
+    def test_small_or_not_accepted(self):
+        """Test that small bodies and clients without gzip get identity"""
+        response, content = self.render({'name': 'Small'}, 'gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        data = [{'name': f'Adult {i}'} for i in range(200)]
+        for accept_encoding in (None, 'identity', 'gzip;q=0'):
+            response, content = self.render(data, accept_encoding)
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(json.loads(content), data)
+
+    def test_choose_encoding(self):
+        """Test the Accept-Encoding negotiation"""
+        encodings = {'br': None, 'gzip': None}
+        self.assertEqual(compression.choose_encoding('gzip, br', encodings), 'br')
+        self.assertEqual(compression.choose_encoding('br;q=0.5, gzip', encodings), 'gzip')
+        self.assertEqual(compression.choose_encoding('*', encodings), 'br')
+        self.assertEqual(compression.choose_encoding('gzip', {'gzip': None}), 'gzip')
+        self.assertIsNone(compression.choose_encoding('deflate', encodings))
+        self.assertIsNone(compression.choose_encoding('', encodings))
+
+    @skipUnless(compression.brotli is not None, 'brotli is not installed')
+    def test_brotli(self):
+        """Test that brotli is preferred when installed"""
+        data = [{'name': f'Adult {i}'} for i in range(200)]
+        response, content = self.render(data, 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(compression.brotli.decompress(content)), data)
@@ -0,0 +1,255 @@
+"""
+Unit tests for the cached others vocabularies
+"""
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from common.response_cache import response_cache
+from others.cache import Vocabulary, get_vocabulary
+from others.models import ClinicModel, SymptomModel, DrugModel
+
+
+class VocabularyCacheTest(TestCase):
+    """Test cases for the per-process vocabulary cache"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.general = ClinicModel.objects.create(name='General')
+        self.dental = ClinicModel.objects.create(name='Dental')
+        self.fever = SymptomModel.objects.create(name='Fever', clinic=self.general)
+        self.toothache = SymptomModel.objects.create(name='Toothache', clinic=self.dental)
+        self.aspirin = DrugModel.objects.create(name='Aspirin')
+    
+    def test_vocabulary_is_loaded_once(self):
+        """Test that reads after the first table check and load hit no database"""
+        drugs = get_vocabulary(DrugModel)
+        with self.assertNumQueries(2):
+            drugs.entries()
+        with self.assertNumQueries(0):
+            self.assertEqual(drugs.get(self.aspirin.id).name, 'Aspirin')
+            self.assertEqual(drugs.pk_for_name(' aspirin '), self.aspirin.id)
+    
+    def test_writes_invalidate_the_local_copy(self):
+        """Test that saves and deletes are visible on the next read"""
+        drugs = get_vocabulary(DrugModel)
+        drugs.entries()
+        
+        paracetamol = DrugModel.objects.create(name='Paracetamol')
+        self.assertEqual([entry.name for entry in drugs.entries()], ['Aspirin', 'Paracetamol'])
+        
+        self.aspirin.name = 'Acetylsalicylic acid'
+        self.aspirin.save()
+        self.assertIsNone(drugs.pk_for_name('Aspirin'))
+        
+        paracetamol.delete()
+        self.assertIsNone(drugs.get(paracetamol.id))
+    
+    def test_other_workers_reload_after_commit(self):
+        """Test that a committed write moves the shared version seen by other processes"""
+        other_worker = Vocabulary(DrugModel)
+        other_worker.version_check_interval = 0
+        self.assertEqual(len(other_worker.entries()), 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            DrugModel.objects.create(name='Ibuprofen')
+        
+        self.assertEqual([entry.name for entry in other_worker.entries()], ['Aspirin', 'Ibuprofen'])
+    
+    def test_other_workers_see_writes_without_a_shared_cache(self):
+        """Test that a write that never reaches this process's cache is still picked up"""
+        other_worker = Vocabulary(DrugModel)
+        other_worker.version_check_interval = 0
+        self.assertEqual(len(other_worker.entries()), 1)
+        # No on-commit version bump: the version token stays where it was
+        DrugModel.objects.create(name='Ibuprofen')
+        self.assertEqual([entry.name for entry in other_worker.entries()], ['Aspirin', 'Ibuprofen'])
+        DrugModel.objects.filter(pk=self.aspirin.pk).update(name='Acetylsalicylic acid', updated_on=timezone.now())
+        self.assertEqual(other_worker.pk_for_name('acetylsalicylic acid'), self.aspirin.pk)
+    
+    def test_search_and_clinic_map(self):
+        """Test case-insensitive substring search, optionally within a clinic"""
+        symptoms = get_vocabulary(SymptomModel)
+        self.assertEqual([e.name for e in symptoms.search('E', 10)], ['Fever', 'Toothache'])
+        self.assertEqual([e.name for e in symptoms.search('e', 1)], ['Fever'])
+        self.assertEqual([e.name for e in symptoms.search('', 10, clinic_id=self.dental.id)], ['Toothache'])
+        self.assertEqual(symptoms.search('fever', 10, clinic_id=self.dental.id), [])
+    
+    def test_instances_without_queries(self):
+        """Test that instances() builds usable model instances from the cache"""
+        symptoms = get_vocabulary(SymptomModel)
+        symptoms.entries()
+        with self.assertNumQueries(0):
+            instances = symptoms.instances([self.fever.id])
+        self.assertEqual(instances[self.fever.id], self.fever)
+        self.assertEqual(instances[self.fever.id].name, 'Fever')
+        with self.assertNumQueries(1):
+            instances = symptoms.instances([self.fever.id, self.dental.id])
+        self.assertEqual(list(instances), [self.fever.id])
+    
+    def test_instances_of_rows_written_elsewhere(self):
+        """Test that rows the local copy has not seen yet are looked up, not rejected"""
+        drugs = get_vocabulary(DrugModel)
+        drugs.entries()
+        # bulk_create sends no signals, like a write in a worker with its own cache
+        ibuprofen, = DrugModel.objects.bulk_create([DrugModel(name='Ibuprofen')])
+        instances = drugs.instances([self.aspirin.id, ibuprofen.id])
+        self.assertEqual(instances, {self.aspirin.id: self.aspirin, ibuprofen.id: ibuprofen})
+        self.assertEqual(instances[ibuprofen.id].name, 'Ibuprofen')
+        self.assertIsNotNone(drugs.get(ibuprofen.id))
+
+
+class VocabularyAutocompleteTest(APITestCase):
+    """Autocomplete endpoints answer from the vocabulary cache"""
+    
+    def setUp(self):
+        """Set up test data"""
+        clinic = ClinicModel.objects.create(name='General')
+        self.symptom = SymptomModel.objects.create(name='Fever', clinic=clinic)
+        self.clinic = clinic
+        DrugModel.objects.create(name='Aspirin')
+        DrugModel.objects.create(name='Paracetamol')
+    
+    def test_autocomplete_hits_no_database_once_warm(self):
+        """Test that a warm autocomplete only reads the ETag's table state and keeps its shape"""
+        url = reverse('drugs-autocomplete')
+        self.client.get(url, {'search': 'a'})
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'search': 'para'})
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(set(response.data[0]), {'id', 'name'})
+        self.assertEqual(response.data[0]['name'], 'Paracetamol')
+    
+    def test_symptom_autocomplete_by_clinic(self):
+        """Test that symptom autocomplete keeps the {value, label} shape and clinic filter"""
+        url = reverse('symptoms-autocomplete')
+        response = self.client.get(url, {'clinic_id': self.clinic.id})
+        self.assertEqual(response.data, [{'value': str(self.symptom.id), 'label': 'Fever'}])
+        response = self.client.get(url, {'clinic_id': self.clinic.id + 1})
+        self.assertEqual(response.data, [])
+
+
+class VocabularyConditionalGetTest(APITestCase):
+    """Vocabulary endpoints answer unchanged data with 304"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.clinic = ClinicModel.objects.create(name='General')
+        SymptomModel.objects.create(name='Fever', clinic=self.clinic)
+        self.aspirin = DrugModel.objects.create(name='Aspirin')
+    
+    def test_list_not_modified_with_one_query(self):
+        """Test that a list revalidation only reads the table state until a write"""
+        url = reverse('drugs-list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            DrugModel.objects.create(name='Ibuprofen')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+    
+    def test_etag_follows_writes_other_workers_made(self):
+        """Test that rows written without moving this process's version change the ETag"""
+        url = reverse('drugs-list')
+        etag = self.client.get(url)['ETag']
+        # bulk_create and update() send no signals, like a worker with its own cache
+        DrugModel.objects.bulk_create([DrugModel(name='Ibuprofen')])
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+        etag = self.client.get(url)['ETag']
+        DrugModel.objects.filter(pk=self.aspirin.pk).update(name='Acetylsalicylic acid', updated_on=timezone.now())
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+    
+    def test_etag_depends_on_query_string(self):
+        """Test that different filters do not share an ETag"""
+        url = reverse('drugs-autocomplete')
+        first = self.client.get(url, {'search': 'asp'})
+        second = self.client.get(url, {'search': 'ibu'})
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        self.assertIn('max-age=10', first['Cache-Control'])
+    
+    def test_symptoms_follow_clinic_renames(self):
+        """Test that symptom ETags change with the clinic names they embed"""
+        url = reverse('symptoms-by-clinic')
+        etag = self.client.get(url, {'clinic_id': self.clinic.id})['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.clinic.name = 'Internal'
+            self.clinic.save()
+        response = self.client.get(url, {'clinic_id': self.clinic.id}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['clinic_name'], 'Internal')
+    
+    def test_retrieve_last_modified(self):
+        """Test that detail responses carry Last-Modified from updated_on, which alone gives no 304"""
+        response = self.client.get(reverse('drugs-detail', kwargs={'pk': self.aspirin.pk}))
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(
+            reverse('drugs-detail', kwargs={'pk': self.aspirin.pk}), HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            reverse('drugs-detail', kwargs={'pk': self.aspirin.pk}), HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+class VocabularyResponseCacheTest(APITestCase):
+    """Hot vocabulary endpoints are served from the response cache"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.clinic = ClinicModel.objects.create(name='General')
+        SymptomModel.objects.create(name='Fever', clinic=self.clinic)
+        DrugModel.objects.create(name='Aspirin')
+    
+    def test_list_hit_runs_one_query(self):
+        """Test that a repeated list is answered from the cache after the ETag's table state"""
+        url = reverse('drugs-list')
+        first = self.client.get(url)
+        with self.assertNumQueries(1):
+            second = self.client.get(url)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+        stats = response_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['stores']), (1, 1, 1))
+    
+    def test_writes_and_query_params_change_the_key(self):
+        """Test that a write to the model or other query params miss the cache"""
+        url = reverse('symptoms-by-clinic')
+        self.client.get(url, {'clinic_id': self.clinic.id})
+        self.client.get(url, {'clinic_id': self.clinic.id + 1})
+        self.assertEqual(response_cache.stats()['hits'], 0)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            SymptomModel.objects.create(name='Cough', clinic=self.clinic)
+        response = self.client.get(url, {'clinic_id': self.clinic.id})
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(response_cache.stats()['hits'], 0)
+        
+        response = self.client.get(url, {'clinic_id': self.clinic.id})
+        self.assertEqual(response_cache.stats()['hits'], 1)
+    
+    def test_only_short_autocomplete_prefixes_are_cached(self):
+        """Test that autocomplete caches prefixes of up to three characters"""
+        url = reverse('drugs-autocomplete')
+        self.client.get(url, {'search': 'asp'})
+        self.client.get(url, {'search': 'aspirin'})
+        self.assertEqual(response_cache.stats()['stores'], 1)
+    
+    def test_evictions_and_stats_endpoint(self):
+        """Test that entries lost from the backend count as evictions"""
+        url = reverse('drugs-list')
+        self.client.get(url)
+        response_cache.cache.clear()
+        self.client.get(url)
+        
+        response = self.client.get(reverse('cache-stats'))
+        self.assertEqual(response.data['backend'], type(response_cache.cache).__name__)
+        self.assertEqual(response.data['evictions'], 1)
+        self.assertEqual(response.data['misses'], 2)
+        self.assertEqual(response.data['hit_ratio'], 0)
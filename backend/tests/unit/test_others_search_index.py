@@ -0,0 +1,78 @@
+"""
+Unit tests for the in-memory autocomplete index
+"""
+from django.test import SimpleTestCase
+
+from others.cache import VocabularyEntry
+from others.search_index import VocabularyIndex, fold
+
+
+def build_index(names, clinic_ids=None):
+    clinic_ids = clinic_ids or [None] * len(names)
+    entries = [
+        VocabularyEntry(position, name, clinic_id)
+        for position, (name, clinic_id) in enumerate(zip(names, clinic_ids))
+    ]
+    entries.sort(key=lambda entry: entry.name.casefold())
+    return VocabularyIndex(entries)
+
+
+def names(entries):
+    return [entry.name for entry in entries]
+
+
+class FoldTest(SimpleTestCase):
+    """Test cases for the search form of names and queries"""
+
+    def test_latin_case_and_diacritics(self):
+        """Test that case, accents and extra whitespace are ignored"""
+        self.assertEqual(fold('  Café   CRÈME '), 'cafe creme')
+        self.assertEqual(fold('STRASSE'), fold('straße'))
+
+    def test_arabic_marks_and_letter_variants(self):
+        """Test that tashkeel, tatweel, hamza forms and final letters are folded"""
+        self.assertEqual(fold('أَسْبِرِين'), 'اسبرين')
+        self.assertEqual(fold('إسهال'), fold('اسهال'))
+        self.assertEqual(fold('آلام'), fold('الام'))
+        self.assertEqual(fold('حمـــى'), fold('حمي'))
+        self.assertEqual(fold('كحة'), fold('كحه'))
+        self.assertEqual(fold('٣٧'), '37')
+
+
+class VocabularyIndexTest(SimpleTestCase):
+    """Test cases for prefix and substring lookups"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.index = build_index([
+            'Chest pain', 'Abdominal pain', 'Painful urination', 'Back pain', 'Spain fever', 'Fever',
+            'Café au lait spots', 'أسبرين', 'ألم في الصدر',
+        ])
+
+    def test_relevance_order(self):
+        """Test name prefixes first, then word prefixes, then other substrings"""
+        self.assertEqual(
+            names(self.index.search('pain', 10)),
+            ['Painful urination', 'Abdominal pain', 'Back pain', 'Chest pain', 'Spain fever'],
+        )
+
+    def test_multi_word_and_folded_queries(self):
+        """Test queries spanning words and queries without accents or hamza"""
+        self.assertEqual(names(self.index.search('chest p', 10)), ['Chest pain'])
+        self.assertEqual(names(self.index.search('st pa', 10)), ['Chest pain'])
+        self.assertEqual(names(self.index.search('CAFE', 10)), ['Café au lait spots'])
+        self.assertEqual(names(self.index.search('اسبر', 10)), ['أسبرين'])
+        self.assertEqual(names(self.index.search('الصدر', 10)), ['ألم في الصدر'])
+
+    def test_limit_and_empty_query(self):
+        """Test that the limit holds and an empty query lists names in order"""
+        self.assertEqual(names(self.index.search('pain', 2)), ['Painful urination', 'Abdominal pain'])
+        self.assertEqual(names(self.index.search('  ', 2)), ['Abdominal pain', 'Back pain'])
+        self.assertEqual(self.index.search('xyz', 10), [])
+
+    def test_accept_filter(self):
+        """Test that rejected entries are skipped without shortening the result"""
+        index = build_index(['Fever', 'Fatigue', 'Feverish'], clinic_ids=[1, 2, 1])
+        accept = lambda entry: entry.clinic_id == 1  # noqa: E731
+        self.assertEqual(names(index.search('f', 10, accept)), ['Fever', 'Feverish'])
+        self.assertEqual(names(index.search('f', 1, accept)), ['Fever'])
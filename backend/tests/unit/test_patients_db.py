@@ -0,0 +1,52 @@
+"""
+Unit tests for the per-connection database setup
+"""
+import os
+import tempfile
+from unittest import skipUnless
+
+from django.db import connection, connections
+from django.test import SimpleTestCase, override_settings
+
+
+PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 7000,
+    'cache_size': -65536,
+    'mmap_size': 1048576,
+}
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite only')
+class SQLitePragmaTest(SimpleTestCase):
+    """Test cases for the SQLITE_PRAGMAS applied to new connections"""
+    databases = {'default'}
+    
+    def setUp(self):
+        """Open a separate connection on a throwaway database file"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(lambda: [os.remove(os.path.join(directory, name)) for name in os.listdir(directory)])
+        settings_dict = {**connections['default'].settings_dict, 'NAME': os.path.join(directory, 'pragmas.sqlite3')}
+        self.connection = type(connections['default'])(settings_dict, alias='pragmas')
+        self.addCleanup(self.connection.close)
+    
+    def pragma(self, name):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+    
+    @override_settings(SQLITE_PRAGMAS=PRODUCTION_PRAGMAS)
+    def test_production_pragmas_are_applied(self):
+        """Test that every configured PRAGMA is set when the connection opens"""
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 7000)
+        self.assertEqual(self.pragma('cache_size'), -65536)
+        self.assertEqual(self.pragma('mmap_size'), 1048576)
+    
+    @override_settings(SQLITE_PRAGMAS={})
+    def test_development_profile_keeps_defaults(self):
+        """Test that an empty SQLITE_PRAGMAS leaves SQLite's defaults"""
+        self.assertEqual(self.pragma('journal_mode'), 'delete')
+        self.assertEqual(self.pragma('synchronous'), 2)
@@ -0,0 +1,77 @@
+"""
+Unit tests asserting the query plans of the common listings use their indexes
+"""
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from others.models import DrugModel, SymptomModel
+from patients.models import Patient, Adult, AdultSummary
+from sync.models import Tombstone
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite query plans')
+class ListingIndexTest(TestCase):
+    """Test cases for the indexes behind filtering and keyset ordering"""
+    
+    def plan(self, queryset):
+        return queryset.explain().upper()
+    
+    def assertUsesIndex(self, queryset, index_name):
+        plan = self.plan(queryset)
+        self.assertIn(f'USING INDEX {index_name.upper()}', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+    
+    def test_default_listing(self):
+        """Test that the default (-created_at, id) page is read in index order"""
+        self.assertUsesIndex(Patient.objects.order_by('-created_at', 'id')[:20], 'patient_created_idx')
+    
+    def test_listing_by_patient_type(self):
+        """Test that a patient_type filter seeks and sorts through one index"""
+        queryset = Patient.objects.filter(patient_type='adult').order_by('-created_at', 'id')[:20]
+        self.assertUsesIndex(queryset, 'patient_type_created_idx')
+        self.assertIn('SEARCH', self.plan(queryset))
+    
+    def test_listing_by_name(self):
+        """Test that ordering by name needs no sort step"""
+        self.assertUsesIndex(Patient.objects.order_by('name', 'id')[:20], 'patient_name_idx')
+    
+    def test_age_range(self):
+        """Test that by_age_range seeks the age index"""
+        plan = self.plan(Adult.objects.filter(age__gte=18, age__lte=65))
+        self.assertIn('SEARCH PATIENTS_PATIENT USING INDEX PATIENT_AGE_IDX', plan)
+    
+    def test_gender_and_age(self):
+        """Test that the adult search on gender and age uses the composite index"""
+        plan = self.plan(Adult.objects.filter(gender='female', age=30))
+        self.assertIn('SEARCH PATIENTS_PATIENT USING INDEX PATIENT_GENDER_AGE_IDX (GENDER=? AND AGE=?)', plan)
+    
+    def test_symptoms_of_a_clinic(self):
+        """Test that a clinic's symptoms are read in (-created_on, id) order from one index"""
+        queryset = SymptomModel.objects.filter(clinic_id=1).order_by('-created_on', 'id')[:20]
+        self.assertUsesIndex(queryset, 'symptom_clinic_created_idx')
+    
+    def test_sync_changes(self):
+        """Test that a sync reads changed rows and tombstones in index order"""
+        since = timezone.now() - timedelta(days=1)
+        queryset = Patient.objects.filter(updated_at__gt=since, updated_at__lte=timezone.now()).order_by('updated_at', 'pk')
+        self.assertUsesIndex(queryset[:500], 'patient_updated_idx')
+        queryset = DrugModel.objects.filter(updated_on__gt=since).order_by('updated_on', 'pk')
+        self.assertUsesIndex(queryset[:500], 'drug_updated_idx')
+        queryset = Tombstone.objects.filter(model='patients.adult', deleted_at__gt=since).order_by('deleted_at', 'id')
+        self.assertUsesIndex(queryset[:500], 'tombstone_model_deleted_idx')
+    
+    def test_summary_listing(self):
+        """Test that the adult summary listing reads one table in index order"""
+        queryset = AdultSummary.objects.order_by('-created_at', 'pk')[:20]
+        self.assertUsesIndex(queryset, 'adultsummary_created_idx')
+        self.assertNotIn('PATIENTS_PATIENT', self.plan(queryset))
+    
+    def test_summary_by_name_and_gender_age(self):
+        """Test that the summary's name ordering and gender/age filters use its indexes"""
+        self.assertUsesIndex(AdultSummary.objects.order_by('name', 'pk')[:20], 'adultsummary_name_idx')
+        plan = self.plan(AdultSummary.objects.filter(gender='female', age=30))
+        self.assertIn('USING INDEX ADULTSUMMARY_GENDER_AGE_IDX (GENDER=? AND AGE=?)', plan)
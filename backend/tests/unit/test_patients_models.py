@@ -3,7 +3,7 @@ Unit tests for Patient and Adult models
 """
 from django.test import TestCase
 from django.core.exceptions import ValidationError
-from patients.models import Patient, Adult
+from patients.models import Patient, Adult, normalize_mobile_number
 
 
 class PatientModelTest(TestCase):
@@ -149,3 +149,24 @@ class AdultModelTest(TestCase):
         # Test negative age of youngest
         adult = Adult(**{**self.adult_data, 'code': 'ADULT008', 'age_of_the_youngest': -1})
         self.assertEqual(adult.age_of_the_youngest, -1)
+
+
+class MobileNumberNormalizationTest(TestCase):
+    """Test cases for the normalised mobile number columns"""
+    
+    def test_normalize_mobile_number(self):
+        """Test that every spelling of a number normalises to the same digits"""
+        for value in ['01012345678', '+20 101-234-5678', '00201012345678', '201012345678', '010 1234 5678']:
+            self.assertEqual(normalize_mobile_number(value), '1012345678', value)
+        self.assertEqual(normalize_mobile_number(''), '')
+    
+    def test_digits_are_kept_in_sync(self):
+        """Test that saving a patient fills the derived columns"""
+        patient = Patient.objects.create(code='PH001', name='Phone Patient', mobile_number='+20 101 234 5678')
+        self.assertEqual(patient.mobile_digits, '1012345678')
+        self.assertEqual(patient.mobile_digits_reversed, '8765432101')
+        
+        patient.mobile_number = '01100000009'
+        patient.save(update_fields=['mobile_number'])
+        patient.refresh_from_db()
+        self.assertEqual(patient.mobile_digits, '1100000009')
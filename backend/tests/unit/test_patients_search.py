@@ -0,0 +1,183 @@
+"""
+Unit tests for the patient search backends
+"""
+import io
+from unittest import mock, skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from patients.models import Patient, Adult
+from patients.search import (
+    DatabaseSearchBackend, PostgresTrigramSearchBackend, SQLiteFTSSearchBackend, get_search_backend
+)
+
+
+ADULT_FIELDS = ['name', 'mobile_number', 'occupation']
+
+
+class SearchBackendTestMixin:
+    """Behaviour shared by every search backend"""
+    backend_class = None
+    
+    def setUp(self):
+        """Set up test data"""
+        self.backend = self.backend_class()
+        self.mohamed = Adult.objects.create(
+            code='S001', name='Mohamed Ali', mobile_number='01011112222', occupation='Farmer'
+        )
+        self.ahmed = Adult.objects.create(
+            code='S002', name='Ahmed Mohamed', mobile_number='01233334444', occupation='Teacher'
+        )
+        self.child = Patient.objects.create(
+            code='S003', name='Mohamed Child', mobile_number='01555556666', patient_type='pediatric'
+        )
+    
+    def search(self, queryset, query, fields, limit=10):
+        return self.backend.search(queryset, query, fields, limit)
+    
+    def test_substring_match(self):
+        """Test that names are matched anywhere, case-insensitively"""
+        results = self.search(Patient.objects.all(), 'MED', ['name'])
+        self.assertEqual(set(results), {Patient.objects.get(pk=self.mohamed.pk),
+                                        Patient.objects.get(pk=self.ahmed.pk), self.child})
+    
+    def test_prefix_matches_first(self):
+        """Test that prefix matches rank before other matches"""
+        results = self.search(Patient.objects.all(), 'mohamed', ['name'])
+        self.assertEqual([p.name for p in results][-1], 'Ahmed Mohamed')
+    
+    def test_limit(self):
+        """Test that at most limit results are returned"""
+        self.assertEqual(len(self.search(Patient.objects.all(), 'moh', ['name'], limit=2)), 2)
+    
+    def test_adult_fields(self):
+        """Test that adult searches cover phone and occupation but not other patients"""
+        self.assertEqual(self.search(Adult.objects.all(), 'teach', ['name', 'mobile_number', 'occupation']),
+                         [self.ahmed])
+        self.assertEqual(self.search(Adult.objects.all(), '3333', ['name', 'mobile_number', 'occupation']),
+                         [self.ahmed])
+        self.assertNotIn(self.child.pk, [a.pk for a in self.search(Adult.objects.all(), 'moh', ['name'])])
+    
+    def test_index_follows_updates_and_deletes(self):
+        """Test that saved and deleted patients are reflected in the results"""
+        self.mohamed.name = 'Mostafa Ali'
+        self.mohamed.save()
+        self.ahmed.delete()
+        
+        names = {p.name for p in self.search(Patient.objects.all(), 'mo', ['name'])}
+        self.assertEqual(names, {'Mohamed Child', 'Mostafa Ali'})
+    
+    def test_relevance_tiers(self):
+        """Test exact phone > name prefix > substring > occupation"""
+        ali = Adult.objects.create(code='S004', name='Ali Hassan', mobile_number='01077778888', occupation='Driver')
+        specialist = Adult.objects.create(
+            code='S005', name='Omar Saad', mobile_number='01099990000', occupation='Specialist'
+        )
+        results = self.search(Adult.objects.all(), 'ali', ADULT_FIELDS)
+        self.assertEqual(results, [ali, self.mohamed, specialist])
+        
+        other_phone = Adult.objects.create(code='S006', name='Zed', mobile_number='201011112222')
+        results = self.search(Adult.objects.all(), '01011112222', ADULT_FIELDS)
+        self.assertEqual(results, [self.mohamed, other_phone])
+    
+    def test_order_is_stable(self):
+        """Test that repeated searches return the same order"""
+        first = self.search(Adult.objects.all(), 'moh', ADULT_FIELDS)
+        for _ in range(3):
+            self.assertEqual(self.search(Adult.objects.all(), 'moh', ADULT_FIELDS), first)
+    
+    def test_short_query(self):
+        """Test that one and two character queries still match"""
+        self.assertEqual(len(self.search(Patient.objects.all(), 'al', ['name'])), 1)
+
+
+class DatabaseSearchBackendTest(SearchBackendTestMixin, TestCase):
+    """Test cases for the icontains fallback backend"""
+    backend_class = DatabaseSearchBackend
+    
+    def test_single_ranked_query(self):
+        """Test that all fields are searched in one query, without UNION"""
+        with CaptureQueriesContext(connection) as context:
+            results = self.search(Adult.objects.all(), 'moh', ADULT_FIELDS, limit=1)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(len(context.captured_queries), 1)
+        sql = context.captured_queries[0]['sql'].upper()
+        self.assertNotIn('UNION', sql)
+        self.assertIn('LIMIT 1', sql)
+    
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite query plan')
+    def test_query_plan(self):
+        """Test that the plan is one scan plus a primary key join, with no compound step"""
+        queryset = self.backend.get_queryset(Adult.objects.all(), 'moh', ADULT_FIELDS)[:10]
+        plan = queryset.explain().upper()
+        self.assertEqual(plan.count('SCAN '), 1, plan)
+        self.assertIn('SEARCH PATIENTS_PATIENT USING INDEX', plan)
+        self.assertNotIn('COMPOUND', plan)
+        self.assertNotIn('DISTINCT', plan)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite only')
+class SQLiteFTSSearchBackendTest(SearchBackendTestMixin, TestCase):
+    """Test cases for the SQLite FTS5 backend"""
+    backend_class = SQLiteFTSSearchBackend
+    
+    def test_backend_is_selected_automatically(self):
+        """Test that "auto" picks the FTS5 backend on SQLite"""
+        self.assertIsInstance(get_search_backend(), SQLiteFTSSearchBackend)
+    
+    def test_rebuild(self):
+        """Test that rebuild repopulates the index from the tables"""
+        Patient.objects.filter(pk=self.child.pk).update(name='Renamed Child')
+        self.backend.rebuild()
+        self.assertEqual(self.search(Patient.objects.all(), 'renamed', ['name']), [self.child])
+    
+    def test_fallback_is_not_kept(self):
+        """Test that "auto" picks FTS5 once the table exists, even after falling back"""
+        with mock.patch.dict('patients.search._backends', clear=True):
+            with mock.patch.object(SQLiteFTSSearchBackend, 'is_available', return_value=False):
+                self.assertIsInstance(get_search_backend(), DatabaseSearchBackend)
+            self.assertIsInstance(get_search_backend(), SQLiteFTSSearchBackend)
+            with CaptureQueriesContext(connection) as context:
+                get_search_backend()
+            self.assertEqual(len(context.captured_queries), 0)
+    
+    def test_rebuild_command(self):
+        """Test that the command finds rows the signals missed and rebuilds them"""
+        call_command('rebuild_search_index', '--check', stdout=io.StringIO())
+        Patient.objects.filter(pk=self.child.pk).update(name='Renamed Child')
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM patients_patient_search WHERE patient_id = %s", [self.ahmed.pk.hex])
+        with self.assertRaisesMessage(CommandError, '2 stale rows'):
+            call_command('rebuild_search_index', '--check')
+        
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        call_command('rebuild_search_index', '--check', stdout=io.StringIO())
+        self.assertEqual(self.search(Patient.objects.all(), 'renamed', ['name']), [self.child])
+    
+    def test_index_is_keyed_by_patient_id(self):
+        """Test that renumbered patients_patient rowids (VACUUM) do not break search"""
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE patients_patient SET rowid = rowid + 1000")
+        self.assertEqual(self.search(Patient.objects.all(), 'child', ['name']), [self.child])
+        self.child.delete()
+        self.assertEqual(self.search(Patient.objects.all(), 'child', ['name']), [])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'PostgreSQL only')
+class PostgresTrigramSearchBackendTest(SearchBackendTestMixin, TestCase):
+    """Test cases for the pg_trgm backend"""
+    backend_class = PostgresTrigramSearchBackend
+    
+    def test_backend_is_selected_automatically(self):
+        """Test that "auto" picks the trigram backend on PostgreSQL"""
+        self.assertIsInstance(get_search_backend(), PostgresTrigramSearchBackend)
+    
+    def test_trigram_indexes_exist(self):
+        """Test that migration 0004 created the GIN trigram indexes"""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE indexdef LIKE %s", ['%gin_trgm_ops%'])
+            names = {row[0] for row in cursor.fetchall()}
+        self.assertIn('patients_patient_name_trgm', names)
+        self.assertIn('patients_adult_occupation_trgm', names)
@@ -5,6 +5,7 @@ from django.test import TestCase
 from rest_framework.exceptions import ValidationError
 from patients.models import Patient, Adult
 from patients.serializers import PatientSerializer, AdultSerializer
+from others.models import ClinicModel, SymptomModel, DrugModel
 
 
 class PatientSerializerTest(TestCase):
@@ -158,3 +159,89 @@ class AdultSerializerTest(TestCase):
         self.assertEqual(updated_adult.age, 40)
         self.assertEqual(updated_adult.smoking, 'no')
         self.assertEqual(updated_adult.cessation, 'yes')
+
+
+class AdultSerializerManyToManyTest(TestCase):
+    """Test cases for many-to-many resolution in AdultSerializer"""
+    
+    def setUp(self):
+        """Set up test data"""
+        clinic = ClinicModel.objects.create(name='General')
+        self.symptoms = [SymptomModel.objects.create(name=f'Symptom {i}', clinic=clinic) for i in range(4)]
+        self.drugs = [DrugModel.objects.create(name=f'Drug {i}') for i in range(3)]
+        self.valid_data = {
+            'patient_type': 'adult',
+            'code': 'M2M001',
+            'name': 'Adult Relations',
+            'mobile_number': '09876543210',
+            'age': 35,
+        }
+    
+    def test_relations_are_resolved_from_the_vocabulary_cache(self):
+        """Test that relations cost a table check and a load per vocabulary, then no queries"""
+        data = {
+            **self.valid_data,
+            'complaints': [{'value': str(s.id), 'label': s.name} for s in self.symptoms],
+            'drugs': [str(d.id) for d in self.drugs],
+        }
+        with self.assertNumQueries(4):
+            self.assertTrue(AdultSerializer(data=dict(data)).is_valid())
+        serializer = AdultSerializer(data=data)
+        with self.assertNumQueries(0):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        
+        adult = serializer.save()
+        self.assertEqual(set(adult.complaints.all()), set(self.symptoms))
+        self.assertEqual(set(adult.drugs.all()), set(self.drugs))
+        self.assertEqual(adult.medical.count(), 0)
+    
+    def test_unknown_ids_are_validation_errors(self):
+        """Test that missing or malformed IDs are reported instead of dropped"""
+        missing_id = '00000000-0000-0000-0000-000000000000'
+        data = {
+            **self.valid_data,
+            'complaints': [{'value': str(self.symptoms[0].id)}, {'value': missing_id}],
+            'drugs': ['not-a-uuid'],
+        }
+        serializer = AdultSerializer(data=data)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn(missing_id, serializer.errors['complaints'][0])
+        self.assertIn('not-a-uuid', serializer.errors['drugs'][0])
+        self.assertNotIn('medical', serializer.errors)
+
+
+class DynamicFieldsTest(TestCase):
+    """Test cases for sparse fieldsets on the full serializers"""
+    
+    def setUp(self):
+        """Set up an adult with a complaint and a drug"""
+        clinic = ClinicModel.objects.create(name='General')
+        self.symptom = SymptomModel.objects.create(name='Cough', clinic=clinic)
+        self.drug = DrugModel.objects.create(name='Aspirin')
+        self.adult = Adult.objects.create(code='DYN001', name='Sparse Adult', mobile_number='01234567890')
+        self.adult.complaints.set([self.symptom])
+        self.adult.drugs.set([self.drug])
+    
+    def test_fields_and_expand(self):
+        """Test that only the requested fields are rendered, expanded ones as {value, label}"""
+        data = AdultSerializer(self.adult, fields=['name', 'drugs'], expand=['drugs']).data
+        self.assertEqual(data, {
+            'name': 'Sparse Adult',
+            'drugs': [{'value': str(self.drug.pk), 'label': 'Aspirin'}],
+        })
+        # complaints stay {value, label} by default, other relations primary keys
+        data = AdultSerializer(self.adult).data
+        self.assertEqual(data['complaints'], [{'value': str(self.symptom.pk), 'label': 'Cough'}])
+        self.assertEqual(data['drugs'], [self.drug.pk])
+    
+    def test_queryset_fields(self):
+        """Test the columns, joins and prefetches the requested fields need"""
+        from others.serializers import SymptomSerializer
+        
+        columns, related, prefetch = AdultSerializer(fields=['id', 'name', 'complaints']).get_queryset_fields()
+        self.assertEqual(columns, {'patient_ptr', 'id', 'name'})
+        self.assertEqual((related, prefetch), (set(), {'complaints'}))
+        
+        columns, related, prefetch = SymptomSerializer(fields=['id', 'clinic_name']).get_queryset_fields()
+        self.assertEqual(columns, {'id', 'clinic', 'clinic__name'})
+        self.assertEqual((related, prefetch), ({'clinic'}, set()))
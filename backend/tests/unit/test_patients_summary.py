@@ -0,0 +1,93 @@
+"""
+Unit tests for the AdultSummary read model kept by patients.summary
+"""
+from django.test import TestCase
+
+from common.bulk_delete import bulk_delete
+from others.models import ClinicModel, SymptomModel
+from patients.bulk import bulk_create_adults, bulk_update_vitals
+from patients.models import Patient, Adult, AdultSummary
+from patients.summary import rebuild_adult_summaries, refresh_adult_summaries
+
+
+class AdultSummaryTest(TestCase):
+    """Test cases for keeping AdultSummary in sync with Adult"""
+
+    def setUp(self):
+        """Set up an adult with two complaints"""
+        clinic = ClinicModel.objects.create(name='General')
+        self.symptoms = [SymptomModel.objects.create(name=f'Symptom {i}', clinic=clinic) for i in range(2)]
+        self.adult = Adult.objects.create(
+            code='SUM001', name='Summary Adult', gender='female',
+            mobile_number='01012345678', age=41, occupation='Teacher',
+        )
+        self.adult.complaints.set(self.symptoms)
+
+    def summary(self):
+        return AdultSummary.objects.get(adult=self.adult)
+
+    def test_save_copies_columns(self):
+        """Test that creating an adult writes its summary row"""
+        summary = self.summary()
+        self.assertEqual(summary.code, 'SUM001')
+        self.assertEqual(summary.name, 'Summary Adult')
+        self.assertEqual(summary.gender, 'female')
+        self.assertEqual(summary.age, 41)
+        self.assertEqual(summary.occupation, 'Teacher')
+        self.assertEqual(summary.created_at, self.adult.created_at)
+        self.assertEqual(summary.complaint_ids, sorted(str(symptom.pk) for symptom in self.symptoms))
+
+    def test_updates_follow_adult_and_patient_saves(self):
+        """Test that saving the adult or its bare Patient row rewrites the summary"""
+        self.adult.occupation = 'Nurse'
+        self.adult.save()
+        self.assertEqual(self.summary().occupation, 'Nurse')
+
+        patient = Patient.objects.get(pk=self.adult.pk)
+        patient.name = 'Renamed Adult'
+        patient.save()
+        summary = self.summary()
+        self.assertEqual(summary.name, 'Renamed Adult')
+        self.assertEqual(summary.occupation, 'Nurse')
+
+    def test_complaint_changes(self):
+        """Test that complaints added or cleared from either side update the IDs"""
+        self.adult.complaints.remove(self.symptoms[0])
+        self.assertEqual(self.summary().complaint_ids, [str(self.symptoms[1].pk)])
+
+        self.symptoms[1].adult_complaints.clear()
+        self.assertEqual(self.summary().complaint_ids, [])
+
+        self.symptoms[0].adult_complaints.add(self.adult)
+        self.assertEqual(self.summary().complaint_ids, [str(self.symptoms[0].pk)])
+
+    def test_patients_that_are_not_adults(self):
+        """Test that saving a bare patient creates no summary row"""
+        Patient.objects.create(code='SUM002', name='Not An Adult', mobile_number='01012345679')
+        self.assertEqual(AdultSummary.objects.count(), 1)
+
+    def test_bulk_paths(self):
+        """Test that bulk creates, vitals updates and deletes keep the summaries"""
+        results = bulk_create_adults([
+            {'code': 'SUM003', 'name': 'Bulk One', 'mobile_number': '01012345670', 'complaints': self.symptoms[:1]},
+            {'code': 'SUM004', 'name': 'Bulk Two', 'mobile_number': '01012345671'},
+        ])
+        summaries = AdultSummary.objects.in_bulk([adult.pk for adult in results])
+        self.assertEqual(summaries[results[0].pk].complaint_ids, [str(self.symptoms[0].pk)])
+        self.assertEqual(summaries[results[1].pk].name, 'Bulk Two')
+
+        bulk_update_vitals([{'id': self.adult.pk, 'hr': 80}])
+        self.assertEqual(self.summary().updated_at, Adult.objects.get(pk=self.adult.pk).updated_at)
+
+        bulk_delete(Patient, [adult.pk for adult in results])
+        self.assertEqual(list(AdultSummary.objects.values_list('adult_id', flat=True)), [self.adult.pk])
+
+    def test_refresh_and_rebuild(self):
+        """Test that rows changed behind the signals are repaired on demand"""
+        Patient.objects.filter(pk=self.adult.pk).update(name='Raw Update')
+        refresh_adult_summaries([self.adult.pk])
+        self.assertEqual(self.summary().name, 'Raw Update')
+
+        AdultSummary.objects.all().delete()
+        rebuild_adult_summaries()
+        self.assertEqual(self.summary().age, 41)